@@ -9,12 +9,22 @@ WORKFLOW STEPS:
 
 1. FILE MONITORING
    - Watch a folder for new event flyers (PDFs or images)
-   - Detect file creation and wait for file to fully write before processing
+   - Detect file creation (or a rename into the folder) and wait for the file to
+     fully write before processing
+   - The file counts as written as soon as the writer closes it or renames it into
+     place (inotify close-write/moved-to events); where the filesystem does not
+     report those, once its size is stable for ~1 second
    - This handles the race condition of incomplete uploads
+   - On startup, also queue the flyers already in the folder (dropped while the
+     agent was down)
 
-2. TEXT EXTRACTION
-   - PDF: Use PyMuPDF to extract embedded text
+2. TEXT EXTRACTION (document_text.py)
+   - PDF: Use PyMuPDF to extract embedded text, page by page
+   - Scanned PDF pages (no text layer): rasterize and OCR them, in parallel worker
+     processes when there are several (--ocr-processes)
    - Images: Use EasyOCR (optical character recognition) to extract text from images
+   - Downscale images to an OCR-friendly size before OCR
+   - Stop reading pages once the text has the event's date and times
    - Clean up excessive whitespace in OCR output (common in poor-quality scans)
 
 3. LLM-BASED INFORMATION EXTRACTION
@@ -24,6 +34,15 @@ WORKFLOW STEPS:
      * Physical venue vs. virtual meeting link (handle hybrid events)
      * Description and other details
    - Fallback to null values for missing information (don't guess)
+   - Before that, a regex pre-extractor (pre_extract.py) reads the fields that
+     templated flyers state in standard forms (dates, time ranges, timezone
+     abbreviations, Zoom links, "Title:"/"Location:" labels), with a confidence per
+     field; the LLM is only asked for the fields below --min-confidence, and not
+     at all when none are left
+   - Several flyers can share one request (--llm-batch-size); the reply is a JSON
+     array of events, constrained by a JSON schema where the backend supports it
+   - Malformed JSON is repaired locally (llm_json.py: fences, comments, trailing or
+     missing commas, Python literals); only if that fails is the LLM asked again
 
 4. TIMEZONE NORMALIZATION
    - Convert timezone abbreviations (PT, EST, etc.) to IANA timezone names
@@ -45,6 +64,31 @@ WORKFLOW STEPS:
 7. DATA PERSISTENCE
    - Save extracted event data as JSON for auditing and error recovery
    - Move processed file to 'processed' folder to prevent re-processing
+   - Cache extracted text (by file content hash) and event JSON (by normalized
+     text hash, model and prompt version) in .flyer_cache.sqlite, so re-dropped
+     or duplicate flyers skip OCR and the LLM call, across restarts too
+   - Journal each flyer's completed stages (extracted, parsed, calendar-created,
+     moved) in .flyer_journal.jsonl, so after a crash or restart an unfinished
+     flyer resumes where it stopped, without a duplicate calendar event
+
+PIPELINE:
+   The watchdog observer thread only enqueues paths. Three asyncio stages, each
+   with its own concurrency limit, then process flyers independently:
+   - text: wait for the file to be ready, then run PDF/OCR extraction in a
+     thread pool (--ocr-workers)
+   - llm: collect flyer texts for up to --llm-batch-window seconds (or
+     --llm-batch-size flyers) and send them as one extraction prompt through an
+     async OpenAI/Ollama client, with up to --llm-concurrency requests in flight;
+     tokens and latency are printed per flyer
+   - calendar: collect events for up to --calendar-batch-window seconds (or
+     --calendar-batch-size events) and insert them with one Calendar API batch
+     request, retrying items that fail transiently; then save the JSON and move
+     each flyer. Up to --calendar-workers batches are in flight (each thread has
+     its own Calendar API client)
+   A burst of flyers therefore overlaps its LLM round-trips instead of waiting on
+   them one at a time.
+   Per-stage timings, queue depths, LLM tokens, cache hits and failures are
+   recorded in metrics (--metrics-port for Prometheus, --metrics-jsonl for a log)
 
 KEY AUTOMATION CONSIDERATIONS:
 - Race condition handling: Files may not be fully written when detected
@@ -57,51 +101,141 @@ KEY AUTOMATION CONSIDERATIONS:
 import json
 import time
 import argparse
+import asyncio
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-import fitz  # pymupdf
-import easyocr
-from dateutil import parser as dateparser
-
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# pymupdf, EasyOCR, the Google API client and the LLM clients are imported and
+# initialized on first use (see document_text.get_ocr_reader, get_calendar_service
+# and get_llm_client), so --help and PDF-only runs never load the OCR model
+import document_text
+from document_text import IMAGE_SUFFIXES, read_image, read_pdf
+from journal import Journal
+from llm_json import parse_json_reply
+from metrics import Registry, append_jsonl, start_http_server
+from pre_extract import PRE_EXTRACT_VERSION, pre_extract
+from result_cache import DEFAULT_MAX_BYTES, ResultCache, event_key, file_digest
+from timezones import TZ_ABBREVIATIONS, get_zone, parse_local, resolve_timezone
 
 WATCH_DIR = Path("event_dropbox")
 PROCESSED_DIR = Path("processed")
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
-
-# Initialize OCR reader once (CPU only, no GPU)
-ocr_reader = easyocr.Reader(["en"], gpu=False)
+CACHE_PATH = Path(".flyer_cache.sqlite")
+JOURNAL_PATH = Path(".flyer_journal.jsonl")
+# Bump when the extraction prompt or the pre-extractor changes, so cached events
+# are not reused
+PROMPT_VERSION = 3
 
 # Global variables for LLM backend (set based on CLI arg)
 llm_backend = None
-openai_client = None
+openai_key = None
+llm_client = None
 ollama_model = "tinyllama"
 
+# Text/event result cache (set in run; None disables caching)
+result_cache = None
+# Journal of completed stages per flyer (set in run; None disables resuming)
+work_journal = None
+# Pre-extracted fields with at least this confidence skip the LLM (set in run;
+# None disables the pre-extractor)
+pre_extract_confidence = 0.8
+
+# Metrics, served in Prometheus format with --metrics-port and dumped as JSON
+# lines with --metrics-jsonl (see metrics.py)
+METRICS = Registry()
+stage_seconds = METRICS.histogram(
+    "flyer_stage_seconds",
+    "Seconds per flyer in each stage: ready (waiting for the file to be written), "
+    "text, llm, calendar, save",
+    ["stage"],
+)
+flyer_seconds = METRICS.histogram(
+    "flyer_seconds", "Seconds from queuing a flyer to moving it to processed/"
+)
+queue_depth = METRICS.gauge(
+    "flyer_queue_depth", "Flyers waiting in each stage's queue", ["queue"]
+)
+flyers_in_flight = METRICS.gauge("flyer_in_flight", "Flyers queued or being processed")
+flyers_processed = METRICS.counter(
+    "flyer_processed_total", "Flyers processed (event created, file moved)"
+)
+stage_failures = METRICS.counter(
+    "flyer_failures_total", "Flyers that failed, by stage", ["stage"]
+)
+cache_lookups = METRICS.counter(
+    "flyer_cache_lookups_total", "Result cache lookups", ["cache", "result"]
+)
+llm_requests = METRICS.counter("flyer_llm_requests_total", "LLM requests, re-asks included")
+llm_reasks = METRICS.counter(
+    "flyer_llm_reasks_total", "LLM requests sent again because the reply did not parse"
+)
+llm_tokens = METRICS.counter(
+    "flyer_llm_tokens_total", "LLM tokens (prompt or completion)", ["kind"]
+)
+llm_batch_flyers = METRICS.histogram(
+    "flyer_llm_batch_size", "Flyers per LLM request", buckets=(1, 2, 4, 8, 16)
+)
+calendar_requests = METRICS.counter(
+    "flyer_calendar_requests_total", "Calendar API batch requests, retries included"
+)
+calendar_retries = METRICS.counter(
+    "flyer_calendar_retries_total",
+    "Calendar inserts sent again after a retryable error",
+)
+pre_extracted = METRICS.counter(
+    "flyer_pre_extract_total",
+    "Flyers by how many fields the pre-extractor resolved: all (no LLM call), "
+    "some or none",
+    ["result"],
+)
+flyers_resumed = METRICS.counter(
+    "flyer_resumed_total",
+    "Flyers resumed from the journal, by the last stage they had completed",
+    ["stage"],
+)
+
+SUPPORTED_EXTENSIONS = {".pdf"} | IMAGE_SUFFIXES
+
 
 # ---------- LLM INITIALIZATION ----------
 def init_llm_backend(backend, openai_api_key=None):
-    """Initialize the LLM backend (OpenAI or Ollama)."""
-    global llm_backend, openai_client
+    """Select the LLM backend (OpenAI or Ollama); its client is created on first use."""
+    global llm_backend, openai_key
 
     llm_backend = backend
+    openai_key = openai_api_key
 
     if backend == "openai":
-        from openai import OpenAI
-
-        openai_client = OpenAI(api_key=openai_api_key)
         print("LLM Backend: OpenAI (gpt-4o-mini)")
     elif backend == "ollama":
-        import ollama
-
         print(f"LLM Backend: Ollama ({ollama_model})")
     else:
         raise ValueError(f"Unknown backend: {backend}")
 
 
+def get_llm_client():
+    """Return the async LLM client, creating it on first use.
+
+    Only called from the event loop thread, so no lock is needed.
+    """
+    global llm_client
+
+    if llm_client is None:
+        if llm_backend == "openai":
+            from openai import AsyncOpenAI
+
+            llm_client = AsyncOpenAI(api_key=openai_key)
+        else:
+            import ollama
+
+            llm_client = ollama.AsyncClient()
+    return llm_client
+
+
 # ---------- DOCUMENT TEXT (PDF OR IMAGE) ----------
 def read_document(path):
     """Extract text from PDF or image file."""
@@ -109,20 +243,11 @@ def read_document(path):
     suffix = path.suffix.lower()
 
     if suffix == ".pdf":
-        # Extract text from PDF
-        text = ""
-        doc = fitz.open(path)
-        for page in doc:
-            text += page.get_text()
-        return text
-    elif suffix in {".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".gif"}:
+        # Text layer per page; OCR for scanned pages
+        return read_pdf(path)
+    elif suffix in IMAGE_SUFFIXES:
         # Extract text from image using OCR
-        results = ocr_reader.readtext(str(path))
-        # Join lines and clean up excessive newlines
-        text = "\n".join([line[1] for line in results])
-        # Replace multiple newlines with single newline
-        text = "\n".join([l.strip() for l in text.split("\n") if l.strip()])
-        return text
+        return read_image(path)
     else:
         raise ValueError(
             f"Unsupported file type: {suffix}. "
@@ -130,151 +255,492 @@ def read_document(path):
         )
 
 
-# ---------- LLM PARSE ----------
+def read_document_cached(path, digest=None):
+    """Return the document's text, reusing the cached text of identical files.
+
+    digest is the file's SHA-256, if already known.
+    """
+    if result_cache is None:
+        return read_document(path)
+
+    digest = digest or file_digest(path)
+    text = result_cache.get_text(digest)
+    if text is None:
+        cache_lookups.inc(cache="text", result="miss")
+        text = read_document(path)
+        result_cache.put_text(digest, text)
+    else:
+        cache_lookups.inc(cache="text", result="hit")
+        print(f"Cached text: {Path(path).name}")
+    return text
 
 
 # ---------- LLM PARSE ----------
-def extract_event(text):
-    """Extract event details from text using the configured LLM backend."""
-    prompt = f"""Extract event info from this flyer. Return ONLY valid JSON, no comments, no explanations.
+EVENT_FIELDS = (
+    "title",
+    "date",
+    "start_time",
+    "end_time",
+    "timezone",
+    "venue",
+    "meeting_link",
+    "description",
+)
+# Fields many flyers lack (or do not label): not pre-extracting them does not
+# make a flyer go to the LLM
+OPTIONAL_FIELDS = ("description",)
+# Most flyers packed into one LLM request (--llm-batch-size)
+MAX_LLM_BATCH_SIZE = 16
+
+# What the prompt's JSON template shows for each field
+FIELD_HINTS = {
+    "title": "event title",
+    "date": "YYYY-MM-DD",
+    "start_time": "H:MM AM/PM",
+    "end_time": "H:MM AM/PM",
+    "timezone": "timezone or abbreviation (or null if not mentioned)",
+    "venue": "physical location or null",
+    "meeting_link": "Zoom/Teams/etc URL or null",
+    "description": "brief description",
+}
+
+# Token and time accounting of one flyer's extraction. Tokens of a batched request
+# are split between its flyers by text length; seconds is the request's wall time
+LLMUsage = namedtuple(
+    "LLMUsage", ["prompt_tokens", "completion_tokens", "seconds", "batch_size"]
+)
+
+
+def llm_model_name():
+    """Return the model name of the configured LLM backend."""
+    return "gpt-4o-mini" if llm_backend == "openai" else ollama_model
+
+
+def events_schema(fields):
+    """JSON schema of the reply: one entry per flyer, each field a string or null.
+
+    OpenAI enforces it (strict structured output); Ollama constrains its output to it.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "events": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "flyer": {"type": "integer"},
+                        **{field: {"type": ["string", "null"]} for field in fields},
+                    },
+                    "required": ["flyer", *fields],
+                    "additionalProperties": False,
+                },
+            }
+        },
+        "required": ["events"],
+        "additionalProperties": False,
+    }
 
-{text}
+
+def build_prompt(texts, fields=EVENT_FIELDS):
+    """Return the prompt extracting fields from one or more flyer texts."""
+    flyers = "\n\n".join(
+        f"### Flyer {i}\n{text}" for i, text in enumerate(texts, start=1)
+    )
+    template = "".join(
+        f',\n      "{field}": "{FIELD_HINTS[field]}"' for field in fields
+    )
+    return f"""Extract event info from each of these {len(texts)} flyer(s). Return ONLY valid JSON, no comments, no explanations.
+
+{flyers}
 
 JSON:
 {{
-  "title": "event title",
-  "date": "YYYY-MM-DD",
-  "start_time": "H:MM AM/PM",
-  "end_time": "H:MM AM/PM",
-  "timezone": "timezone or abbreviation (or null if not mentioned)",
-  "venue": "physical location or null",
-  "meeting_link": "Zoom/Teams/etc URL or null",
-  "description": "brief description"
+  "events": [
+    {{
+      "flyer": 1{template}
+    }}
+  ]
 }}
 
 Rules:
 - Return ONLY the JSON object, nothing else
+- One entry in "events" per flyer, in flyer order, with "flyer" set to the flyer's number
+- Use only the text of a flyer for its entry; never mix details from different flyers
 - No comments, no // or /* */ 
 - Every field must have a value (use null if missing, not "null" string)
 - Every field must be followed by a comma except the last field
 - Do not guess. Extract actual URLs for meeting links.
 - For timezone: ONLY extract if explicitly mentioned in the flyer. Use null if not mentioned."""
 
+
+async def call_llm(messages, fields=EVENT_FIELDS):
+    """Send a chat request to the configured backend, asking for events JSON with
+    the given fields (see events_schema).
+
+    Returns (reply text, prompt tokens, completion tokens).
+    """
+    schema = events_schema(fields)
     if llm_backend == "openai":
-        resp = openai_client.chat.completions.create(
+        resp = await get_llm_client().chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             temperature=0,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "flyer_events",
+                    "strict": True,
+                    "schema": schema,
+                },
+            },
         )
-        content = resp.choices[0].message.content
+        usage = resp.usage
+        content = resp.choices[0].message.content or ""
+        prompt_tokens = usage.prompt_tokens if usage else 0
+        completion_tokens = usage.completion_tokens if usage else 0
     elif llm_backend == "ollama":
-        import ollama
-
-        response = ollama.chat(
+        response = await get_llm_client().chat(
             model=ollama_model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
+            format=schema,
             options={"temperature": 0},
         )
-        content = response["message"]["content"]
+        content = response["message"]["content"] or ""
+        prompt_tokens = response.get("prompt_eval_count") or 0
+        completion_tokens = response.get("eval_count") or 0
+    else:
+        raise ValueError(f"Unknown backend: {llm_backend}")
 
-    # Clean up response
+    llm_requests.inc()
+    llm_tokens.inc(prompt_tokens, kind="prompt")
+    llm_tokens.inc(completion_tokens, kind="completion")
+    return content, prompt_tokens, completion_tokens
+
+
+def parse_events_reply(content, count):
+    """Parse an LLM reply into one event dict (or None if missing) per flyer.
+
+    Entries are matched to flyers by their "flyer" number, or by position if the
+    model left it out. Raises ValueError if the reply is not usable JSON.
+    """
     content = content.strip()
     if not content:
         raise ValueError("LLM returned empty response")
 
+    reply = parse_json_reply(content)
+    if isinstance(reply, dict):
+        # {"events": [...]}, or a bare event object for a single flyer
+        reply = reply.get("events", [reply] if count == 1 else None)
+    if not isinstance(reply, list):
+        raise ValueError(f"LLM response has no events list:\n{content}")
+
+    events = [None] * count
+    for position, entry in enumerate(reply):
+        if not isinstance(entry, dict):
+            continue
+        entry = dict(entry)
+        number = entry.pop("flyer", None)
+        index = number - 1 if isinstance(number, int) else position
+        if 0 <= index < count and events[index] is None:
+            events[index] = entry
+    return events
+
+
+async def request_events(texts, fields):
+    """One LLM request (plus one re-ask if the reply does not parse) for texts.
+
+    Returns (events, prompt tokens, completion tokens, seconds); events has an
+    event dict or None per text, or is the ValueError if no reply parsed.
+    """
+    start = time.perf_counter()
+    llm_batch_flyers.observe(len(texts))
+    messages = [{"role": "user", "content": build_prompt(texts, fields)}]
+    content, prompt_tokens, completion_tokens = await call_llm(messages, fields)
     try:
-        result = json.loads(content)
-        return result
-    except json.JSONDecodeError as e:
-        # If JSON parsing fails, raise error with details
-        # TODO: attempt to fix, maybe w/LLM
-        raise ValueError(
-            f"Failed to parse JSON from LLM response: {e}\nResponse was:\n{content}"
+        events = parse_events_reply(content, len(texts))
+    except ValueError as e:
+        # Local repair was not enough: ask again, showing the model its reply
+        print(f"LLM reply did not parse, asking again: {e}")
+        llm_reasks.inc()
+        messages += [
+            {"role": "assistant", "content": content},
+            {
+                "role": "user",
+                "content": "That reply is not valid JSON in the requested format. "
+                "Return ONLY the corrected JSON object.",
+            },
+        ]
+        content, more_prompt, more_completion = await call_llm(messages, fields)
+        prompt_tokens += more_prompt
+        completion_tokens += more_completion
+        try:
+            events = parse_events_reply(content, len(texts))
+        except ValueError as e:
+            events = e
+    return events, prompt_tokens, completion_tokens, time.perf_counter() - start
+
+
+async def llm_extract_events(texts, fields=EVENT_FIELDS):
+    """Extract fields from one or more flyer texts with one LLM request.
+
+    Returns a (event dict or exception, LLMUsage) pair per text. Flyers a batched
+    reply leaves out, or all of them if it cannot be parsed, are extracted again
+    one by one.
+    """
+    events, prompt_tokens, completion_tokens, seconds = await request_events(
+        texts, fields
+    )
+    if isinstance(events, Exception):
+        if len(texts) == 1:
+            return [(events, LLMUsage(prompt_tokens, completion_tokens, seconds, 1))]
+        print(f"Batched LLM reply unusable, extracting flyers one by one: {events}")
+        events = [None] * len(texts)
+
+    total_chars = sum(len(text) for text in texts) or 1
+    results = []
+    for text, event_data in zip(texts, events):
+        share = len(text) / total_chars
+        usage = LLMUsage(
+            round(prompt_tokens * share),
+            round(completion_tokens * share),
+            seconds,
+            len(texts),
+        )
+        if event_data is None and len(texts) > 1:
+            # Missing from the batched reply: the tokens spent on it there add up
+            [(event_data, retry)] = await llm_extract_events([text], fields)
+            usage = LLMUsage(
+                usage.prompt_tokens + retry.prompt_tokens,
+                usage.completion_tokens + retry.completion_tokens,
+                usage.seconds + retry.seconds,
+                len(texts),
+            )
+        elif event_data is None:
+            event_data = ValueError("LLM response has no event for the flyer")
+        results.append((event_data, usage))
+    return results
+
+
+async def extract_events(texts):
+    """Extract event details from one or more flyer texts.
+
+    Fields the pre-extractor (pre_extract.py) resolves with at least
+    pre_extract_confidence are taken from it; the LLM is asked, in one request,
+    only for the other fields, and not at all for flyers with only OPTIONAL_FIELDS
+    left (those stay None). Returns a (event dict or exception, LLMUsage) pair per
+    text; flyers without an LLM call have an LLMUsage with batch_size 0.
+    """
+    if pre_extract_confidence is None:
+        return await llm_extract_events(texts)
+
+    known = []
+    for text in texts:
+        guesses = pre_extract(text, TZ_ABBREVIATIONS)
+        known.append(
+            {
+                field: guess.value
+                for field, guess in guesses.items()
+                if guess.confidence >= pre_extract_confidence
+            }
         )
 
+    results = [None] * len(texts)
+    todo = []
+    for i, fields in enumerate(known):
+        resolved = sum(field in fields for field in EVENT_FIELDS)
+        required = (f for f in EVENT_FIELDS if f not in OPTIONAL_FIELDS)
+        if all(field in fields for field in required):
+            results[i] = (ordered_event(fields), LLMUsage(0, 0, 0.0, 0))
+            pre_extracted.inc(result="all")
+        else:
+            todo.append(i)
+            pre_extracted.inc(result="some" if resolved else "none")
+
+    if todo:
+        missing = [
+            field
+            for field in EVENT_FIELDS
+            if any(field not in known[i] for i in todo)
+        ]
+        extracted = await llm_extract_events([texts[i] for i in todo], missing)
+        for i, (event_data, usage) in zip(todo, extracted):
+            if not isinstance(event_data, Exception):
+                event_data = ordered_event({**event_data, **known[i]})
+            results[i] = (event_data, usage)
+    return results
+
+
+def ordered_event(fields):
+    """Return event fields in EVENT_FIELDS order (missing ones None), then extras."""
+    event_data = {field: fields.get(field) for field in EVENT_FIELDS}
+    event_data.update(fields)
+    return event_data
+
+
+async def extract_event(text):
+    """Extract event details from text using the configured (async) LLM backend."""
+    [(event_data, _)] = await extract_events([text])
+    if isinstance(event_data, Exception):
+        raise event_data
+    return event_data
+
+
+async def extract_events_cached(texts):
+    """Like extract_events, but reusing cached results for the same text and model.
+
+    Only the texts without a cached event are sent to the LLM; cached ones come
+    with usage None.
+    """
+    if result_cache is None:
+        return await extract_events(texts)
+
+    # Pre-extracted fields replace the LLM's, so the extractor is part of the key
+    if pre_extract_confidence is None:
+        extractor = "llm"
+    else:
+        extractor = f"pre-extract-{PRE_EXTRACT_VERSION}>={pre_extract_confidence}"
+    keys = [
+        event_key(text, llm_model_name(), PROMPT_VERSION, extractor) for text in texts
+    ]
+    results = [(result_cache.get_event(key), None) for key in keys]
+    misses = [i for i, (event_data, _) in enumerate(results) if event_data is None]
+    cache_lookups.inc(len(texts) - len(misses), cache="event", result="hit")
+    cache_lookups.inc(len(misses), cache="event", result="miss")
+    if misses:
+        extracted = await extract_events([texts[i] for i in misses])
+        for i, (event_data, usage) in zip(misses, extracted):
+            if not isinstance(event_data, Exception):
+                result_cache.put_event(keys[i], event_data)
+            results[i] = (event_data, usage)
+    return results
+
 
 # ---------- GOOGLE AUTH ----------
-def get_calendar_service():
-    """Authenticate with Google Calendar API."""
-    creds = None
-    token = Path("token.json")
+# Credentials and calendar config are loaded on first use (the first calendar
+# insert), guarded by one lock so concurrent calendar workers authenticate once
+calendar_credentials = None
+calendar_id = None
+calendar_timezone = None  # from --timezone, credentials.json or calendar settings
+# Base URL of a stand-in Calendar API (fake_calendar_server.py); None for Google's
+calendar_endpoint = None
+CALENDAR_BATCH_URI = "https://www.googleapis.com/batch/calendar/v3"
+# Per-item HTTP statuses worth retrying (rate limits and server errors)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Calendar API limit on calls per batch request
+MAX_BATCH_SIZE = 50
+_calendar_lock = threading.RLock()
+_calendar_local = threading.local()
 
-    if token.exists():
-        creds = Credentials.from_authorized_user_file(token, SCOPES)
 
-    if not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
-        creds = flow.run_local_server(port=0)
-        token.write_text(creds.to_json())
+def get_calendar_credentials():
+    """Authenticate with Google Calendar API (once; the result is cached)."""
+    global calendar_credentials
 
-    return build("calendar", "v3", credentials=creds)
+    with _calendar_lock:
+        if calendar_credentials is not None:
+            return calendar_credentials
 
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
 
-# Initialize calendar service
-service = get_calendar_service()
+        creds = None
+        token = Path("token.json")
+
+        if token.exists():
+            creds = Credentials.from_authorized_user_file(token, SCOPES)
+
+        if not creds or not creds.valid:
+            flow = InstalledAppFlow.from_client_secrets_file("credentials.json", SCOPES)
+            creds = flow.run_local_server(port=0)
+            token.write_text(creds.to_json())
+
+        calendar_credentials = creds
+        return creds
+
+
+def get_calendar_service():
+    """Build a Calendar API client (clients are not thread-safe; see thread_service)."""
+    from googleapiclient.discovery import build
+
+    if calendar_endpoint:
+        # Stand-in server: no OAuth, requests go to the given base URL
+        from google.auth.credentials import AnonymousCredentials
+
+        return build(
+            "calendar",
+            "v3",
+            credentials=AnonymousCredentials(),
+            client_options={"api_endpoint": calendar_endpoint.rstrip("/") + "/calendar/v3/"},
+        )
+    return build("calendar", "v3", credentials=get_calendar_credentials())
+
+
+def calendar_batch_uri():
+    """Return the batch endpoint (the client's default ignores calendar_endpoint)."""
+    if calendar_endpoint:
+        return calendar_endpoint.rstrip("/") + "/batch/calendar/v3"
+    return CALENDAR_BATCH_URI
+
+
+def thread_service():
+    """Return the calendar worker thread's own Calendar API client."""
+    if not hasattr(_calendar_local, "service"):
+        _calendar_local.service = get_calendar_service()
+    return _calendar_local.service
 
 
 # Get calendar timezone and ID from credentials
 def get_calendar_config():
-    """Load calendar ID and timezone from credentials.json."""
-    with open("credentials.json") as f:
-        creds_data = json.load(f)
-        installed = creds_data.get("installed", {})
-        calendar_id = installed.get("calendar_id", "primary")
-        timezone = installed.get("timezone", None)
+    """Load calendar ID and timezone from credentials.json (once; cached).
 
-    # If timezone not in credentials, get it from Google Calendar settings
-    if not timezone:
-        try:
-            cal_settings = service.calendarList().get(calendarId=calendar_id).execute()
-            timezone = cal_settings.get("timeZone", None)
-        except Exception:
-            timezone = None
+    A timezone already set with --timezone takes precedence.
+    """
+    global calendar_id, calendar_timezone
+
+    with _calendar_lock:
+        if calendar_id is not None:
+            return calendar_id, calendar_timezone
 
-    return calendar_id, timezone
+        creds_data = {}
+        if not calendar_endpoint or Path("credentials.json").exists():
+            with open("credentials.json") as f:
+                creds_data = json.load(f)
+        installed = creds_data.get("installed", {})
+        config_id = installed.get("calendar_id", "primary")
+        timezone = calendar_timezone or installed.get("timezone", None)
 
+        # If timezone not in credentials, get it from Google Calendar settings
+        if not timezone:
+            try:
+                cal_settings = (
+                    thread_service().calendarList().get(calendarId=config_id).execute()
+                )
+                timezone = cal_settings.get("timeZone", None)
+            except Exception:
+                timezone = None
 
-calendar_id, calendar_timezone = get_calendar_config()
+        calendar_id, calendar_timezone = config_id, timezone
+        return calendar_id, calendar_timezone
 
 
 # ---------- TIMEZONE MAPPING ----------
+# Abbreviations, full names ("Eastern Time") and UTC offsets are resolved by
+# timezones.resolve_timezone, with a table built once at import
+
+
 def normalize_timezone(tz_str):
     """Convert timezone abbreviation or name to IANA timezone.
     
     Returns the calendar's timezone if tz_str is None or empty.
     """
-    if not tz_str:
-        return calendar_timezone
-
-    # Mapping of common abbreviations to IANA timezones
-    tz_map = {
-        "PT": "America/Los_Angeles",
-        "PST": "America/Los_Angeles",
-        "PDT": "America/Los_Angeles",
-        "MT": "America/Denver",
-        "MST": "America/Denver",
-        "MDT": "America/Denver",
-        "CT": "America/Chicago",
-        "CST": "America/Chicago",
-        "CDT": "America/Chicago",
-        "ET": "America/New_York",
-        "EST": "America/New_York",
-        "EDT": "America/New_York",
-        "GMT": "UTC",
-        "UTC": "UTC",
-    }
-
-    tz_upper = tz_str.upper().strip()
     # Return mapped timezone or original string (already IANA format)
-    # If not found in map, return calendar_timezone as fallback
-    return tz_map.get(tz_upper, calendar_timezone if tz_upper == "NONE" or tz_upper == "NULL" else tz_str)
+    # If not given, return calendar_timezone as fallback
+    return resolve_timezone(tz_str) or get_calendar_config()[1]
 
 
-def create_event(data):
-    """Create a calendar event from extraed event data."""
-    from datetime import datetime
-    from zoneinfo import ZoneInfo
-
+def build_event(data):
+    """Build a Calendar API event resource from extracted event data."""
     # Validate required fields
     if not all([data.get("date"), data.get("start_time"), data.get("end_time")]):
         raise ValueError("Missing required fields: date, start_time, end_time")
@@ -299,13 +765,11 @@ def create_event(data):
 
     # Parse times in event timezone, convert to calendar timezone
     event_tz = normalize_timezone(data.get("timezone"))  # Convert abbreviations to IANA names
-    tz = ZoneInfo(event_tz) 
-    
-    start_str = f"{data['date']} {data['start_time']}"
-    end_str = f"{data['date']} {data['end_time']}"
+    tz = get_zone(event_tz)  # one ZoneInfo per timezone
 
-    start_dt = dateparser.parse(start_str).replace(tzinfo=tz)
-    end_dt = dateparser.parse(end_str).replace(tzinfo=tz)
+    # "YYYY-MM-DD" and "H:MM AM/PM" are parsed directly, other formats by dateutil
+    start_dt = parse_local(data["date"], data["start_time"]).replace(tzinfo=tz)
+    end_dt = parse_local(data["date"], data["end_time"]).replace(tzinfo=tz)
 
     # Convert to ISO format (Google Calendar API handles timezone conversion)
     event = {
@@ -315,134 +779,681 @@ def create_event(data):
         "start": {"dateTime": start_dt.isoformat(), "timeZone": event_tz},
         "end": {"dateTime": end_dt.isoformat(), "timeZone": event_tz},
     }
+    return event
+
+
+def is_duplicate(error):
+    """Whether an insert failed because an event with its id already exists."""
+    from googleapiclient.errors import HttpError
+
+    return isinstance(error, HttpError) and error.resp.status == 409
+
+
+def is_retryable(error):
+    """Whether a failed insert may succeed if sent again."""
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUS
+    # Connection errors, timeouts etc.
+    return isinstance(error, (OSError, ConnectionError))
 
-    try:
-        result = service.events().insert(calendarId=calendar_id, body=event).execute()
-        print(f"Created event: {title}")
-        return result
-    except Exception as e:
-        print(f"Error creating event: {e}")
-        raise
+
+def insert_events(events, max_retries=3, backoff=1.0):
+    """Insert event resources with Calendar API batch requests.
+
+    Items that fail with a retryable error (see is_retryable), or whose whole
+    batch request failed that way, are sent again in a new batch after an
+    exponential backoff, up to max_retries times.
+
+    Returns a list with, for each event, the created event or the exception it
+    failed with.
+    """
+    from googleapiclient.http import BatchHttpRequest
+
+    service = thread_service()
+    calendar = get_calendar_config()[0]
+    results = [None] * len(events)
+    pending = list(range(len(events)))
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = exception if exception is not None else response
+
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+            calendar_retries.inc(len(pending))
+        calendar_requests.inc()
+        batch = BatchHttpRequest(callback=callback, batch_uri=calendar_batch_uri())
+        for i in pending:
+            batch.add(
+                service.events().insert(calendarId=calendar, body=events[i]),
+                request_id=str(i),
+            )
+        try:
+            batch.execute()
+        except Exception as e:
+            # The batch request itself failed: no item was answered
+            for i in pending:
+                results[i] = e
+        pending = [
+            i
+            for i in pending
+            if isinstance(results[i], Exception) and is_retryable(results[i])
+        ]
+        if not pending:
+            break
+    return results
+
+
+def create_events(events_data, event_ids=None):
+    """Create calendar events from extracted event data, in batch requests.
+
+    event_ids optionally gives each event's Calendar API id (None for a generated
+    one). An event whose id already exists, e.g. inserted before a crash, is not
+    created twice and counts as created.
+
+    Returns a list with, for each item, the created event or the exception it
+    failed with (invalid data fails without being sent).
+    """
+    results = [None] * len(events_data)
+    valid, resources = [], []
+    for i, data in enumerate(events_data):
+        try:
+            resource = build_event(data)
+            if event_ids and event_ids[i]:
+                resource["id"] = event_ids[i]
+            resources.append(resource)
+            valid.append(i)
+        except Exception as e:
+            results[i] = e
+
+    # Batch requests hold at most MAX_BATCH_SIZE calls
+    for start in range(0, len(resources), MAX_BATCH_SIZE):
+        chunk = insert_events(resources[start : start + MAX_BATCH_SIZE])
+        for i, result in zip(valid[start : start + MAX_BATCH_SIZE], chunk):
+            results[i] = result
+
+    for resource, i in zip(resources, valid):
+        if "id" in resource and is_duplicate(results[i]):
+            results[i] = {"id": resource["id"], "summary": resource["summary"]}
+            print(f"Event already created: {resource['summary']}")
+        elif isinstance(results[i], Exception):
+            print(f"Error creating event: {resource['summary']}: {results[i]}")
+        else:
+            print(f"Created event: {resource['summary']}")
+    return results
+
+
+def create_event(data):
+    """Create a calendar event from extracted event data."""
+    (result,) = create_events([data])
+    if isinstance(result, Exception):
+        raise result
+    return result
 
 
 # ---------- FILE WATCHER ----------
-def wait_for_file_ready(path, timeout=10, check_interval=0.5):
-    """Wait for file to finish writing (stable size for ~1 second)."""
-    start = time.time()
+async def wait_for_file_ready(path, closed=None, timeout=10, check_interval=0.5):
+    """Wait for file to finish writing.
+
+    Returns True as soon as `closed` (an asyncio.Event the watcher sets when the
+    writer closes the file or renames it into place) is set and the file is not
+    empty. Without such an event (filesystems that do not report closes, or files
+    moved in from another directory) the file is ready once its size is stable
+    for ~1 second. Waits on the event loop, not in a thread.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
     last_size = -1
     stable_count = 0
 
-    while time.time() - start < timeout:
+    while loop.time() < deadline:
         try:
             current_size = path.stat().st_size
-            if current_size > 0 and current_size == last_size:
-                stable_count += 1
-                if stable_count >= 2:  # File size stable for ~1 second
-                    return True
-            else:
-                stable_count = 0
-            last_size = current_size
-            time.sleep(check_interval)
         except FileNotFoundError:
-            time.sleep(check_interval)
+            current_size = -1
+
+        if closed is not None and closed.is_set():
+            if current_size > 0:
+                return True
+            closed.clear()  # closed while still empty; wait for the real write
+
+        if current_size > 0 and current_size == last_size:
+            stable_count += 1
+            if stable_count >= 2:  # File size stable for ~1 second
+                return True
+        else:
+            stable_count = 0
+        last_size = current_size
+
+        if closed is None:
+            await asyncio.sleep(check_interval)
+        else:
+            try:
+                await asyncio.wait_for(closed.wait(), check_interval)
+            except asyncio.TimeoutError:
+                pass
 
     return False
 
 
-class Handler(FileSystemEventHandler):
-    """Handles file creation events in the watch directory."""
-    
-    def __init__(self):
-        super().__init__()
-        # Track processed files to avoid duplicate processing
-        # This is necessary because Windows-to-WSL file saves create :Zone.Identifier
-        # metadata files that trigger duplicate on_created events after file is moved
+def save_flyer(path, event_data):
+    """Save the extracted JSON and move the flyer to the processed folder."""
+    # Save extracted event JSON to processed folder
+    json_path = PROCESSED_DIR / (path.stem + ".json")
+    with open(json_path, "w") as f:
+        json.dump(event_data, f, indent=2)
+
+    # Remove Windows zone identifier metadata file if it exists
+    # These are created by Windows-to-WSL file transfers and cannot be deleted directly
+    # Instead, we use subprocess to attempt removal via system call
+    zone_id_path = str(path) + ":Zone.Identifier"
+    try:
+        import subprocess
+        subprocess.run(["rm", "-f", zone_id_path], check=False, timeout=2)
+    except Exception:
+        pass  # Silently ignore if removal fails
+
+    path.rename(PROCESSED_DIR / path.name)
+
+
+# ---------- PIPELINE ----------
+class Pipeline:
+    """Queue-backed flyer processing with a concurrency limit per stage.
+
+    `submit` may be called from any thread (e.g. the watchdog observer); the stages
+    run as asyncio tasks on the pipeline's event loop:
+
+        submit -> text queue -> [readiness + OCR] -> llm queue -> [batched LLM
+               extraction] -> calendar queue -> [batched calendar insert, save
+               JSON, move file]
+    """
+
+    def __init__(
+        self,
+        ocr_workers=2,
+        llm_concurrency=4,
+        calendar_workers=2,
+        llm_batch_size=1,
+        llm_batch_window=0.5,
+        calendar_batch_size=MAX_BATCH_SIZE,
+        calendar_batch_window=0.5,
+    ):
+        self.ocr_workers = ocr_workers
+        self.llm_concurrency = llm_concurrency
+        self.llm_batch_size = llm_batch_size
+        self.llm_batch_window = llm_batch_window
+        self.calendar_workers = calendar_workers
+        self.calendar_batch_size = calendar_batch_size
+        self.calendar_batch_window = calendar_batch_window
+        self.loop = None
+        self.text_queue = asyncio.Queue()
+        self.llm_queue = asyncio.Queue()
+        self.calendar_queue = asyncio.Queue()
+        self.ocr_executor = ThreadPoolExecutor(ocr_workers, thread_name_prefix="ocr")
+        self.calendar_executor = ThreadPoolExecutor(
+            calendar_workers, thread_name_prefix="calendar"
+        )
+        # Paths queued or being processed, and paths done in this process.
+        # The latter is necessary because Windows-to-WSL file saves create
+        # :Zone.Identifier metadata files that trigger duplicate on_created events
+        # after the file is moved
+        self.in_flight = set()
         self.processed_files = set()
+        # Per queued path, set when the watcher sees the file closed after writing
+        self.closed_events = {}
+        # Per queued path, loop time when it was queued (for flyer_seconds)
+        self.queued_at = {}
+        # Per queued path, its work journal entry (once its text was read)
+        self.entries = {}
+        self.tasks = []
+        self.llm_slots = None
+        self.calendar_slots = None
+
+    def start(self):
+        """Start the stage workers on the running event loop."""
+        self.loop = asyncio.get_running_loop()
+        self.llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        self.calendar_slots = asyncio.Semaphore(self.calendar_workers)
+        queue_depth.set_function(self.text_queue.qsize, queue="text")
+        queue_depth.set_function(self.llm_queue.qsize, queue="llm")
+        queue_depth.set_function(self.calendar_queue.qsize, queue="calendar")
+        flyers_in_flight.set_function(lambda: len(self.in_flight))
+        workers = (
+            [self._text_worker] * self.ocr_workers
+            + [self._llm_batcher, self._calendar_batcher]
+        )
+        self.tasks = [asyncio.create_task(worker()) for worker in workers]
 
-    def on_created(self, event):
-        # Accept PDF and image files
-        supported_extensions = {
-            ".pdf",
-            ".jpg",
-            ".jpeg",
-            ".png",
-            ".tiff",
-            ".bmp",
-            ".gif",
-        }
-        if not any(
-            event.src_path.lower().endswith(ext) for ext in supported_extensions
-        ):
-            return
+    def submit(self, path):
+        """Queue a flyer for processing (thread-safe)."""
+        self.loop.call_soon_threadsafe(self._enqueue, Path(path))
 
-        path = Path(event.src_path)
-        
-        # Skip if already processed (prevents duplicate processing from zone identifier events)
-        if str(path) in self.processed_files:
+    def mark_closed(self, path):
+        """Record that a queued file was closed after writing (thread-safe)."""
+        self.loop.call_soon_threadsafe(self._mark_closed, str(path))
+
+    def _mark_closed(self, key):
+        if key in self.in_flight:
+            self.closed_events.setdefault(key, asyncio.Event()).set()
+
+    def _enqueue(self, path):
+        key = str(path)
+        if key in self.in_flight or key in self.processed_files:
             return
-        
+        self.in_flight.add(key)
+        self.queued_at[key] = self.loop.time()
         print("Processing:", path.name)
+        self.text_queue.put_nowait(path)
+
+    def _fail(self, path, stage, error):
+        print(f"Failed: {path.name}: {error}")
+        stage_failures.inc(stage=stage)
+        self.in_flight.discard(str(path))
+        self.closed_events.pop(str(path), None)
+        self.queued_at.pop(str(path), None)
+        self.entries.pop(str(path), None)
+
+    def _done(self, path):
+        key = str(path)
+        self.entries.pop(key, None)
+        self.in_flight.discard(key)
+        # A close event seen after the file became ready is still registered here
+        self.closed_events.pop(key, None)
+        self.processed_files.add(key)
+        flyer_seconds.observe(self.loop.time() - self.queued_at.pop(key))
+        flyers_processed.inc()
+        print(f"Done: {path.name}\n")
+
+    async def _text_worker(self):
+        while True:
+            path = await self.text_queue.get()
+            stage = "ready"
+            try:
+                # Wait for file to be fully written (on the event loop, not the OCR pool)
+                closed = self.closed_events.setdefault(str(path), asyncio.Event())
+                with stage_seconds.time(stage="ready"):
+                    ready = await wait_for_file_ready(path, closed)
+                self.closed_events.pop(str(path), None)
+                if not ready:
+                    self._fail(path, stage, "timeout waiting for file to be ready")
+                    continue
+                stage = "text"
+                with stage_seconds.time(stage="text"):
+                    text, entry = await self.loop.run_in_executor(
+                        self.ocr_executor, self._read_text, path
+                    )
+                if entry is not None and entry.event is not None:
+                    # Resumed after a restart: the LLM already extracted the event
+                    await self.calendar_queue.put((path, entry.event))
+                else:
+                    await self.llm_queue.put((path, text))
+            except Exception as e:
+                self._fail(path, stage, e)
+            finally:
+                self.text_queue.task_done()
+
+    def _read_text(self, path):
+        """Return the flyer's text and its journal entry (None without a journal).
+
+        Text journaled before a restart is reused. Runs in the OCR thread pool.
+        """
+        if work_journal is None:
+            return read_document_cached(path), None
+
+        digest = file_digest(path)
+        entry = work_journal.entry(path.name, digest)
+        self.entries[str(path)] = entry
+        if entry.stage is not None:
+            print(f"Resuming: {path.name} (done: {entry.stage})")
+            flyers_resumed.inc(stage=entry.stage)
+        if entry.text is None:
+            work_journal.record(
+                entry, "extracted", text=read_document_cached(path, digest)
+            )
+        return entry.text, entry
+
+    def _record(self, path, stage, **data):
+        """Journal that the flyer at path completed stage (no-op without a journal)."""
+        entry = self.entries.get(str(path))
+        if work_journal is not None and entry is not None:
+            work_journal.record(entry, stage, **data)
+
+    async def _next_batch(self, queue, size, window):
+        """Wait for an item, then collect up to `size` items queued at most
+        `window` seconds after it."""
+        batch = [await queue.get()]
+        deadline = self.loop.time() + window
+        while len(batch) < size:
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _spawn(self, coroutine):
+        self.tasks.append(asyncio.create_task(coroutine))
+        self.tasks = [task for task in self.tasks if not task.done()]
+
+    async def _llm_batcher(self):
+        """Send queued flyer texts to the LLM in batches (one request each).
+
+        A batch holds up to llm_batch_size flyers and is sent at most
+        llm_batch_window seconds after its first flyer was queued; up to
+        llm_concurrency requests are in flight.
+        """
+        while True:
+            batch = await self._next_batch(
+                self.llm_queue, self.llm_batch_size, self.llm_batch_window
+            )
+            await self.llm_slots.acquire()
+            self._spawn(self._extract_batch(batch))
 
-        # Wait for file to be fully written
-        if not wait_for_file_ready(path):
-            print(f"Timeout waiting for file to be ready: {path.name}")
+    async def _extract_batch(self, batch):
+        try:
+            start = self.loop.time()
+            results = await extract_events_cached([text for _, text in batch])
+            seconds = self.loop.time() - start
+            for (path, _), (event_data, usage) in zip(batch, results):
+                stage_seconds.observe(seconds, stage="llm")
+                if usage is not None and usage.batch_size == 0:
+                    print(f"LLM: {path.name}: skipped, all fields pre-extracted")
+                elif usage is not None:
+                    print(
+                        f"LLM: {path.name}: {usage.prompt_tokens} prompt + "
+                        f"{usage.completion_tokens} completion tokens, "
+                        f"{usage.seconds:.1f}s (batch of {usage.batch_size})"
+                    )
+                if isinstance(event_data, Exception):
+                    self._fail(path, "llm", event_data)
+                    continue
+                await asyncio.to_thread(self._record, path, "parsed", event=event_data)
+                await self.calendar_queue.put((path, event_data))
+        except Exception as e:
+            for path, _ in batch:
+                self._fail(path, "llm", e)
+        finally:
+            for _ in batch:
+                self.llm_queue.task_done()
+            self.llm_slots.release()
+
+    async def _calendar_batcher(self):
+        """Send queued events in batches.
+
+        A batch holds up to calendar_batch_size events and is sent at most
+        calendar_batch_window seconds after its first event was queued.
+        """
+        while True:
+            batch = await self._next_batch(
+                self.calendar_queue,
+                self.calendar_batch_size,
+                self.calendar_batch_window,
+            )
+            await self.calendar_slots.acquire()
+            self._spawn(self._insert_batch(batch))
+
+    async def _insert_batch(self, batch):
+        try:
+            # Flyers resumed after their calendar event was created skip the insert
+            entries = [self.entries.get(str(path)) for path, _ in batch]
+            pending = [
+                i
+                for i, entry in enumerate(entries)
+                if entry is None or entry.calendar_event is None
+            ]
+            results = [None] * len(batch)
+            start = self.loop.time()
+            if pending:
+                created = await self.loop.run_in_executor(
+                    self.calendar_executor,
+                    create_events,
+                    [batch[i][1] for i in pending],
+                    [entries[i] and entries[i].id for i in pending],
+                )
+                for i, result in zip(pending, created):
+                    results[i] = result
+            seconds = self.loop.time() - start
+            for (path, event_data), result in zip(batch, results):
+                stage_seconds.observe(seconds, stage="calendar")
+                if isinstance(result, Exception):
+                    self._fail(path, "calendar", result)
+                    continue
+                try:
+                    with stage_seconds.time(stage="save"):
+                        await self.loop.run_in_executor(
+                            self.calendar_executor, self._save, path, event_data, result
+                        )
+                    self._done(path)
+                except Exception as e:
+                    self._fail(path, "save", e)
+        except Exception as e:
+            for path, _ in batch:
+                self._fail(path, "calendar", e)
+        finally:
+            for _ in batch:
+                self.calendar_queue.task_done()
+            self.calendar_slots.release()
+
+    def _save(self, path, event_data, created):
+        """Journal the created calendar event, then save and move the flyer."""
+        if created is not None:
+            self._record(path, "created", calendar_event=created.get("id"))
+        save_flyer(path, event_data)
+        self._record(path, "moved")
+
+    async def join(self):
+        """Wait until every queued flyer has gone through all stages."""
+        for queue in (self.text_queue, self.llm_queue, self.calendar_queue):
+            await queue.join()
+
+    async def close(self):
+        """Cancel the stage workers and shut down the thread pools."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.ocr_executor.shutdown(wait=False, cancel_futures=True)
+        self.calendar_executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Handler(FileSystemEventHandler):
+    """Handles file creation, close and rename events in the watch directory.
+
+    Only enqueues: processing happens in the pipeline, off the observer thread.
+    """
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    @staticmethod
+    def is_flyer(path):
+        # Accept PDF and image files
+        return Path(path).suffix.lower() in SUPPORTED_EXTENSIONS
+
+    def on_created(self, event):
+        if not event.is_directory and self.is_flyer(event.src_path):
+            self.pipeline.submit(event.src_path)
+
+    def on_closed(self, event):
+        # inotify IN_CLOSE_WRITE: the writer is done, no need to poll the size
+        if not event.is_directory and self.is_flyer(event.src_path):
+            self.pipeline.submit(event.src_path)
+            self.pipeline.mark_closed(event.src_path)
+
+    def on_moved(self, event):
+        # Renamed into place (e.g. "flyer.pdf.part" -> "flyer.pdf"): complete file
+        if event.is_directory or not self.is_flyer(event.dest_path):
             return
+        if Path(event.dest_path).parent.resolve() == WATCH_DIR.resolve():
+            self.pipeline.submit(event.dest_path)
+            self.pipeline.mark_closed(event.dest_path)
 
+
+# ---------- MAIN ----------
+# A flyer found by the startup sweep that was last modified this many seconds ago
+# is complete (it was dropped while the agent was down), so it needs no size polling
+SETTLED_AGE = 5
+
+
+def sweep(pipeline):
+    """Queue the flyers already in the watch folder, e.g. dropped while the agent
+    was down or left unfinished by a crash; return how many were found."""
+    now = time.time()
+    paths = sorted(
+        path
+        for path in WATCH_DIR.iterdir()
+        if path.is_file() and Handler.is_flyer(path)
+    )
+    for path in paths:
+        pipeline.submit(path)
         try:
-            text = read_document(path)
-            event_data = extract_event(text)
-            create_event(event_data)
-
-            # Save extracted event JSON to processed folder
-            json_path = PROCESSED_DIR / (path.stem + ".json")
-            with open(json_path, "w") as f:
-                json.dump(event_data, f, indent=2)
-
-            # Remove Windows zone identifier metadata file if it exists
-            # These are created by Windows-to-WSL file transfers and cannot be deleted directly
-            # Instead, we use subprocess to attempt removal via system call
-            zone_id_path = str(path) + ":Zone.Identifier"
-            try:
-                import subprocess
-                subprocess.run(["rm", "-f", zone_id_path], check=False, timeout=2)
-            except Exception:
-                pass  # Silently ignore if removal fails
-            
-            path.rename(PROCESSED_DIR / path.name)
-            self.processed_files.add(str(path))
-            print("Done\n")
+            if now - path.stat().st_mtime > SETTLED_AGE:
+                pipeline.mark_closed(path)
+        except FileNotFoundError:
+            pass  # moved away meanwhile; the pipeline reports it
+    return len(paths)
 
-        except Exception as e:
-            print("Failed:", e)
 
+async def dump_metrics(path, interval):
+    """Append a metrics snapshot to path every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(append_jsonl, METRICS, path)
 
-# ---------- MAIN ----------
-def run(backend="openai", default_timezone=None):
+
+async def serve(
+    metrics_port=None, metrics_jsonl=None, metrics_interval=15.0, **pipeline_options
+):
+    """Run the pipeline and the folder watcher until interrupted."""
+    pipeline = Pipeline(**pipeline_options)
+    pipeline.start()
+
+    observer = Observer()
+    observer.schedule(Handler(pipeline), str(WATCH_DIR), recursive=False)
+    observer.start()
+    # After starting the observer, so nothing dropped meanwhile is missed
+    # (flyers both found and reported by the observer are queued once)
+    found = sweep(pipeline)
+    if found:
+        print(f"Found {found} flyer(s) already in {WATCH_DIR}")
+
+    metrics_server = None
+    if metrics_port is not None:
+        metrics_server = start_http_server(METRICS, metrics_port)
+    dumper = None
+    if metrics_jsonl:
+        dumper = asyncio.create_task(dump_metrics(metrics_jsonl, metrics_interval))
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        observer.stop()
+        observer.join()
+        await pipeline.close()
+        if dumper is not None:
+            dumper.cancel()
+            # Final snapshot, so short runs are recorded too
+            append_jsonl(METRICS, metrics_jsonl)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+
+
+def run(
+    backend="openai",
+    default_timezone=None,
+    ocr_workers=2,
+    llm_concurrency=4,
+    calendar_workers=2,
+    cache_path=CACHE_PATH,
+    cache_max_bytes=DEFAULT_MAX_BYTES,
+    calendar_batch_size=MAX_BATCH_SIZE,
+    calendar_batch_window=0.5,
+    endpoint=None,
+    ocr_processes=document_text.ocr_processes,
+    llm_batch_size=1,
+    llm_batch_window=0.5,
+    metrics_port=None,
+    metrics_jsonl=None,
+    metrics_interval=15.0,
+    journal_path=JOURNAL_PATH,
+    min_confidence=pre_extract_confidence,
+):
     """Start the file watcher."""
-    global calendar_timezone
-    
+    global calendar_timezone, result_cache, calendar_endpoint, work_journal
+    global pre_extract_confidence
+
+    calendar_endpoint = endpoint
+    document_text.ocr_processes = ocr_processes
+    pre_extract_confidence = min_confidence
+
     # Override calendar timezone if specified
     if default_timezone:
         calendar_timezone = default_timezone
-    
+
     WATCH_DIR.mkdir(exist_ok=True)
     PROCESSED_DIR.mkdir(exist_ok=True)
 
-    observer = Observer()
-    handler = Handler()
-    observer.schedule(handler, str(WATCH_DIR), recursive=False)
-    observer.start()
-
     print(f"Watching folder: {WATCH_DIR}")
     print(f"Using backend: {backend}")
-    print(f"Calendar timezone: {calendar_timezone}")
+    print(
+        "Calendar timezone: "
+        f"{calendar_timezone or 'from credentials.json or calendar settings'}"
+    )
+    if cache_path:
+        result_cache = ResultCache(cache_path, cache_max_bytes)
+        print(f"Result cache: {cache_path}")
+    if journal_path:
+        # Unfinished entries are only kept for flyers still waiting in WATCH_DIR
+        work_journal = Journal(
+            journal_path, keep=lambda name: (WATCH_DIR / name).exists()
+        )
+        print(f"Work journal: {journal_path} ({len(work_journal)} unfinished)")
+    if calendar_endpoint:
+        print(f"Calendar API endpoint: {calendar_endpoint}")
+    if pre_extract_confidence is None:
+        print("Pre-extractor: off (the LLM extracts every field)")
+    else:
+        print(f"Pre-extractor: fields with confidence >= {pre_extract_confidence}")
+    if metrics_port is not None:
+        print(f"Metrics: http://127.0.0.1:{metrics_port}/metrics")
+    if metrics_jsonl:
+        print(f"Metrics log: {metrics_jsonl} (every {metrics_interval}s)")
+    print(
+        f"Workers: {ocr_workers} OCR, {llm_concurrency} LLM (batches of up to "
+        f"{llm_batch_size} flyers within {llm_batch_window}s), "
+        f"{calendar_workers} calendar (batches of up to {calendar_batch_size} "
+        f"within {calendar_batch_window}s), "
+        f"{ocr_processes} processes for scanned PDF pages"
+    )
 
     try:
-        while True:
-            time.sleep(1)
+        asyncio.run(
+            serve(
+                ocr_workers=ocr_workers,
+                llm_concurrency=llm_concurrency,
+                calendar_workers=calendar_workers,
+                calendar_batch_size=calendar_batch_size,
+                calendar_batch_window=calendar_batch_window,
+                llm_batch_size=llm_batch_size,
+                llm_batch_window=llm_batch_window,
+                metrics_port=metrics_port,
+                metrics_jsonl=metrics_jsonl,
+                metrics_interval=metrics_interval,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
     finally:
-        observer.stop()
-        observer.join()
+        document_text.shutdown_ocr_pool()
+        if result_cache is not None:
+            result_cache.close()
+        if work_journal is not None:
+            work_journal.close()
 
 
 if __name__ == "__main__":
@@ -470,7 +1481,138 @@ if __name__ == "__main__":
         help="Default timezone for calendar events (e.g., America/New_York, America/Los_Angeles). Uses calendar's timezone if not specified.",
     )
 
+    parser.add_argument(
+        "--ocr-workers",
+        type=int,
+        default=2,
+        help="Flyers whose text is extracted (PDF/OCR) at once (default: 2)",
+    )
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=4,
+        help="LLM extraction requests in flight at once (default: 4)",
+    )
+    parser.add_argument(
+        "--llm-batch-size",
+        type=int,
+        default=1,
+        help="Most flyers extracted with one LLM request; batches of 4-8 raise "
+        "throughput with a local Ollama model, whose context window must fit "
+        f"them (default: 1, maximum: {MAX_LLM_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--llm-batch-window",
+        type=float,
+        default=0.5,
+        help="Seconds to wait for more flyers before sending an LLM batch (default: 0.5)",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=pre_extract_confidence,
+        help="Fields the regex pre-extractor finds with at least this confidence "
+        "(0-1) are not asked of the LLM; flyers with all fields found skip it "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-pre-extract",
+        action="store_true",
+        help="Extract every field with the LLM",
+    )
+    parser.add_argument(
+        "--ocr-processes",
+        type=int,
+        default=document_text.ocr_processes,
+        help="Worker processes that OCR the pages of scanned PDFs in parallel; "
+        "each loads its own OCR model, 1 disables the pool "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--calendar-workers",
+        type=int,
+        default=2,
+        help="Calendar batch requests in flight at once (default: 2)",
+    )
+    parser.add_argument(
+        "--calendar-batch-size",
+        type=int,
+        default=MAX_BATCH_SIZE,
+        help=f"Most events per calendar batch request (default and maximum: {MAX_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--calendar-batch-window",
+        type=float,
+        default=0.5,
+        help="Seconds to wait for more events before sending a batch (default: 0.5)",
+    )
+    parser.add_argument(
+        "--calendar-endpoint",
+        default=None,
+        help="Base URL of a stand-in Calendar API, e.g. http://127.0.0.1:8765 "
+        "from fake_calendar_server.py (no OAuth is done)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(CACHE_PATH),
+        help=f"Result cache file for extracted text and events (default: {CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES >> 20,
+        help="Size limit of the result cache in MB (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run OCR and the LLM, without reading or writing the cache",
+    )
+    parser.add_argument(
+        "--journal",
+        default=str(JOURNAL_PATH),
+        help="Journal of completed stages per flyer, used to resume after a "
+        f"restart (default: {JOURNAL_PATH})",
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="Do not journal progress; flyers interrupted by a restart start over",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics (default: off)",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        default=None,
+        help="Append a JSON line with all metrics to this file periodically (default: off)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        help="Seconds between --metrics-jsonl lines (default: 15)",
+    )
+
     args = parser.parse_args()
+    for option in ("ocr_workers", "ocr_processes", "llm_concurrency", "calendar_workers"):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    if not 1 <= args.calendar_batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--calendar-batch-size must be between 1 and {MAX_BATCH_SIZE}")
+    if args.calendar_batch_window < 0:
+        parser.error("--calendar-batch-window must not be negative")
+    if not 1 <= args.llm_batch_size <= MAX_LLM_BATCH_SIZE:
+        parser.error(f"--llm-batch-size must be between 1 and {MAX_LLM_BATCH_SIZE}")
+    if args.llm_batch_window < 0:
+        parser.error("--llm-batch-window must not be negative")
+    if args.metrics_interval <= 0:
+        parser.error("--metrics-interval must be positive")
+    if not 0 <= args.min_confidence <= 1:
+        parser.error("--min-confidence must be between 0 and 1")
 
     # Set Ollama model if specified
     if args.backend == "ollama":
@@ -480,4 +1622,23 @@ if __name__ == "__main__":
     init_llm_backend(args.backend, openai_api_key=args.openai_key)
 
     # Run the agent
-    run(backend=args.backend, default_timezone=args.timezone)
+    run(
+        backend=args.backend,
+        default_timezone=args.timezone,
+        ocr_workers=args.ocr_workers,
+        llm_concurrency=args.llm_concurrency,
+        calendar_workers=args.calendar_workers,
+        cache_path=None if args.no_cache else args.cache,
+        cache_max_bytes=args.cache_max_mb << 20,
+        calendar_batch_size=args.calendar_batch_size,
+        calendar_batch_window=args.calendar_batch_window,
+        endpoint=args.calendar_endpoint,
+        ocr_processes=args.ocr_processes,
+        llm_batch_size=args.llm_batch_size,
+        llm_batch_window=args.llm_batch_window,
+        metrics_port=args.metrics_port,
+        metrics_jsonl=args.metrics_jsonl,
+        metrics_interval=args.metrics_interval,
+        journal_path=None if args.no_journal else args.journal,
+        min_confidence=None if args.no_pre_extract else args.min_confidence,
+    )
@@ -0,0 +1,101 @@
+"""
+Compare one-request-per-event calendar inserts with batched inserts, against the
+local stand-in server (fake_calendar_server.py), so no network or Google account is
+needed.
+
+Usage (from the event_flyer_agent directory):
+
+    python benchmarks/calendar_batch_benchmark.py
+    python benchmarks/calendar_batch_benchmark.py --events 200 --latency 0.1 --fail-rate 0.1
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+from fake_calendar_server import start_server  # noqa: E402
+
+
+def sample_events(count):
+    return [
+        {
+            "title": f"Seminar {i}",
+            "date": "2026-04-03",
+            "start_time": "2:00 PM",
+            "end_time": "3:30 PM",
+            "timezone": "EDT",
+            "venue": "Room 101",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(function, *args):
+    """Run function(*args) with its print output suppressed; return (seconds, result)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def create_one_by_one(events):
+    results = []
+    for data in events:
+        try:
+            results.append(agent.create_event(data))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=100, help="Events per run")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Server latency per HTTP request"
+    )
+    parser.add_argument(
+        "--fail-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of inserts failing with 503",
+    )
+    args = parser.parse_args()
+
+    events = sample_events(args.events)
+    print(
+        f"{args.events} events, {args.latency * 1000:.0f} ms latency, "
+        f"{args.fail_rate:.0%} injected failures"
+    )
+    print(f"{'mode':<12} {'seconds':>8} {'events/s':>9} {'created':>8} {'HTTP':>6}")
+    for mode, function in (
+        ("one by one", create_one_by_one),
+        ("batched", agent.create_events),
+    ):
+        server, calendar, url = start_server(
+            latency=args.latency, fail_rate=args.fail_rate, seed=0
+        )
+        agent.calendar_endpoint = url
+        agent.calendar_id = None  # reload the config from the new server
+        agent._calendar_local.__dict__.clear()
+        try:
+            seconds, results = timed(function, events)
+        finally:
+            server.shutdown()
+            server.server_close()
+        created = sum(not isinstance(r, Exception) for r in results)
+        print(
+            f"{mode:<12} {seconds:>8.2f} {args.events / seconds:>9.1f} "
+            f"{created:>8} {calendar.stats['http_requests']:>6}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
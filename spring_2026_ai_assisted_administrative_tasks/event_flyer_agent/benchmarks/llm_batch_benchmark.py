@@ -0,0 +1,132 @@
+"""
+Measure LLM extraction throughput (flyers per minute), tokens per flyer and
+accuracy for several --llm-batch-size values, against a running LLM backend.
+
+Synthetic flyer texts with known dates and times are extracted one request at a
+time (like --llm-concurrency 1), so the numbers show what batching alone gains;
+no OCR or calendar is involved and the result cache is not used.
+
+Usage (from the event_flyer_agent directory, with `ollama serve` running):
+
+    python benchmarks/llm_batch_benchmark.py --backend ollama --model llama3.2
+    python benchmarks/llm_batch_benchmark.py --flyers 32 --batch-sizes 1 4 8
+    python benchmarks/llm_batch_benchmark.py --backend openai   # OPENAI_API_KEY
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+
+TOPICS = [
+    ("Robotics Club Demo Night", "Engineering Hall 120"),
+    ("Graduate Research Symposium", "Student Union Ballroom"),
+    ("Intro to Watercolor Workshop", "Art Building Studio 3"),
+    ("Career Fair Prep Session", "Library Room 204"),
+    ("Climate Policy Panel", "Online"),
+    ("Jazz Ensemble Spring Concert", "Memorial Auditorium"),
+    ("Data Science Meetup", "Innovation Center 2F"),
+    ("Community Garden Volunteer Day", "North Campus Garden"),
+]
+
+
+def sample_flyers(count):
+    """Return (text, expected fields) pairs for `count` synthetic flyers."""
+    flyers = []
+    for i in range(count):
+        title, venue = TOPICS[i % len(TOPICS)]
+        day = 1 + i % 28
+        hour = 1 + i % 8
+        link = f"https://zoom.us/j/{9000000 + i}" if venue == "Online" else None
+        text = "\n".join(
+            [
+                title.upper(),
+                f"Join us on April {day}, 2026",
+                f"{hour}:00 PM - {hour + 1}:30 PM EDT",
+                f"Zoom: {link}" if link else f"Location: {venue}",
+                "Free and open to all. Snacks provided. Questions? events@example.edu",
+            ]
+        )
+        expected = {
+            "date": f"2026-04-{day:02d}",
+            "start_time": f"{hour}:00 PM",
+            "end_time": f"{hour + 1}:30 PM",
+        }
+        flyers.append((text, expected))
+    return flyers
+
+
+def matches(event_data, expected):
+    """Whether the extracted date and times equal the expected ones."""
+    if isinstance(event_data, Exception):
+        return False
+    return all(
+        str(event_data.get(field) or "").lstrip("0").upper() == value
+        for field, value in expected.items()
+    )
+
+
+async def run_batches(flyers, batch_size):
+    """Extract all flyers in batches, one request at a time; return the results."""
+    results = []
+    for start in range(0, len(flyers), batch_size):
+        texts = [text for text, _ in flyers[start : start + batch_size]]
+        results += await agent.extract_events(texts)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", choices=["openai", "ollama"], default="ollama")
+    parser.add_argument("--model", default="tinyllama", help="Ollama model name")
+    parser.add_argument("--flyers", type=int, default=16, help="Flyers per run")
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="Batch sizes to compare (default: 1 2 4 8)",
+    )
+    args = parser.parse_args()
+
+    agent.ollama_model = args.model
+    agent.pre_extract_confidence = None  # measure the LLM on every flyer
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.init_llm_backend(args.backend)
+    flyers = sample_flyers(args.flyers)
+
+    print(f"{args.flyers} flyers, {args.backend} ({agent.llm_model_name()})")
+    print(
+        f"{'batch':>5} {'seconds':>8} {'flyers/min':>11} {'prompt tok':>11} "
+        f"{'compl. tok':>11} {'correct':>8} {'failed':>7}"
+    )
+    for batch_size in args.batch_sizes:
+        agent.llm_client = None  # async clients are bound to one event loop
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = asyncio.run(run_batches(flyers, batch_size))
+        seconds = time.perf_counter() - start
+        usages = [usage for _, usage in results]
+        correct = sum(
+            matches(event_data, expected)
+            for (event_data, _), (_, expected) in zip(results, flyers)
+        )
+        failed = sum(isinstance(event_data, Exception) for event_data, _ in results)
+        print(
+            f"{batch_size:>5} {seconds:>8.1f} {args.flyers / seconds * 60:>11.1f} "
+            f"{sum(u.prompt_tokens for u in usages) / args.flyers:>11.0f} "
+            f"{sum(u.completion_tokens for u in usages) / args.flyers:>11.0f} "
+            f"{correct:>8} {failed:>7}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Evaluate the regex pre-extractor (pre_extract.py) on a labeled corpus of flyer
+texts, and optionally compare the LLM-only path with the pre-extractor fast path.
+
+The corpus (benchmarks/flyer_corpus.jsonl) has one flyer per line: its text and the
+expected title, date, start/end time, timezone, venue, meeting link and description.
+Only labeled descriptions ("Abstract:") are given; a null description accepts any
+value, since the LLM summarizes flyers that have none.
+
+Without --backend, only the pre-extractor runs (no LLM needed). For each field it
+reports how many flyers it resolved at --min-confidence, how many of those were
+correct, and how many flyers need no LLM call at all.
+
+With --backend, the corpus is also extracted by agent.extract_events twice, with
+the pre-extractor off (LLM only) and on, and accuracy, LLM requests and time are
+compared. Flyers are sent one per request, as with the default --llm-batch-size.
+
+Usage (from the event_flyer_agent directory):
+
+    python benchmarks/pre_extract_eval.py
+    python benchmarks/pre_extract_eval.py --min-confidence 0.9 --show-errors
+    python benchmarks/pre_extract_eval.py --backend ollama --model llama3.2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import re
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+from dateutil import parser as dateparser  # noqa: E402
+from pre_extract import pre_extract  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "flyer_corpus.jsonl"
+FIELDS = (
+    "title",
+    "date",
+    "start_time",
+    "end_time",
+    "timezone",
+    "venue",
+    "meeting_link",
+    "description",
+)
+
+
+def load_corpus(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _text(value):
+    return re.sub(r"\s+", " ", str(value)).strip().casefold()
+
+
+def same(field, value, expected):
+    """Whether an extracted value matches the label (formatting differences aside)."""
+    if field == "description" and expected is None:
+        return True
+    if value in (None, "", "null") or expected is None:
+        return value in (None, "", "null") and expected is None
+    if field in ("start_time", "end_time"):
+        try:
+            return dateparser.parse(value).time() == dateparser.parse(expected).time()
+        except (ValueError, OverflowError):
+            return False
+    if field == "timezone":
+        upper = str(value).strip().upper()
+        return agent.TZ_ABBREVIATIONS.get(upper, upper) == agent.TZ_ABBREVIATIONS.get(
+            expected, expected
+        )
+    if field == "meeting_link":
+        return str(value).rstrip("/") == expected.rstrip("/")
+    if field in ("title", "venue", "description"):
+        # Labels are a reference, not the only acceptable wording
+        value, expected = _text(value), _text(expected)
+        return value in expected or expected in value
+    return str(value).strip() == expected
+
+
+def evaluate_pre_extractor(corpus, min_confidence, today, show_errors):
+    resolved = {field: 0 for field in FIELDS}
+    correct = {field: 0 for field in FIELDS}
+    complete = 0
+    start = time.perf_counter()
+    guesses = [
+        pre_extract(item["text"], agent.TZ_ABBREVIATIONS, today) for item in corpus
+    ]
+    seconds = time.perf_counter() - start
+
+    for item, guess in zip(corpus, guesses):
+        if all(
+            guess[field].confidence >= min_confidence
+            for field in agent.EVENT_FIELDS
+            if field not in agent.OPTIONAL_FIELDS
+        ):
+            complete += 1
+        for field in FIELDS:
+            value, confidence = guess[field]
+            if confidence < min_confidence:
+                continue
+            resolved[field] += 1
+            if same(field, value, item["expected"][field]):
+                correct[field] += 1
+            elif show_errors:
+                print(
+                    f"  {item['name']}: {field} = {value!r} ({confidence}), "
+                    f"expected {item['expected'][field]!r}"
+                )
+
+    print(
+        f"Pre-extractor, {len(corpus)} flyers, confidence >= {min_confidence}: "
+        f"{seconds / len(corpus) * 1e6:.0f} us per flyer"
+    )
+    print(f"{'field':<14} {'resolved':>9} {'correct':>8}")
+    for field in FIELDS:
+        print(f"{field:<14} {resolved[field]:>9} {correct[field]:>8}")
+    print(
+        f"Flyers with every required field resolved (no LLM call): {complete}/{len(corpus)}"
+    )
+
+
+async def extract_all(texts):
+    results = []
+    for text in texts:
+        results += await agent.extract_events([text])
+    return results
+
+
+def evaluate_paths(corpus, min_confidence):
+    texts = [item["text"] for item in corpus]
+    print(
+        f"\n{'path':<12} {'seconds':>8} {'LLM req':>8} {'tokens':>7} {'correct fields':>15}"
+    )
+    for name, confidence in (("LLM only", None), ("fast path", min_confidence)):
+        agent.pre_extract_confidence = confidence
+        agent.llm_client = None  # async clients are bound to one event loop
+        requests_before = agent.llm_requests.value()
+        tokens_before = agent.llm_tokens.value(kind="prompt") + agent.llm_tokens.value(
+            kind="completion"
+        )
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = asyncio.run(extract_all(texts))
+        seconds = time.perf_counter() - start
+        tokens = (
+            agent.llm_tokens.value(kind="prompt")
+            + agent.llm_tokens.value(kind="completion")
+            - tokens_before
+        )
+        correct = sum(
+            not isinstance(event_data, Exception)
+            and same(field, event_data.get(field), item["expected"][field])
+            for item, (event_data, _) in zip(corpus, results)
+            for field in FIELDS
+        )
+        print(
+            f"{name:<12} {seconds:>8.1f} "
+            f"{agent.llm_requests.value() - requests_before:>8} {tokens:>7} "
+            f"{correct:>8}/{len(corpus) * len(FIELDS)}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", default=str(CORPUS), help="Labeled flyers (JSONL)")
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    parser.add_argument(
+        "--today",
+        default="2026-03-01",
+        help="Date placing dates without a year, as when the corpus was written "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--show-errors", action="store_true", help="List wrong resolved fields"
+    )
+    parser.add_argument("--backend", choices=["openai", "ollama"], default=None)
+    parser.add_argument("--model", default="tinyllama", help="Ollama model name")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    today = date.fromisoformat(args.today)
+    evaluate_pre_extractor(corpus, args.min_confidence, today, args.show_errors)
+
+    if args.backend:
+        agent.ollama_model = args.model
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.init_llm_backend(args.backend)
+        evaluate_paths(corpus, args.min_confidence)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
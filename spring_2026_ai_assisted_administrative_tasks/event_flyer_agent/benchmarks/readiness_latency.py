@@ -0,0 +1,131 @@
+"""
+Measure the latency from dropping a flyer into the watched folder to the start of
+text extraction, with the agent's real watcher and pipeline.
+
+Two ways of dropping a file are timed:
+- write: the file is created, written and closed in place
+- rename: the file is written under a temporary name and renamed into place, as
+  browsers and most sync tools do
+
+for two watcher modes:
+- events: the agent's Handler (readiness from close-write/moved-to events, with
+  the size-stability poll as fallback)
+- poll only: close and rename events ignored, i.e. creation events plus the
+  size-stability poll, as on filesystems without inotify
+
+Text extraction itself is replaced by a timestamp, so no OCR model, LLM or calendar
+is needed.
+
+Usage (from the event_flyer_agent directory):
+
+    python benchmarks/readiness_latency.py
+    python benchmarks/readiness_latency.py --files 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+from watchdog.observers import Observer  # noqa: E402
+
+PAYLOAD = b"%PDF-1.4\n" + b"0" * 200_000
+
+
+class PollOnlyHandler(agent.Handler):
+    """Ignores close and rename events, leaving only creation + size polling."""
+
+    def on_closed(self, event):
+        pass
+
+    def on_moved(self, event):
+        pass
+
+
+class Stop(Exception):
+    """Ends a flyer's processing once extraction has started."""
+
+
+async def measure(handler_class, how, files, spacing, timeout):
+    """Drop `files` flyers; return the drop-to-extraction latencies in seconds."""
+    started = {}
+
+    def record_start(path):
+        started[Path(path).name] = time.perf_counter()
+        raise Stop
+
+    agent.read_document_cached = record_start
+    pipeline = agent.Pipeline(ocr_workers=4)
+    pipeline.start()
+    observer = Observer()
+    observer.schedule(handler_class(pipeline), str(agent.WATCH_DIR), recursive=False)
+    observer.start()
+
+    dropped = {}
+    try:
+        await asyncio.sleep(0.2)  # let the observer register its watch
+        for i in range(files):
+            name = f"{how}-{i}.pdf"
+            target = agent.WATCH_DIR / name
+            dropped[name] = time.perf_counter()
+            if how == "write":
+                with open(target, "wb") as f:
+                    f.write(PAYLOAD)
+            else:
+                temp = agent.WATCH_DIR / (name + ".part")
+                temp.write_bytes(PAYLOAD)
+                dropped[name] = time.perf_counter()
+                temp.rename(target)
+            await asyncio.sleep(spacing)
+        deadline = time.perf_counter() + timeout
+        while len(started) < files and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+    finally:
+        observer.stop()
+        observer.join()
+        await pipeline.close()
+    return [started[name] - dropped[name] for name in dropped if name in started]
+
+
+def describe(latencies, files):
+    if not latencies:
+        return f"{'-':>8} {'-':>8} {0:>4}/{files}"
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return (
+        f"{statistics.median(latencies) * 1000:>8.0f} {p95 * 1000:>8.0f} "
+        f"{len(latencies):>4}/{files}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=10, help="Flyers per scenario")
+    parser.add_argument(
+        "--spacing", type=float, default=0.05, help="Seconds between drops"
+    )
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'drop':<7} {'p50 ms':>8} {'p95 ms':>8} {'started':>9}")
+    for mode, handler_class in (
+        ("events", agent.Handler),
+        ("poll only", PollOnlyHandler),
+    ):
+        for how in ("write", "rename"):
+            with tempfile.TemporaryDirectory() as tmp:
+                agent.WATCH_DIR = Path(tmp)
+                latencies = asyncio.run(
+                    measure(handler_class, how, args.files, args.spacing, timeout=12)
+                )
+            print(f"{mode:<10} {how:<7} {describe(latencies, args.files)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Measure agent startup time and peak memory for --help, PDF-only and image workloads.
+
+Each scenario runs in a fresh Python process, several times; the script reports
+the median wall time and the peak resident set size (ru_maxrss of the child, as
+reported by os.wait4, so Linux/macOS only).
+No Google credentials or LLM server are needed: the PDF and image scenarios import
+agent.py and call read_document on a generated sample flyer, which is the work a
+real run does before its first LLM call.
+
+Usage (from the event_flyer_agent directory):
+
+    python benchmarks/startup_profile.py
+    python benchmarks/startup_profile.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+FLYER_TEXT = "Spring Seminar\nApril 3, 2026, 2:00 PM - 3:30 PM EDT\nRoom 101"
+
+
+def make_samples(directory):
+    """Write a sample PDF flyer and a PNG rendering of it."""
+    import fitz  # pymupdf
+
+    pdf_path = Path(directory) / "flyer.pdf"
+    png_path = Path(directory) / "flyer.png"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), FLYER_TEXT, fontsize=18)
+    doc.save(str(pdf_path))
+    page.get_pixmap(dpi=100).save(str(png_path))
+    return pdf_path, png_path
+
+
+def measure(command, runs):
+    """Run a command `runs` times; return (median seconds, peak RSS MB, error)."""
+    times = []
+    peak_kb = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        with subprocess.Popen(
+            command,
+            cwd=AGENT_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        ) as proc:
+            stderr = proc.stderr.read()
+            _, status, usage = os.wait4(proc.pid, 0)
+            times.append(time.perf_counter() - start)
+            proc.returncode = returncode = os.waitstatus_to_exitcode(status)
+        if returncode != 0:
+            lines = stderr.strip().splitlines()
+            return None, None, lines[-1] if lines else f"exit {returncode}"
+        peak_kb = max(peak_kb, usage.ru_maxrss)  # kilobytes on Linux
+    return statistics.median(times), peak_kb / 1024, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path, png_path = make_samples(tmp)
+        read = "import sys, agent; agent.read_document(sys.argv[1])"
+        scenarios = [
+            ("--help", [sys.executable, "agent.py", "--help"]),
+            ("import agent", [sys.executable, "-c", "import agent"]),
+            ("PDF flyer", [sys.executable, "-c", read, str(pdf_path)]),
+            ("image flyer (OCR)", [sys.executable, "-c", read, str(png_path)]),
+        ]
+        print(f"{'scenario':<20} {'median s':>9} {'peak RSS MB':>12}")
+        for name, command in scenarios:
+            seconds, rss, error = measure(command, args.runs)
+            if error:
+                print(f"{name:<20} {'failed':>9}   {error}")
+            else:
+                print(f"{name:<20} {seconds:>9.2f} {rss:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Replay extracted events through the timezone and date/time resolution of
+agent.build_event, and compare it with the previous implementation (timezone table
+plus a new ZoneInfo and two dateutil parses per event).
+
+Events come from the labeled corpus (benchmarks/flyer_corpus.jsonl), with the
+timezone written in the ways LLMs report it ("EDT", "Eastern Time", "UTC-5",
+"America/New_York", null), or from the "parsed" lines of an agent journal
+(--journal). They are cycled up to --events.
+
+Usage (from the event_flyer_agent directory):
+
+    python benchmarks/timezone_benchmark.py
+    python benchmarks/timezone_benchmark.py --events 10000 --journal .flyer_journal.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from itertools import cycle, islice
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import agent  # noqa: E402
+from dateutil import parser as dateparser  # noqa: E402
+from timezones import TZ_ABBREVIATIONS  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "flyer_corpus.jsonl"
+DEFAULT_TIMEZONE = "America/New_York"
+TIMEZONE_SPELLINGS = {
+    "ET": ["ET", "EDT", "Eastern Time", "eastern daylight time", "America/New_York"],
+    "CT": ["CT", "CST", "Central Time", "UTC-6"],
+    "PT": ["PT", "PDT", "Pacific Daylight Time", "America/Los_Angeles"],
+    None: [None, "null", "None"],
+}
+
+
+def corpus_events():
+    with open(CORPUS) as f:
+        labels = [json.loads(line)["expected"] for line in f if line.strip()]
+    events = []
+    for expected in labels:
+        if not all(expected.get(field) for field in ("date", "start_time", "end_time")):
+            continue
+        spellings = TIMEZONE_SPELLINGS.get(expected["timezone"], [expected["timezone"]])
+        events += [{**expected, "timezone": tz} for tz in spellings]
+    return events
+
+
+def journal_events(path):
+    events = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("stage") == "parsed" and record.get("event"):
+                events.append(record["event"])
+    return events
+
+
+def previous_times(data):
+    """Start and end as resolved before timezones.py: the abbreviation table (no
+    full names or offsets), a new ZoneInfo and two dateutil parses per event."""
+    tz_str = data.get("timezone")
+    tz_upper = (tz_str or "").upper().strip()
+    if not tz_str or tz_upper in ("NONE", "NULL"):
+        event_tz = DEFAULT_TIMEZONE
+    else:
+        event_tz = TZ_ABBREVIATIONS.get(tz_upper, tz_str)
+    tz = ZoneInfo(event_tz)
+    start_dt = dateparser.parse(f"{data['date']} {data['start_time']}")
+    end_dt = dateparser.parse(f"{data['date']} {data['end_time']}")
+    return (
+        start_dt.replace(tzinfo=tz).isoformat(),
+        end_dt.replace(tzinfo=tz).isoformat(),
+    )
+
+
+def current_times(data):
+    event = agent.build_event(data)
+    return event["start"]["dateTime"], event["end"]["dateTime"]
+
+
+def replay(function, events):
+    """Return (seconds, results), with each result the times or the exception."""
+    results = []
+    start = time.perf_counter()
+    for data in events:
+        try:
+            results.append(function(data))
+        except Exception as e:
+            results.append(e)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=10000, help="Events to replay")
+    parser.add_argument(
+        "--journal", default=None, help="Replay the events parsed in this journal"
+    )
+    args = parser.parse_args()
+
+    source = journal_events(args.journal) if args.journal else corpus_events()
+    if not source:
+        parser.error("No events to replay")
+    events = list(islice(cycle(source), args.events))
+    # No credentials lookup: the calendar's timezone is the default
+    agent.calendar_id, agent.calendar_timezone = "primary", DEFAULT_TIMEZONE
+
+    print(f"Replaying {len(events)} events ({len(source)} distinct)")
+    print(f"{'version':<10} {'seconds':>8} {'us/event':>9} {'failed':>7}")
+    runs = {}
+    for name, function in (("previous", previous_times), ("current", current_times)):
+        seconds, results = replay(function, events)
+        failed = sum(isinstance(result, Exception) for result in results)
+        runs[name] = results
+        print(
+            f"{name:<10} {seconds:>8.3f} {seconds / len(events) * 1e6:>9.1f} {failed:>7}"
+        )
+
+    both = [
+        (before, after)
+        for before, after in zip(runs["previous"], runs["current"])
+        if not isinstance(before, Exception) and not isinstance(after, Exception)
+    ]
+    differing = sum(before != after for before, after in both)
+    print(f"Events resolved by both with different times: {differing}/{len(both)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
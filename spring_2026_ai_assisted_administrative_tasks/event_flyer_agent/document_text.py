@@ -0,0 +1,177 @@
+"""
+Text extraction from flyers, page by page.
+
+- PDFs: each page's text layer is read in one quick pass. Pages without one
+  (scanned flyers) are rasterized and OCR'd; when several pages need OCR, they run
+  in parallel in a pool of worker processes (each with its own EasyOCR reader).
+- Images and rasterized pages are downscaled so their longer side is at most
+  OCR_MAX_SIDE pixels before OCR: flyer text stays readable, and EasyOCR's time
+  grows with the pixel count.
+- Pages are consumed in order, and reading stops once the text so far contains a
+  date, a start time and an end time, so a long brochure neither waits for OCR of
+  every page nor sends every page to the LLM.
+
+This module only imports pymupdf, Pillow and EasyOCR when needed, so pool workers
+start quickly.
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".tiff", ".bmp", ".gif"}
+
+# Longer side, in pixels, of images handed to EasyOCR
+OCR_MAX_SIDE = 1600
+# Rendering resolution for PDF pages without a text layer (before the cap above)
+OCR_DPI = 200
+# A page whose text layer has fewer characters than this is treated as scanned
+MIN_PAGE_TEXT = 20
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+\d{1,2}"
+_DATE = re.compile(
+    rf"\b(?:{_MONTH}|\d{{1,2}}[/.-]\d{{1,2}}[/.-]\d{{2,4}}|\d{{4}}-\d{{2}}-\d{{2}})",
+    re.IGNORECASE,
+)
+_TIME = re.compile(
+    r"\b(?:\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)|\d{1,2}:\d{2}|noon)",
+    re.IGNORECASE,
+)
+
+# One EasyOCR reader per process (the agent's, or each pool worker's)
+ocr_reader = None
+_ocr_lock = threading.Lock()
+
+ocr_processes = min(4, os.cpu_count() or 1)
+_ocr_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_reader():
+    """Return the EasyOCR reader (CPU only, no GPU), loading the model on first use."""
+    global ocr_reader
+
+    with _ocr_lock:
+        if ocr_reader is None:
+            import easyocr
+
+            ocr_reader = easyocr.Reader(["en"], gpu=False)
+    return ocr_reader
+
+
+def get_ocr_pool():
+    """Return the page OCR process pool, or None if it is disabled (ocr_processes < 2)."""
+    global _ocr_pool
+
+    if ocr_processes < 2:
+        return None
+    with _pool_lock:
+        if _ocr_pool is None:
+            # spawn: forking a process that runs threads (watcher, asyncio, OCR
+            # threads) can deadlock the child
+            _ocr_pool = ProcessPoolExecutor(
+                ocr_processes, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    """Stop the page OCR worker processes, if started."""
+    global _ocr_pool
+
+    with _pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False, cancel_futures=True)
+            _ocr_pool = None
+
+
+def has_event_fields(text):
+    """Whether text mentions a date and at least two times (start and end)."""
+    return _DATE.search(text) is not None and len(_TIME.findall(text)) >= 2
+
+
+def ocr_image(image):
+    """Run OCR on an image (numpy array, file path or encoded bytes)."""
+    results = get_ocr_reader().readtext(image)
+    # Join lines and clean up excessive newlines
+    text = "\n".join([line[1] for line in results])
+    # Replace multiple newlines with single newline
+    return "\n".join([l.strip() for l in text.split("\n") if l.strip()])
+
+
+def load_image(path):
+    """Load an image as an RGB array, downscaled to at most OCR_MAX_SIDE pixels."""
+    # numpy and Pillow are installed with EasyOCR
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert("RGB")  # first frame of GIFs, no alpha/palette
+        image.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE))
+        return np.asarray(image)
+
+
+def render_page(page):
+    """Rasterize a PDF page for OCR (PNG bytes), capped at OCR_MAX_SIDE pixels."""
+    import fitz  # pymupdf
+
+    longest = max(page.rect.width, page.rect.height) or 1
+    zoom = min(OCR_DPI / 72, OCR_MAX_SIDE / longest)
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+
+
+def ocr_pdf_page(path, page_number):
+    """OCR one PDF page (run in a pool worker: opens the document itself)."""
+    import fitz  # pymupdf
+
+    with fitz.open(path) as doc:
+        image = render_page(doc[page_number])
+    return ocr_image(image)
+
+
+def read_image(path):
+    """Extract text from an image file with OCR."""
+    return ocr_image(load_image(path))
+
+
+def read_pdf(path):
+    """Extract text from a PDF, OCR'ing pages that have no text layer.
+
+    Returns the page texts in page order, up to the page where the text first
+    contains the event's date and times.
+    """
+    import fitz  # pymupdf
+
+    with fitz.open(path) as doc:
+        page_texts = [page.get_text() for page in doc]
+        scanned = [
+            i for i, text in enumerate(page_texts) if len(text.strip()) < MIN_PAGE_TEXT
+        ]
+        # A single scanned page is OCR'd right here; several go to the pool
+        pool = get_ocr_pool() if len(scanned) > 1 else None
+        if pool is None:
+            ocr = {i: None for i in scanned}
+        else:
+            ocr = {i: pool.submit(ocr_pdf_page, str(path), i) for i in scanned}
+
+        texts = []
+        try:
+            for i, text in enumerate(page_texts):
+                if i in ocr:
+                    future = ocr[i]
+                    if future is None:
+                        text = ocr_image(render_page(doc[i]))
+                    else:
+                        text = future.result()
+                texts.append(text)
+                if has_event_fields("\n".join(texts)):
+                    break
+        finally:
+            # Early stop (or failure): drop OCR work that has not started
+            for future in ocr.values():
+                if future is not None:
+                    future.cancel()
+
+    return "\n".join(texts)
@@ -0,0 +1,225 @@
+"""
+Local stand-in for the parts of the Google Calendar API the agent uses, for testing
+batching and throughput without network access or a Google account.
+
+Supported calls:
+- POST /calendar/v3/calendars/{calendarId}/events             (events.insert; a
+  client-chosen id that already exists is answered with 409)
+- GET  /calendar/v3/users/me/calendarList/{calendarId}        (calendarList.get)
+- POST /batch/calendar/v3    (multipart/mixed batch of the calls above)
+- GET  /stats                (JSON counters: HTTP requests, batches, events, ...)
+
+Every HTTP request (a whole batch counts as one) is delayed by --latency seconds to
+stand in for the network round trip. With --fail-rate, that fraction of inserts is
+answered with 503 so retries can be exercised. Events are kept in memory only.
+
+Usage:
+
+    python fake_calendar_server.py --port 8765 --latency 0.1
+    python agent.py --backend ollama --calendar-endpoint http://127.0.0.1:8765
+"""
+
+import argparse
+import email
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+INSERT_PATH = re.compile(r"^/calendar/v3/calendars/([^/]+)/events$")
+CALENDAR_LIST_PATH = re.compile(r"^/calendar/v3/users/me/calendarList/([^/]+)$")
+BATCH_PATH = "/batch/calendar/v3"
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    409: "Conflict",
+    503: "Service Unavailable",
+}
+
+
+class FakeCalendar:
+    """In-memory calendar state and the request handling shared by all endpoints."""
+
+    def __init__(
+        self, latency=0.0, fail_rate=0.0, timezone="America/New_York", seed=None
+    ):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.timezone = timezone
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.events = []
+        self.ids = set()
+        self.stats = {
+            "http_requests": 0,
+            "batches": 0,
+            "batch_items": 0,
+            "events_created": 0,
+            "injected_failures": 0,
+        }
+
+    def call(self, method, target, body):
+        """Handle one API call; return (status, JSON-serializable response)."""
+        path = urlsplit(target).path
+        match = INSERT_PATH.match(path)
+        if method == "POST" and match:
+            with self.lock:
+                if self.random.random() < self.fail_rate:
+                    self.stats["injected_failures"] += 1
+                    return 503, error_body(503, "Injected failure")
+                try:
+                    event = json.loads(body or b"{}")
+                except ValueError:
+                    return 400, error_body(400, "Invalid JSON")
+                if not event.get("start") or not event.get("end"):
+                    return 400, error_body(400, "Missing start or end time")
+                # Client-chosen ids must be unique, as in the real API
+                if event.get("id") in self.ids:
+                    return 409, error_body(
+                        409, "The requested identifier already exists."
+                    )
+                event["id"] = event.get("id") or uuid.uuid4().hex
+                self.ids.add(event["id"])
+                event["status"] = "confirmed"
+                event["htmlLink"] = f"http://fake-calendar/event?eid={event['id']}"
+                event["organizer"] = {"email": unquote(match.group(1))}
+                self.events.append(event)
+                self.stats["events_created"] += 1
+            return 200, event
+        match = CALENDAR_LIST_PATH.match(path)
+        if method == "GET" and match:
+            return 200, {"id": unquote(match.group(1)), "timeZone": self.timezone}
+        return 404, error_body(404, f"No such method: {method} {path}")
+
+    def batch(self, content_type, body):
+        """Handle a multipart/mixed batch; return (content type, response body)."""
+        message = email.message_from_bytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+        )
+        boundary = "batch_" + uuid.uuid4().hex
+        parts = []
+        items = message.get_payload() if message.is_multipart() else []
+        for item in items:
+            request = item.get_payload(decode=True) or b""
+            head, _, item_body = request.partition(b"\r\n\r\n")
+            if not item_body and b"\n\n" in request:
+                head, _, item_body = request.partition(b"\n\n")
+            request_line = head.decode().splitlines()[0]
+            method, target = request_line.split()[:2]
+            status, response = self.call(method, target, item_body)
+            content_id = (item["Content-ID"] or "").strip("<>")
+            parts.append(
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(response)}\r\n"
+            )
+        with self.lock:
+            self.stats["batches"] += 1
+            self.stats["batch_items"] += len(items)
+        body = "".join(parts) + f"--{boundary}--\r\n"
+        return f"multipart/mixed; boundary={boundary}", body.encode()
+
+
+def error_body(status, message):
+    return {"error": {"code": status, "message": message, "errors": []}}
+
+
+def make_handler(calendar):
+    """Return a request handler class serving `calendar`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            with calendar.lock:
+                calendar.stats["http_requests"] += 1
+            if self.path == "/stats":
+                with calendar.lock:
+                    data = json.dumps(calendar.stats).encode()
+                self._respond(200, "application/json", data)
+                return
+            time.sleep(calendar.latency)
+            if method == "POST" and urlsplit(self.path).path == BATCH_PATH:
+                content_type, data = calendar.batch(
+                    self.headers.get("Content-Type", ""), body
+                )
+                self._respond(200, content_type, data)
+                return
+            status, response = calendar.call(method, self.path, body)
+            self._respond(status, "application/json", json.dumps(response).encode())
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def log_message(self, format, *args):
+            pass  # keep benchmark output readable
+
+    return Handler
+
+
+def start_server(port=0, **calendar_options):
+    """Start a server in a background thread; return (server, calendar, base URL)."""
+    calendar = FakeCalendar(**calendar_options)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(calendar))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, calendar, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the Google Calendar API (inserts and batches)"
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.1,
+        help="Seconds added to every HTTP request, batch or not (default: 0.1)",
+    )
+    parser.add_argument(
+        "--fail-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of inserts answered with 503 (default: 0)",
+    )
+    parser.add_argument(
+        "--timezone",
+        default="America/New_York",
+        help="Calendar timezone reported by calendarList.get (default: America/New_York)",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for --fail-rate")
+    args = parser.parse_args()
+
+    server, calendar, url = start_server(
+        args.port,
+        latency=args.latency,
+        fail_rate=args.fail_rate,
+        timezone=args.timezone,
+        seed=args.seed,
+    )
+    print(f"Fake Calendar API at {url} (stats: {url}/stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
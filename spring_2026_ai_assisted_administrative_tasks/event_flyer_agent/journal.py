@@ -0,0 +1,149 @@
+"""
+Append-only journal of the stages each flyer has completed, so an agent that stops
+or crashes mid-pipeline resumes where it left off after a restart.
+
+Each flyer (identified by its file name and the SHA-256 of its contents) gets an
+entry with a random id. One JSON line is appended, flushed and fsync'ed as the entry
+completes each stage:
+
+    extracted  the text read from the flyer          {"text": ...}
+    parsed     the event the LLM extracted            {"event": {...}}
+    created    the calendar event was inserted        {"calendar_event": "<id>"}
+    moved      the flyer was saved to processed/      (entry finished)
+
+On restart, a flyer still in the watch folder skips the stages its entry has
+completed: no repeated OCR or LLM call, and no second calendar event. The entry id
+is also used as the calendar event's id, so an insert repeated after a crash between
+the insert and its "created" line is rejected as a duplicate by the Calendar API.
+
+When the journal is opened, finished entries and entries whose flyer is gone are
+dropped, and the file is rewritten (atomically) with the remaining lines.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+STAGES = ("extracted", "parsed", "created", "moved")
+
+
+class JournalEntry:
+    """The journaled progress of one flyer."""
+
+    def __init__(self, name, digest, id=None):
+        self.name = name
+        self.digest = digest
+        # Calendar API event ids allow the characters 0-9 and a-v
+        self.id = id or uuid.uuid4().hex
+        self.stage = None
+        self.text = None
+        self.event = None
+        self.calendar_event = None
+
+    def apply(self, record):
+        """Update the entry from one journal line."""
+        self.stage = record["stage"]
+        for field in ("text", "event", "calendar_event"):
+            if field in record:
+                setattr(self, field, record[field])
+
+
+class Journal:
+    """Append-only JSON-lines journal of flyer stage completions.
+
+    Safe to use from several threads (the pipeline's OCR, event loop and calendar
+    threads share one instance).
+    """
+
+    def __init__(self, path, keep=None):
+        """Open (or create) the journal at path.
+
+        keep(name) tells whether the unfinished entry of a flyer is still needed
+        (e.g. whether the file is still in the watch folder); by default all are.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = {}
+        lines = self._load()
+        self._compact(lines, keep or (lambda name: True))
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        """Read the journal; return its lines by entry key."""
+        lines = {}
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return lines
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = (record["file"], record["sha256"])
+                except (ValueError, KeyError):
+                    continue  # torn last line of a crash, or foreign content
+                entry = self._entries.get(key)
+                if entry is None or entry.id != record.get("id"):
+                    # A newer entry for the same file content replaces the old one
+                    entry = self._entries[key] = JournalEntry(*key, record.get("id"))
+                    lines[key] = []
+                entry.apply(record)
+                lines[key].append(line if line.endswith("\n") else line + "\n")
+        return lines
+
+    def _compact(self, lines, keep):
+        """Rewrite the journal with only the unfinished entries still needed."""
+        for key, entry in list(self._entries.items()):
+            if entry.stage == "moved" or not keep(entry.name):
+                del self._entries[key]
+                del lines[key]
+        if not self.path.exists() and not lines:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            for entry_lines in lines.values():
+                f.writelines(entry_lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def entry(self, name, digest):
+        """Return the unfinished entry of a flyer, or a new one."""
+        with self._lock:
+            entry = self._entries.get((name, digest))
+            if entry is None or entry.stage == "moved":
+                entry = self._entries[(name, digest)] = JournalEntry(name, digest)
+            return entry
+
+    def record(self, entry, stage, **data):
+        """Append (durably) that entry completed stage, with the stage's data."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        record = {
+            "time": time.time(),
+            "file": entry.name,
+            "sha256": entry.digest,
+            "id": entry.id,
+            "stage": stage,
+            **data,
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            entry.apply(record)
+            if stage == "moved":
+                self._entries.pop((entry.name, entry.digest), None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
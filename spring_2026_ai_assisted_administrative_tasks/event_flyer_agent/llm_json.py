@@ -0,0 +1,125 @@
+"""
+Parsing of JSON replies from LLMs, with a cheap local repair pass.
+
+Small local models often wrap JSON in Markdown fences or prose, add // comments,
+leave trailing commas, forget commas between fields, or write Python literals
+(None/True/False) and single-quoted strings. repair_json fixes these without another
+LLM call; only replies that still do not parse need a re-ask.
+"""
+
+import json
+import re
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = {"None": "null", "True": "true", "False": "false"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+
+
+def _outermost(text):
+    """Return text from the first { or [ to the last } or ], or text itself."""
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if not starts or end < min(starts):
+        return text
+    return text[min(starts) : end + 1]
+
+
+def _normalize_tokens(text):
+    """Drop comments and trailing commas, convert single-quoted strings and Python
+    literals, and insert missing commas between consecutive values.
+
+    Scans the text once, token by token, so string contents are never changed.
+    """
+    out = []
+    value_ended = False  # the last token ended a value (string, number, }, ], ...)
+
+    def value(token):
+        if value_ended:
+            out.append(",")
+        out.append(token)
+
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            # Copy a string literal, re-quoting single-quoted ones
+            j = i + 1
+            chars = []
+            while j < n and text[j] != c:
+                if text[j] == "\\" and j + 1 < n:
+                    escaped = text[j + 1]
+                    chars.append(escaped if escaped == "'" else text[j : j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if text[j] == '"' else text[j])
+                j += 1
+            value('"' + "".join(chars) + '"')
+            value_ended = True
+            i = j + 1
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+        elif text.startswith("/*", i):
+            close = text.find("*/", i + 2)
+            i = n if close == -1 else close + 2
+        elif c in "{[":
+            value(c)
+            value_ended = False
+            i += 1
+        elif c in "}]":
+            # Drop a trailing comma before the bracket (whitespace may follow it)
+            k = len(out)
+            while k and out[k - 1].isspace():
+                k -= 1
+            if k and out[k - 1] == ",":
+                del out[k - 1]
+            out.append(c)
+            value_ended = True
+            i += 1
+        elif c in ",:":
+            out.append(c)
+            value_ended = False
+            i += 1
+        elif c.isalpha() or c == "-" or c.isdigit():
+            match = _NUMBER.match(text, i)
+            if match:
+                j = match.end()
+                token = match.group()
+            else:
+                j = i + 1
+                while j < n and (text[j].isalnum() or text[j] == "_"):
+                    j += 1
+                token = _LITERALS.get(text[i:j], text[i:j])
+            value(token)
+            value_ended = True
+            i = j
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def repair_json(content):
+    """Fix common defects of LLM-written JSON; the result may still be invalid."""
+    fenced = _FENCE.search(content)
+    text = fenced.group(1) if fenced else content
+    text = _outermost(text.translate(_SMART_QUOTES))
+    return _normalize_tokens(text)
+
+
+def parse_json_reply(content):
+    """Parse an LLM reply as JSON, repairing it locally if needed.
+
+    Raises:
+        ValueError: If the reply cannot be parsed even after repair.
+    """
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        error = e
+    try:
+        return json.loads(repair_json(content))
+    except json.JSONDecodeError:
+        raise ValueError(f"Failed to parse JSON from LLM response: {error}")
@@ -0,0 +1,255 @@
+"""
+Minimal Prometheus-style metrics for the agent: counters, gauges and histograms
+with labels.
+
+A Registry renders its metrics in the Prometheus text format (served at /metrics by
+start_http_server, for Prometheus or plain curl) or as a JSON snapshot (appended as
+JSON lines by append_jsonl). Only the standard library is used, so metrics cost no
+extra dependency; observations are cheap and thread-safe (the agent records them
+from the event loop and from its worker threads).
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; flyer stages range from milliseconds (cache hits) to minutes (OCR, LLM)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named metric with one value (or set of values) per label combination."""
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Reported as zero before the first observation, like Prometheus clients
+            self._values[()] = self._zero()
+
+    def _zero(self):
+        return 0
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self):
+        """Yield (name suffix, label pairs, value) for every sample."""
+        for key, value in self._items():
+            yield "", list(zip(self.labelnames, key)), value
+
+    def render(self):
+        """Return the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, pairs, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(pairs)} {_format_number(value)}"
+            )
+        return "\n".join(lines)
+
+    def snapshot(self):
+        """Return the metric's values as JSON-serializable data."""
+        return [
+            {"labels": dict(zip(self.labelnames, key)), "value": value}
+            for key, value in self._items()
+        ]
+
+
+class Counter(Metric):
+    """A value that only goes up (events, tokens, failures)."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """A value that goes up and down, set directly or read from a function."""
+
+    type = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function, **labels):
+        """Report function() as the value each time the gauge is read."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def _items(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, function in functions:
+            values[key] = function()
+        return list(values.items())
+
+
+class Histogram(Metric):
+    """Counts of observed values (e.g. durations) per bucket, plus sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, help, labelnames)
+
+    def _zero(self):
+        return [0] * len(self.buckets), 0.0
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or self._zero()
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _cumulative(self):
+        """Yield (key, cumulative bucket counts, sum, count)."""
+        for key, (counts, total) in self._items():
+            cumulative, running = [], 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            yield key, cumulative, total, running
+
+    def samples(self):
+        for key, cumulative, total, count in self._cumulative():
+            pairs = list(zip(self.labelnames, key))
+            for bound, running in zip(self.buckets, cumulative):
+                yield "_bucket", pairs + [("le", _format_number(bound))], running
+            yield "_sum", pairs, total
+            yield "_count", pairs, count
+
+    def snapshot(self):
+        return [
+            {
+                "labels": dict(zip(self.labelnames, key)),
+                "count": count,
+                "sum": total,
+                "buckets": {
+                    _format_number(bound): running
+                    for bound, running in zip(self.buckets, cumulative)
+                },
+            }
+            for key, cumulative, total, count in self._cumulative()
+        ]
+
+
+class Registry:
+    """The set of metrics exposed together."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """Return all metrics in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def snapshot(self):
+        """Return all metrics as JSON-serializable data, keyed by name."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+def start_http_server(registry, port, host="127.0.0.1"):
+    """Serve registry.render() at http://host:port/metrics from a background thread.
+
+    Returns the server (call shutdown() to stop it).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes would flood the agent's output
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def append_jsonl(registry, path):
+    """Append one JSON line with the current time and all metric values to path."""
+    line = json.dumps({"time": time.time(), "metrics": registry.snapshot()})
+    with open(path, "a") as f:
+        f.write(line + "\n")
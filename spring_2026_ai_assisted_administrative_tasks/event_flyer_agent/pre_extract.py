@@ -0,0 +1,409 @@
+"""
+Deterministic pre-extraction of event fields from flyer text, so that easy flyers
+need no LLM call and the others only ask the LLM for what is missing.
+
+Templated announcements (seminars, colloquia, club meetings) state their date,
+times, timezone abbreviation and meeting link in a handful of standard forms, and
+often label their title and location ("Title:", "Location:"). pre_extract reads
+those with regular expressions and returns each field with a confidence between 0
+and 1. Values are formatted like the LLM's: dates as YYYY-MM-DD, times as
+"H:MM AM/PM", timezones as the abbreviation found in the text.
+
+Confidence reflects how unambiguous the match was, e.g. a date with a year (0.95)
+beats one whose year had to be inferred (0.8), and several different dates in one
+flyer (deadlines, multi-day events) drop it to 0.4. "Not mentioned" is a valid
+answer too: no meeting link and no sign of a virtual event gives meeting_link None
+with high confidence. The agent takes the fields at or above its threshold
+(--min-confidence) from here and asks the LLM for the rest.
+"""
+
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+Guess = namedtuple("Guess", ["value", "confidence"])
+
+# Bumped when patterns or confidences change; part of the agent's event cache key
+PRE_EXTRACT_VERSION = 3
+
+_MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+_MONTH = (
+    r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_ORDINAL = r"(?:st|nd|rd|th)?"
+# (pattern, confidence with a year, confidence without one)
+_DATE_PATTERNS = [
+    (
+        re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b"),
+        0.95,
+        None,
+    ),
+    (
+        re.compile(
+            rf"\b{_MONTH}\s+(?P<day>\d{{1,2}}){_ORDINAL}\b(?:,?\s+(?P<year>\d{{4}})\b)?",
+            re.IGNORECASE,
+        ),
+        0.95,
+        0.8,
+    ),
+    (
+        re.compile(
+            rf"\b(?P<day>\d{{1,2}}){_ORDINAL}\s+(?:of\s+)?{_MONTH}(?:,?\s+(?P<year>\d{{4}})\b)?",
+            re.IGNORECASE,
+        ),
+        0.9,
+        0.75,
+    ),
+    # US order (month/day), as on the flyers this agent is used with
+    (
+        re.compile(
+            r"(?<![\d/])(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}|\d{2})\b"
+        ),
+        0.85,
+        None,
+    ),
+]
+
+_MERIDIEM = r"[ap]\.?\s?m\b\.?"
+
+
+def _clock(name, lookbehind=r"(?<![\d/:.-])"):
+    return (
+        rf"{lookbehind}(?:(?P<{name}noon>noon)|(?P<{name}h>\d{{1,2}})"
+        rf"(?::(?P<{name}m>[0-5]\d))?(?!\d)\s*(?P<{name}ap>{_MERIDIEM})?)"
+    )
+
+
+_TIME_RANGE = re.compile(
+    rf"{_clock('s')}\s*(?:-|–|—|to|until|till)\s*{_clock('e', lookbehind='')}",
+    re.IGNORECASE,
+)
+_TIME = re.compile(_clock("s"), re.IGNORECASE)
+
+_TIMEZONE_NAMES = {
+    "eastern": "ET",
+    "central": "CT",
+    "mountain": "MT",
+    "pacific": "PT",
+}
+_TIMEZONE_NAME = re.compile(
+    r"\b(eastern|central|mountain|pacific)\s+(?:standard\s+|daylight\s+)?time\b",
+    re.IGNORECASE,
+)
+# What may separate a time from its timezone: "2 PM ET", "2 PM (CT)", "2 PM, PT"
+_BEFORE_ZONE = re.compile(r"[ \t]*[(,]?[ \t]*")
+# Timezone-like abbreviations (IST, CET, AEST, ...) right after a time
+_UNKNOWN_TIMEZONE = re.compile(r"(?:[AaPp]\.?\s?[Mm]\.?|\d)\s*\(?([A-Z]{2,4}T)\b")
+
+_URL = re.compile(
+    r"(?:https?://|www\.)\S+|\b[\w.-]+\.(?:us|com|gov)/\S+", re.IGNORECASE
+)
+_MEETING_HOSTS = re.compile(
+    r"(?:^|\.|//)(?:[\w-]+\.)*(?:zoom\.us|zoomgov\.com|teams\.microsoft\.com"
+    r"|teams\.live\.com|meet\.google\.com|webex\.com)(?:/|$)",
+    re.IGNORECASE,
+)
+_VIRTUAL_WORDS = re.compile(
+    r"\b(?:zoom|teams|webex|google meet|virtual|online|webinar|livestream)\b",
+    re.IGNORECASE,
+)
+_VENUE_WORDS = re.compile(
+    r"\b(?:room|rm\.?|hall|building|bldg\.?|auditorium|center|centre|library"
+    r"|lounge|theater|theatre|ballroom|lab|suite|floor)\b",
+    re.IGNORECASE,
+)
+
+
+def _label(names):
+    return re.compile(
+        rf"^[ \t]*(?:{names})[ \t]*[:\-–][ \t]*(?P<value>\S.*?)[ \t]*$",
+        re.IGNORECASE | re.MULTILINE,
+    )
+
+
+_TITLE_LABEL = _label(r"title|topic|talk title|talk|seminar|event|lecture")
+_VENUE_LABEL = _label(r"location|venue|where|place|room")
+_SPEAKER_LABEL = _label(r"guest speaker|speaker|presenter|presented by")
+_DESCRIPTION_LABEL = re.compile(
+    r"^[ \t]*(?:abstract|description|about|summary)[ \t]*:[ \t]*"
+    r"(?P<value>.+?)(?=\n[ \t]*\n|\n[ \t]*[A-Za-z ]{2,20}:|\Z)",
+    re.IGNORECASE | re.MULTILINE | re.DOTALL,
+)
+_DESCRIPTION_LIMIT = 500
+
+
+def _normalize(text):
+    """Undo OCR spacing that breaks the patterns ("2 : 00 PM", "Feb 11 , 2026")."""
+    text = re.sub(r"(\d)[ \t]*:[ \t]*(\d)", r"\1:\2", text)
+    text = re.sub(r"[ \t]+,", ",", text)
+    return re.sub(r"[ \t]{2,}", " ", text)
+
+
+def _clean(value):
+    return re.sub(r"\s+", " ", value).strip(" \"'“”*•-")
+
+
+def _found_dates(text, today):
+    """Yield (date, confidence) for every date in text."""
+    for pattern, with_year, without_year in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            month = match.group("month")
+            month = int(month) if month.isdigit() else _MONTHS[month[:3].lower()]
+            year = match.group("year")
+            try:
+                if year:
+                    year = int(year) + (2000 if len(year) == 2 else 0)
+                    yield date(year, month, int(match.group("day"))), with_year
+                elif without_year is not None:
+                    # The next such date: a flyer announces an upcoming event
+                    found = date(today.year, month, int(match.group("day")))
+                    if found < today - timedelta(days=60):
+                        found = found.replace(year=today.year + 1)
+                    yield found, without_year
+            except ValueError:
+                continue  # e.g. February 30
+
+
+def _date(text, today):
+    found = list(_found_dates(text, today))
+    if not found:
+        return Guess(None, 0.2)
+    first, confidence = found[0]
+    if len({d for d, _ in found}) > 1:
+        # Deadlines, multi-day events, series: let the LLM decide
+        confidence = 0.4
+    return Guess(first.isoformat(), confidence)
+
+
+def _to_24h(hour, minute, meridiem):
+    if meridiem == "p" and hour != 12:
+        hour += 12
+    elif meridiem == "a" and hour == 12:
+        hour = 0
+    return hour, minute
+
+
+def _parse_clock(match, name):
+    """Return (hour, minute, meridiem 'a'/'p'/None) of one side of a time match."""
+    if match.group(f"{name}noon"):
+        return 12, 0, "p"
+    meridiem = match.group(f"{name}ap")
+    return (
+        int(match.group(f"{name}h")),
+        int(match.group(f"{name}m") or 0),
+        meridiem[0].lower() if meridiem else None,
+    )
+
+
+def _format_time(hour, minute):
+    """Format a 24-hour time as "H:MM AM/PM"."""
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def _resolve_range(start, end):
+    """Return ((start 24h), (end 24h), confidence) for two parsed clock times."""
+    (sh, sm, sap), (eh, em, eap) = start, end
+    if sh > 23 or eh > 23:
+        return None
+    if sap and eap:
+        confidence = 0.95
+    elif eap:
+        # "2-3:30 pm": the start shares the end's meridiem, unless that puts it
+        # after the end ("11-1 pm")
+        sap = eap
+        if _to_24h(sh, sm, sap) > _to_24h(eh, em, eap):
+            sap = "a" if eap == "p" else "p"
+        confidence = 0.9
+    elif sap:
+        eap = sap
+        if _to_24h(eh, em, eap) < _to_24h(sh, sm, sap):
+            eap = "p"
+        confidence = 0.85
+    elif sh > 12 or eh > 12:
+        confidence = 0.9  # 24-hour clock
+    else:
+        # "2:00-3:30" with no meridiem: afternoon is the usual reading
+        sap = eap = "p" if 1 <= sh <= 7 else "a"
+        confidence = 0.6
+    if sh > 12 or eh > 12:
+        sap = eap = None
+    start_24, end_24 = _to_24h(sh, sm, sap), _to_24h(eh, em, eap)
+    if end_24 <= start_24:
+        return None
+    return start_24, end_24, confidence
+
+
+def _times(text):
+    """Return (start Guess, end Guess)."""
+    ranges = []
+    for match in _TIME_RANGE.finditer(text):
+        start, end = _parse_clock(match, "s"), _parse_clock(match, "e")
+        # A bare "10-12" is more likely a date or room than a time range
+        if not (start[2] or end[2] or match.group("sm") or match.group("em")):
+            if not (match.group("snoon") or match.group("enoon")):
+                continue
+        resolved = _resolve_range(start, end)
+        if resolved:
+            ranges.append(resolved)
+    if ranges:
+        start_24, end_24, confidence = ranges[0]
+        if len(set(ranges)) > 1:
+            confidence = min(confidence, 0.5)  # agenda or several sessions
+        return (
+            Guess(_format_time(*start_24), confidence),
+            Guess(_format_time(*end_24), confidence),
+        )
+
+    # No range: a lone start time at most ("Doors open 7 pm")
+    for match in _TIME.finditer(text):
+        hour, minute, meridiem = _parse_clock(match, "s")
+        if meridiem and hour <= 12:
+            return (
+                Guess(_format_time(*_to_24h(hour, minute, meridiem)), 0.6),
+                Guess(None, 0.3),
+            )
+    return Guess(None, 0.2), Guess(None, 0.2)
+
+
+def _time_ends(text):
+    """Positions right after the times in text (ranges, or a time with minutes or
+    AM/PM), where a timezone abbreviation may follow."""
+    ends = {match.end() for match in _TIME_RANGE.finditer(text)}
+    ends.update(
+        match.end()
+        for match in _TIME.finditer(text)
+        if match.group("sm") or match.group("sap") or match.group("snoon")
+    )
+    return ends
+
+
+def _timezone(text, timezones):
+    abbreviations = sorted(timezones, key=len, reverse=True)
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, abbreviations)) + r")\b")
+    found = [(m.group(1), m.start()) for m in pattern.finditer(text)]
+    found += [
+        (_TIMEZONE_NAMES[m.group(1).lower()], m.start())
+        for m in _TIMEZONE_NAME.finditer(text)
+    ]
+    found.sort(key=lambda item: item[1])
+    # Only a zone right after a time ("2 PM ET", "2 PM (CT)") is taken as the event's;
+    # elsewhere "CT" or "PT" is as likely a state in an address ("New Haven, CT")
+    ends = _time_ends(text)
+    at_time = [
+        value
+        for value, position in found
+        if any(_BEFORE_ZONE.fullmatch(text, end, position) for end in ends)
+    ]
+    if at_time:
+        confidence = 0.95
+        if len(set(at_time)) > 1:
+            confidence = 0.6  # e.g. "3 PM ET / 12 PM PT"
+        return Guess(at_time[0], confidence)
+    if _UNKNOWN_TIMEZONE.search(text):
+        return Guess(None, 0.3)  # a timezone the agent has no mapping for
+    if found:
+        return Guess(found[0][0], 0.5)
+    return Guess(None, 0.85)
+
+
+def _meeting_link(text):
+    links = []
+    for match in _URL.finditer(text):
+        url = match.group().rstrip(".,;:)]>'\"")
+        if _MEETING_HOSTS.search(url):
+            links.append(url if "://" in url else "https://" + url)
+    if links:
+        return Guess(links[0], 0.95 if len(set(links)) == 1 else 0.6)
+    if _VIRTUAL_WORDS.search(text):
+        return Guess(None, 0.3)  # virtual, but the link is elsewhere (QR code?)
+    return Guess(None, 0.9)
+
+
+def _venue(text, meeting_link):
+    match = _VENUE_LABEL.search(text)
+    if match:
+        value = _clean(match.group("value"))
+        if _URL.search(value) or re.fullmatch(
+            r"(?:zoom|online|virtual|teams|webex)(?:\s+only)?", value, re.IGNORECASE
+        ):
+            return Guess(None, 0.85)
+        return Guess(value, 0.9)
+    for line in text.splitlines():
+        line = _clean(line)
+        if (
+            _VENUE_WORDS.search(line)
+            and len(line) <= 80
+            and not _URL.search(line)
+            and not _VIRTUAL_WORDS.search(line)
+        ):
+            return Guess(line, 0.6)
+    if meeting_link.value:
+        return Guess(None, 0.8)  # virtual only
+    return Guess(None, 0.4)
+
+
+def _title(text):
+    match = _TITLE_LABEL.search(text)
+    if match:
+        return Guess(_clean(match.group("value")), 0.9)
+    for line in text.splitlines():
+        line = _clean(line)
+        if (
+            3 <= len(line) <= 120
+            and sum(c.isalpha() for c in line) > len(line) / 2
+            and not re.match(r"^[A-Za-z ]{2,20}:", line)
+            and not _URL.search(line)
+        ):
+            return Guess(line, 0.5)
+    return Guess(None, 0.1)
+
+
+def _description(text):
+    match = _DESCRIPTION_LABEL.search(text)
+    if match:
+        return Guess(_clean(match.group("value"))[:_DESCRIPTION_LIMIT], 0.85)
+    # Usually just unlabeled (a blurb, an agenda), so below the default threshold
+    return Guess(None, 0.7)
+
+
+def pre_extract(text, timezones, today=None):
+    """Extract event fields from flyer text without an LLM.
+
+    timezones are the abbreviations to recognize (e.g. the keys of the agent's
+    timezone map); today (default: date.today()) places dates without a year.
+
+    Returns {field: Guess(value, confidence)} for the fields of the LLM's event
+    JSON, plus "speaker" when the flyer labels one.
+    """
+    today = today or date.today()
+    text = _normalize(text)
+    start_time, end_time = _times(text)
+    meeting_link = _meeting_link(text)
+    guesses = {
+        "title": _title(text),
+        "date": _date(text, today),
+        "start_time": start_time,
+        "end_time": end_time,
+        "timezone": _timezone(text, timezones),
+        "venue": _venue(text, meeting_link),
+        "meeting_link": meeting_link,
+        "description": _description(text),
+    }
+    speaker = _SPEAKER_LABEL.search(text)
+    if speaker:
+        guesses["speaker"] = Guess(_clean(speaker.group("value")), 0.9)
+    return guesses
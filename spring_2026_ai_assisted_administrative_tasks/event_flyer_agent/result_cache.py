@@ -0,0 +1,145 @@
+"""
+Persistent cache of the agent's two expensive results: the text read from a flyer
+(keyed by the SHA-256 of the file's bytes) and the event JSON the LLM extracted from
+that text (keyed by a hash of the normalized text, the model, the prompt version and
+the pre-extractor settings).
+
+A flyer dropped again, even under another name or after a restart, skips OCR and the
+LLM call. Entries live in a single SQLite file; once the stored values exceed the size
+limit, the least recently used entries are deleted.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 64 << 20
+_DIGEST_CHUNK = 1 << 20
+_WHITESPACE = re.compile(r"\s+")
+# Bumped when the key derivation changes, so older keys cannot collide with new ones
+_KEY_VERSION = 2
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_DIGEST_CHUNK), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def normalize_text(text):
+    """Collapse whitespace, so OCR layout noise maps to one key.
+
+    Case is kept: the extracted fields (titles, names, locations) copy it from the text.
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def event_key(text, model, prompt_version, extractor=""):
+    """Cache key of the event extracted from `text` by `model` with a prompt version.
+
+    `extractor` describes how fields were taken from the text without the LLM (the
+    pre-extractor's version and threshold), since those fields replace the LLM's.
+    """
+    data = (
+        f"{_KEY_VERSION}\0{prompt_version}\0{model}\0{extractor}\0"
+        f"{normalize_text(text)}"
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class ResultCache:
+    """SQLite store of extracted texts and events with size-bounded LRU eviction.
+
+    Safe to use from several threads (the pipeline's OCR, event loop and calendar
+    threads share one instance).
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            """)
+        (self._total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+    def _get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                (time.time_ns(), key),
+            )
+            self._db.commit()
+            return row[0]
+
+    def _put(self, key, value):
+        size = len(key) + len(value.encode())
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time_ns()),
+            )
+            self._total += size - (row[0] if row else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Delete least recently used entries until the stored values fit the limit."""
+        stale = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_used"
+        ):
+            stale.append((key,))
+            self._total -= size
+            if self._total <= self.max_bytes:
+                break
+        self._db.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def get_text(self, digest):
+        """Return the text read from the file with this content digest, or None."""
+        return self._get("text:" + digest)
+
+    def put_text(self, digest, text):
+        self._put("text:" + digest, text)
+
+    def get_event(self, key):
+        """Return the event dict stored under an `event_key`, or None."""
+        value = self._get("event:" + key)
+        return json.loads(value) if value is not None else None
+
+    def put_event(self, key, event_data):
+        self._put("event:" + key, json.dumps(event_data))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
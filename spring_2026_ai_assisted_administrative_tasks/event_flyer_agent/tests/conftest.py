@@ -0,0 +1,38 @@
+import functools
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import agent  # noqa: E402
+from fake_calendar_server import start_server  # noqa: E402
+
+
+@pytest.fixture
+def fake_calendar(monkeypatch, tmp_path):
+    """Return a function starting a fake Calendar API (see fake_calendar_server.py)
+    that the agent talks to, with retry backoff disabled; it returns the FakeCalendar.
+    """
+    servers = []
+    # No credentials.json: the calendar id defaults to "primary"
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(agent, "calendar_id", None)
+    monkeypatch.setattr(agent, "calendar_timezone", None)
+    monkeypatch.setattr(agent, "_calendar_local", threading.local())
+    monkeypatch.setattr(
+        agent, "insert_events", functools.partial(agent.insert_events, backoff=0.0)
+    )
+
+    def start(**options):
+        server, calendar, url = start_server(port=0, **options)
+        servers.append(server)
+        monkeypatch.setattr(agent, "calendar_endpoint", url)
+        return calendar
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
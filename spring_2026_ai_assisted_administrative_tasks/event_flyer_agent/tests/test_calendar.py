@@ -0,0 +1,83 @@
+import functools
+import uuid
+
+import agent
+
+
+def flyer_event(i):
+    return {
+        "title": f"Talk {i}",
+        "date": "2026-04-03",
+        "start_time": "3:30 PM",
+        "end_time": "4:30 PM",
+        "timezone": "EDT",
+    }
+
+
+def status(result):
+    return getattr(getattr(result, "resp", None), "status", None)
+
+
+def test_per_item_failures(fake_calendar, monkeypatch):
+    calendar = fake_calendar(fail_rate=0.5, seed=1)
+    monkeypatch.setattr(
+        agent, "insert_events", functools.partial(agent.insert_events, max_retries=0)
+    )
+    events = [flyer_event(i) for i in range(20)]
+    events.insert(5, {"title": "No date", "start_time": "1 PM", "end_time": "2 PM"})
+    results = agent.create_events(events)
+
+    assert isinstance(results[5], ValueError)
+    del results[5]
+    failed = [r for r in results if isinstance(r, Exception)]
+    created = [r for r in results if not isinstance(r, Exception)]
+    assert failed and created
+    assert {status(r) for r in failed} == {503}
+    assert [r["summary"] for r in created] == [
+        e["title"]
+        for e, r in zip(events[:5] + events[6:], results)
+        if not isinstance(r, Exception)
+    ]
+    # One batch request; the invalid event was never sent
+    assert calendar.stats["batches"] == 1
+    assert calendar.stats["batch_items"] == 20
+    assert calendar.stats["injected_failures"] == len(failed)
+    assert calendar.stats["events_created"] == len(created)
+    assert agent.get_calendar_config() == ("primary", "America/New_York")
+
+
+def test_retries(fake_calendar):
+    calendar = fake_calendar(fail_rate=0.5, seed=2)
+    resources = [agent.build_event(flyer_event(i)) for i in range(20)]
+    results = agent.insert_events(resources, max_retries=10)
+    assert [r["summary"] for r in results] == [r["summary"] for r in resources]
+    assert calendar.stats["injected_failures"] > 0
+    assert calendar.stats["events_created"] == 20
+    # Only the failed items are sent again
+    assert calendar.stats["batch_items"] == 20 + calendar.stats["injected_failures"]
+
+    calendar.fail_rate = 1.0
+    results = agent.insert_events(resources[:3], max_retries=2)
+    assert [status(r) for r in results] == [503] * 3
+    assert calendar.stats["injected_failures"] == calendar.stats["batch_items"] - 20
+
+
+def test_duplicate_ids(fake_calendar, capsys):
+    calendar = fake_calendar()
+    events = [flyer_event(i) for i in range(3)]
+    ids = [uuid.uuid4().hex for _ in events]
+    first = agent.create_events(events, ids)
+    assert [r["id"] for r in first] == ids
+
+    # Sent again (e.g. after a crash before the journal recorded it)
+    resource = dict(agent.build_event(events[0]), id=ids[0])
+    (error,) = agent.insert_events([resource], max_retries=3)
+    assert status(error) == 409 and agent.is_duplicate(error)
+    assert calendar.stats["batches"] == 2  # a conflict is not retried
+
+    again = agent.create_events(events, ids)
+    assert [(r["id"], r["summary"]) for r in again] == [
+        (i, e["title"]) for i, e in zip(ids, events)
+    ]
+    assert calendar.stats["events_created"] == 3
+    assert capsys.readouterr().out.count("Event already created") == 3
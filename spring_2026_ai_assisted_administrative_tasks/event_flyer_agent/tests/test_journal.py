@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from journal import Journal
+
+
+def test_resume_after_restart(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path)
+    entry = journal.entry("talk.pdf", "d1")
+    journal.record(entry, "extracted", text="Flyer text")
+    journal.record(entry, "parsed", event={"title": "Talk"})
+    journal.close()
+
+    journal = Journal(path)
+    resumed = journal.entry("talk.pdf", "d1")
+    assert (resumed.id, resumed.stage) == (entry.id, "parsed")
+    assert (resumed.text, resumed.event) == ("Flyer text", {"title": "Talk"})
+    # The same name with other contents is another flyer
+    assert journal.entry("talk.pdf", "d2").id != entry.id
+    with pytest.raises(ValueError):
+        journal.record(resumed, "uploaded")
+    journal.close()
+
+
+def test_compaction(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path)
+    for name in ("done.pdf", "gone.pdf", "open.pdf"):
+        entry = journal.entry(name, "d")
+        journal.record(entry, "extracted", text=name)
+        if name == "done.pdf":
+            journal.record(entry, "created", calendar_event="e1")
+            journal.record(entry, "moved")
+    assert len(journal) == 2
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"file": "open.pdf", "sha')  # torn by a crash
+
+    journal = Journal(path, keep=lambda name: name != "gone.pdf")
+    assert len(journal) == 1
+    journal.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["file"], r["stage"]) for r in records] == [("open.pdf", "extracted")]
+    # A finished flyer dropped again starts a new entry
+    journal = Journal(path)
+    assert journal.entry("done.pdf", "d").stage is None
+    journal.close()
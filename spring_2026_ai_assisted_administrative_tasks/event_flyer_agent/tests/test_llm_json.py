@@ -0,0 +1,35 @@
+import pytest
+
+from llm_json import parse_json_reply, repair_json
+
+
+def test_string_contents_are_kept():
+    reply = '{"description": "Bring snacks, }", "x": 1,}'
+    assert parse_json_reply(reply) == {"description": "Bring snacks, }", "x": 1}
+    reply = "{'note': 'it, ] // not a comment', 'n': None,}"
+    assert parse_json_reply(reply) == {"note": "it, ] // not a comment", "n": None}
+
+
+def test_repairs():
+    reply = """Here is the event:
+```json
+{
+  "title": "Talk",  // from the first line
+  "tags": ["a", "b",],
+  "online": True
+  "link": None, /* none given */
+}
+```"""
+    assert parse_json_reply(reply) == {
+        "title": "Talk",
+        "tags": ["a", "b"],
+        "online": True,
+        "link": None,
+    }
+    assert parse_json_reply("{“title”: “Talk”}") == {"title": "Talk"}
+    assert repair_json('{"a": 1\n"b": 2}') == '{"a": 1\n,"b": 2}'
+
+
+def test_unrepairable():
+    with pytest.raises(ValueError, match="Failed to parse JSON"):
+        parse_json_reply('{"title": ')
@@ -0,0 +1,90 @@
+from datetime import date
+
+from pre_extract import pre_extract
+from timezones import TZ_ABBREVIATIONS
+
+TODAY = date(2026, 3, 1)
+
+
+def guesses(text, min_confidence=0.8):
+    return {
+        field: guess.value
+        for field, guess in pre_extract(text, TZ_ABBREVIATIONS, TODAY).items()
+        if guess.confidence >= min_confidence
+    }
+
+
+def test_labeled_seminar():
+    text = """CS Theory Seminar
+Topic: Fast Algorithms for Sparse Graphs
+Speaker: Prof. Ana Ruiz
+April 10, 2026 | 12:00-1:00 pm ET
+Where: Zoom
+Join: https://zoom.us/j/93812345678?pwd=abc123
+Abstract: Sparse graphs, fast.
+
+All are welcome."""
+    assert guesses(text) == {
+        "title": "Fast Algorithms for Sparse Graphs",
+        "date": "2026-04-10",
+        "start_time": "12:00 PM",
+        "end_time": "1:00 PM",
+        "timezone": "ET",
+        "venue": None,
+        "meeting_link": "https://zoom.us/j/93812345678?pwd=abc123",
+        "description": "Sparse graphs, fast.",
+        "speaker": "Prof. Ana Ruiz",
+    }
+
+
+def test_uncertain_fields_are_left_to_the_llm():
+    text = """MATH CLUB
+Title: Pizza & Puzzles Night
+Thursday, Sept. 24
+6-8 pm
+Location: Hill Hall 120
+Register by Sept. 20!"""
+    resolved = guesses(text)
+    # Two dates (a deadline), and no labeled description
+    assert "date" not in resolved and "description" not in resolved
+    assert resolved["start_time"] == "6:00 PM" and resolved["end_time"] == "8:00 PM"
+    assert resolved["venue"] == "Hill Hall 120"
+    # Without the deadline, the date is placed after today
+    assert guesses(text.replace("Register by Sept. 20!", ""))["date"] == "2026-09-24"
+
+
+def test_state_abbreviation_is_not_a_timezone():
+    text = """Grand Rounds
+Yale School of Medicine, New Haven, CT
+March 5, 2026, 2:00 - 3:00 PM"""
+    guess = pre_extract(text, TZ_ABBREVIATIONS, TODAY)["timezone"]
+    assert guess.confidence <= 0.5
+    assert guesses(text + " (ET)")["timezone"] == "ET"
+    assert guesses(text.replace("3:00 PM", "3:00 PM CT"))["timezone"] == "CT"
+
+
+def test_bundled_flyers_skip_the_llm(monkeypatch):
+    import asyncio
+    import json
+    from pathlib import Path
+
+    import agent
+
+    corpus = Path(agent.__file__).parent / "benchmarks" / "flyer_corpus.jsonl"
+    texts = [json.loads(line)["text"] for line in corpus.read_text().splitlines()]
+    sent = []
+
+    async def llm_extract_events(texts, fields=agent.EVENT_FIELDS):
+        sent.extend(texts)
+        return [({}, agent.LLMUsage(0, 0, 0.0, len(texts)))] * len(texts)
+
+    monkeypatch.setattr(agent, "llm_extract_events", llm_extract_events)
+    monkeypatch.setattr(agent, "pre_extract_confidence", 0.8)
+    results = asyncio.run(agent.extract_events(texts))
+    skipped = [
+        event for (event, usage), text in zip(results, texts) if text not in sent
+    ]
+    # Well-structured flyers need no LLM call, with or without a description
+    assert len(skipped) >= 8
+    descriptions = [event["description"] for event in skipped]
+    assert None in descriptions and any(descriptions)
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from timezones import get_zone, parse_local, resolve_timezone
+
+
+@pytest.mark.parametrize(
+    "name, zone",
+    [
+        ("EDT", "America/New_York"),
+        ("p.s.t.", "America/Los_Angeles"),
+        ("Eastern Daylight Time", "America/New_York"),
+        ("zulu", "UTC"),
+        ("UTC-5", "Etc/GMT+5"),
+        ("GMT+05:30", "Asia/Kolkata"),
+        ("UTC+0", "UTC"),
+        (" Europe/Paris ", "Europe/Paris"),
+        ("+15", "+15"),  # not an offset; get_zone rejects it
+        ("null", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_resolve_timezone(name, zone):
+    assert resolve_timezone(name) == zone
+
+
+def test_get_zone():
+    assert get_zone("America/New_York") is get_zone("America/New_York")
+    with pytest.raises(KeyError):
+        get_zone("+15")
+
+
+@pytest.mark.parametrize(
+    "date, time, expected",
+    [
+        ("2026-04-03", "3:30 PM", datetime(2026, 4, 3, 15, 30)),
+        ("2026-04-03", "12:00 AM", datetime(2026, 4, 3, 0, 0)),
+        ("2026-04-03", "12:15 p.m.", datetime(2026, 4, 3, 12, 15)),
+        ("2026-04-03", "14:00", datetime(2026, 4, 3, 14, 0)),
+        ("April 3, 2026", "2pm", datetime(2026, 4, 3, 14, 0)),
+    ],
+)
+def test_parse_local(date, time, expected):
+    assert parse_local(date, time) == expected
+
+
+def test_parse_local_invalid():
+    with pytest.raises(ValueError):
+        parse_local("2026-02-30", "1:00 PM")
@@ -0,0 +1,167 @@
+"""
+Timezone and date/time resolution for building calendar events.
+
+The LLM (and pre_extract.py) report an event's timezone as it appears on the flyer:
+an abbreviation ("EDT"), a full name ("Pacific Daylight Time"), a UTC offset
+("UTC-5", "GMT+05:30") or an IANA name ("America/New_York"). resolve_timezone maps
+all of these to an IANA name with one dictionary lookup (the table is built once, at
+import), get_zone returns the ZoneInfo for a name (created once per name), and
+parse_local parses the "YYYY-MM-DD" date and "H:MM AM/PM" times the extraction
+prompt asks for without dateutil, which is only used for other formats.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from dateutil import parser as dateparser
+
+# Common abbreviations and their IANA timezones
+TZ_ABBREVIATIONS = {
+    "PT": "America/Los_Angeles",
+    "PST": "America/Los_Angeles",
+    "PDT": "America/Los_Angeles",
+    "MT": "America/Denver",
+    "MST": "America/Denver",
+    "MDT": "America/Denver",
+    "CT": "America/Chicago",
+    "CST": "America/Chicago",
+    "CDT": "America/Chicago",
+    "ET": "America/New_York",
+    "EST": "America/New_York",
+    "EDT": "America/New_York",
+    "AKT": "America/Anchorage",
+    "AKST": "America/Anchorage",
+    "AKDT": "America/Anchorage",
+    "HT": "Pacific/Honolulu",
+    "HST": "Pacific/Honolulu",
+    "GMT": "UTC",
+    "UTC": "UTC",
+}
+
+# Full names: "<region>", "<region> time", "<region> standard/daylight time"
+_REGIONS = {
+    "PACIFIC": "America/Los_Angeles",
+    "MOUNTAIN": "America/Denver",
+    "CENTRAL": "America/Chicago",
+    "EASTERN": "America/New_York",
+    "ALASKA": "America/Anchorage",
+    "HAWAII": "Pacific/Honolulu",
+    "HAWAII-ALEUTIAN": "Pacific/Honolulu",
+}
+_OTHER_NAMES = {
+    "Z": "UTC",
+    "ZULU": "UTC",
+    "UNIVERSAL TIME": "UTC",
+    "COORDINATED UNIVERSAL TIME": "UTC",
+    "GREENWICH MEAN TIME": "UTC",
+}
+
+# Zones without daylight saving time for UTC offsets that are not whole hours (the
+# IANA Etc/GMT zones only cover whole hours)
+_FRACTIONAL_OFFSETS = {
+    (-9, 30): "Pacific/Marquesas",
+    (3, 30): "Asia/Tehran",
+    (4, 30): "Asia/Kabul",
+    (5, 30): "Asia/Kolkata",
+    (5, 45): "Asia/Kathmandu",
+    (6, 30): "Asia/Yangon",
+    (9, 30): "Australia/Darwin",
+}
+
+_OFFSET = re.compile(r"(?:UTC|GMT)?\s*([+-])\s*(\d{1,2})(?::?(\d{2}))?")
+_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_TIME = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([AaPp])\.?\s*[Mm]\.?)?")
+
+
+def _key(name):
+    """Lookup key of a timezone string: upper case, single spaces, no periods."""
+    return " ".join(name.replace(".", "").upper().split())
+
+
+def _compile_lookup():
+    lookup = dict(TZ_ABBREVIATIONS)
+    for region, zone in _REGIONS.items():
+        for suffix in ("", " TIME", " STANDARD TIME", " DAYLIGHT TIME"):
+            lookup[region + suffix] = zone
+    lookup.update(_OTHER_NAMES)
+    return lookup
+
+
+_LOOKUP = _compile_lookup()
+
+
+def _offset_zone(name):
+    """Return the IANA zone for a UTC offset like "UTC-5" or "+05:30", or None."""
+    match = _OFFSET.fullmatch(name)
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    hours, minutes = int(hours), int(minutes or 0)
+    if minutes:
+        return _FRACTIONAL_OFFSETS.get((-hours if sign == "-" else hours, minutes))
+    if hours == 0:
+        return "UTC"
+    if hours > 14:
+        return None
+    # Etc/GMT names have the opposite sign: Etc/GMT+5 is UTC-5
+    return f"Etc/GMT{'+' if sign == '-' else '-'}{hours}"
+
+
+def resolve_timezone(name):
+    """Return the IANA timezone for a timezone string from a flyer.
+
+    Returns None for a missing timezone (None, "", "null", "none"). Strings not
+    recognized are returned stripped, on the assumption that they already are IANA
+    names (get_zone then tells whether they are).
+    """
+    if not name:
+        return None
+    key = _key(name)
+    if key in ("", "NONE", "NULL"):
+        return None
+    zone = _LOOKUP.get(key)
+    if zone is None and key[0] in "+-UG":
+        zone = _offset_zone(key)
+    return zone or name.strip()
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    """Return the ZoneInfo for an IANA name (the same instance for each name).
+
+    Raises zoneinfo.ZoneInfoNotFoundError (a KeyError) for unknown names.
+    """
+    return ZoneInfo(name)
+
+
+def parse_local(date, time):
+    """Parse an event date and time into a naive datetime.
+
+    The "YYYY-MM-DD" and "H:MM AM/PM" (or 24-hour "HH:MM") forms the extraction
+    prompt asks for are parsed directly; anything else (e.g. "2pm", "March 3") is
+    left to dateutil. Raises ValueError if neither can parse it.
+    """
+    date, time = str(date).strip(), str(time).strip()
+    date_match = _DATE.fullmatch(date)
+    time_match = _TIME.fullmatch(time)
+    if date_match and time_match:
+        hour, minute, second, meridiem = time_match.groups()
+        hour = int(hour)
+        if meridiem is None or 1 <= hour <= 12:
+            if meridiem:
+                hour = hour % 12 + (12 if meridiem in "Pp" else 0)
+            try:
+                return datetime(
+                    *map(int, date_match.groups()),
+                    hour,
+                    int(minute),
+                    int(second or 0),
+                )
+            except ValueError:
+                pass  # e.g. "24:00" or "2026-02-30"; let dateutil decide
+    try:
+        return dateparser.parse(f"{date} {time}")
+    except OverflowError as e:
+        raise ValueError(f"Unparseable date/time: {date} {time}") from e
@@ -0,0 +1,364 @@
+"""
+Annotation: Index GFF3 features for fast overlap queries against VCF records.
+
+Features are stored per contig as columns sorted by start, arranged as an implicit
+augmented interval tree (the layout used by cgranges): the array itself is an
+in-order binary tree, and each node keeps the largest end in its subtree. Finding
+the features overlapping a variant costs O(log n + k) for k hits, without building
+node objects. The built index is saved next to the GFF3 (`<gff>.idx`) and reused
+while it is newer than the GFF3; an index that cannot be read is rebuilt.
+"""
+
+import gzip
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+INDEX_MAGIC = b"GFFIDX\x02\x00"
+# Column type codes; the columns are stored little-endian whatever the platform
+_COLUMN_TYPES = ("q", "q", "q", "H")
+# Below this subtree height a linear scan beats descending further
+_SCAN_LEVEL = 3
+
+
+class Feature(NamedTuple):
+    """A GFF3 feature, 0-based and half-open."""
+
+    chrom: str
+    start: int
+    end: int
+    type: str
+    strand: str
+    phase: str
+    attributes: Dict[str, str]
+
+
+def _open_text(path: str):
+    return gzip.open(path, "rt") if path.endswith(".gz") else open(path)
+
+
+def read_gff3(gff_path: str) -> Iterator[Feature]:
+    """
+    Iterate over the features of a GFF3 file (plain or gzipped).
+
+    Comment and directive lines are skipped, as is everything after a `##FASTA`
+    directive.
+
+    Args:
+        gff_path (str): Path to the GFF3 file.
+
+    Yields:
+        Feature: Each feature, with coordinates converted to 0-based, half-open.
+
+    Raises:
+        RuntimeError: If the GFF3 file cannot be opened.
+        ValueError: If a feature line is malformed.
+    """
+    try:
+        with _open_text(gff_path) as gff:
+            for lineno, line in enumerate(gff, 1):
+                if line.startswith("##FASTA"):
+                    return
+                if line.startswith("#") or not line.strip():
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                try:
+                    start, end = int(fields[3]), int(fields[4])
+                    attributes = dict(
+                        item.split("=", 1) for item in fields[8].split(";") if item
+                    )
+                except (IndexError, ValueError):
+                    raise ValueError(
+                        f"Malformed GFF3 line {lineno} in '{gff_path}': "
+                        "expected 9 columns with integer start/end"
+                    )
+                if start < 1 or end < start:
+                    raise ValueError(
+                        f"Invalid coordinates at line {lineno} in '{gff_path}': "
+                        f"{start}-{end}"
+                    )
+                yield Feature(
+                    fields[0],
+                    start - 1,
+                    end,
+                    fields[2],
+                    fields[6],
+                    fields[7],
+                    attributes,
+                )
+    except OSError as e:
+        raise RuntimeError(f"Error opening GFF3 file '{gff_path}': {e}")
+
+
+class IntervalArray:
+    """
+    Interval columns of one contig, sorted by start, with a value per interval and
+    the implicit tree's max ends.
+    """
+
+    def __init__(self, starts: array, ends: array, values: array) -> None:
+        self.starts = starts
+        self.ends = ends
+        self.values = values
+        self.max_ends, self.max_level = self._augment()
+
+    def _augment(self) -> Tuple[array, int]:
+        """Compute each node's subtree max end; return them and the root level."""
+        n = len(self.starts)
+        max_ends = array("q", self.ends)
+        if n == 0:
+            return max_ends, -1
+        last_i = 0
+        last = 0
+        for i in range(0, n, 2):  # leaves (level 0)
+            last_i, last = i, self.ends[i]
+        k = 1
+        while 1 << k <= n:
+            x = 1 << (k - 1)
+            for i in range((x << 1) - 1, n, x << 2):
+                right = max_ends[i + x] if i + x < n else last
+                max_ends[i] = max(self.ends[i], max_ends[i - x], right)
+            last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+            if last_i < n and max_ends[last_i] > last:
+                last = max_ends[last_i]
+            k += 1
+        return max_ends, k - 1
+
+    def overlapping(self, start: int, end: int) -> Iterator[int]:
+        """Yield the indices of intervals overlapping [start, end)."""
+        n = len(self.starts)
+        if n == 0:
+            return
+        starts, ends, max_ends = self.starts, self.ends, self.max_ends
+        stack = [((1 << self.max_level) - 1, self.max_level, False)]
+        while stack:
+            x, k, left_done = stack.pop()
+            if k <= _SCAN_LEVEL:
+                i = x >> k << k
+                stop = min(i + (1 << (k + 1)) - 1, n)
+                while i < stop and starts[i] < end:
+                    if start < ends[i]:
+                        yield i
+                    i += 1
+            elif not left_done:
+                stack.append((x, k, True))
+                y = x - (1 << (k - 1))
+                if y >= n or max_ends[y] > start:
+                    stack.append((y, k - 1, False))
+            elif x < n and starts[x] < end:
+                if start < ends[x]:
+                    yield x
+                stack.append((x + (1 << (k - 1)), k - 1, False))
+
+
+class AnnotationIndex:
+    """
+    Per-contig interval index of GFF3 feature types.
+    """
+
+    def __init__(
+        self, contigs: Dict[str, IntervalArray], type_names: List[str]
+    ) -> None:
+        self._contigs = contigs
+        # Contigs by name and by alias (see `add_aliases`); saved indexes hold no aliases
+        self._lookup = contigs
+        self.type_names = type_names
+
+    @classmethod
+    def from_features(cls, features: Iterator[Feature]) -> "AnnotationIndex":
+        """
+        Build an index from features (in any order).
+
+        Args:
+            features (Iterator[Feature]): Features, e.g. from `read_gff3`.
+
+        Returns:
+            AnnotationIndex: The built index.
+        """
+        type_codes: Dict[str, int] = {}
+        rows: Dict[str, List[Tuple[int, int, int]]] = {}
+        for feature in features:
+            code = type_codes.setdefault(feature.type, len(type_codes))
+            rows.setdefault(feature.chrom, []).append(
+                (feature.start, feature.end, code)
+            )
+        contigs = {}
+        for chrom, intervals in rows.items():
+            intervals.sort()
+            contigs[chrom] = IntervalArray(
+                array("q", (r[0] for r in intervals)),
+                array("q", (r[1] for r in intervals)),
+                array("H", (r[2] for r in intervals)),
+            )
+        return cls(contigs, list(type_codes))
+
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._lookup
+
+    def add_aliases(self, aliases: Dict[str, str]) -> None:
+        """
+        Let contigs also be looked up by other names, e.g. "1" for "chr1" (see
+        `ReferenceBackend.add_aliases`). Aliases of contigs without features, or that
+        clash with existing names, are ignored.
+
+        Args:
+            aliases (Dict[str, str]): Alias -> contig name.
+        """
+        lookup = dict(self._lookup)
+        for alias, name in aliases.items():
+            if name in self._contigs and alias not in lookup:
+                lookup[alias] = self._contigs[name]
+        self._lookup = lookup
+
+    def __len__(self) -> int:
+        return sum(len(c.starts) for c in self._contigs.values())
+
+    def overlapping_types(self, chrom: str, start: int, end: int) -> Set[str]:
+        """
+        Return the feature types overlapping [start, end) on `chrom` (0-based).
+
+        Args:
+            chrom (str): Contig name.
+            start (int): 0-based start.
+            end (int): 0-based exclusive end.
+
+        Returns:
+            Set[str]: Distinct feature types (empty if none overlap).
+        """
+        intervals = self._lookup.get(chrom)
+        if intervals is None:
+            return set()
+        types, names = intervals.values, self.type_names
+        return {
+            names[types[i]] for i in intervals.overlapping(start, max(end, start + 1))
+        }
+
+    def save(self, index_path: str) -> None:
+        """
+        Write the index: magic, a length-prefixed JSON header (type names and contig
+        sizes), then the start/end/max-end (int64) and type (uint16) columns of each
+        contig in header order, little-endian.
+
+        The file is written under a temporary name and renamed into place, so an
+        interrupted write never leaves a truncated index behind.
+        """
+        header = json.dumps(
+            {
+                "types": self.type_names,
+                "contigs": [[c, len(v.starts)] for c, v in self._contigs.items()],
+            }
+        ).encode()
+        tmp_path = index_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(INDEX_MAGIC + struct.pack("<I", len(header)) + header)
+                for intervals in self._contigs.values():
+                    for column in (
+                        intervals.starts,
+                        intervals.ends,
+                        intervals.max_ends,
+                        intervals.values,
+                    ):
+                        if sys.byteorder == "big":
+                            column = array(column.typecode, column)
+                            column.byteswap()
+                        f.write(column.tobytes())
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, index_path: str) -> "AnnotationIndex":
+        """
+        Read an index written by `save`.
+
+        Raises:
+            ValueError: If the file is not an annotation index (of this version) or
+                is truncated or otherwise malformed.
+        """
+        with open(index_path, "rb") as f:
+            data = f.read()
+        if not data.startswith(INDEX_MAGIC):
+            raise ValueError(f"'{index_path}' is not an annotation index")
+        try:
+            pos = len(INDEX_MAGIC)
+            (header_len,) = struct.unpack_from("<I", data, pos)
+            pos += 4
+            header = json.loads(data[pos : pos + header_len])
+            pos += header_len
+            contigs = {}
+            for chrom, n in header["contigs"]:
+                columns = []
+                for typecode in _COLUMN_TYPES:
+                    column = array(typecode)
+                    size = n * column.itemsize
+                    if n < 0 or pos + size > len(data):
+                        raise ValueError("truncated")
+                    column.frombytes(data[pos : pos + size])
+                    if sys.byteorder == "big":
+                        column.byteswap()
+                    columns.append(column)
+                    pos += size
+                intervals = IntervalArray.__new__(IntervalArray)
+                (
+                    intervals.starts,
+                    intervals.ends,
+                    intervals.max_ends,
+                    intervals.values,
+                ) = columns
+                intervals.max_level = (n.bit_length() - 1) if n else -1
+                contigs[str(chrom)] = intervals
+            type_names = [str(name) for name in header["types"]]
+        except (struct.error, ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed annotation index '{index_path}': {e}")
+        if pos != len(data):
+            raise ValueError(f"Malformed annotation index '{index_path}': extra data")
+        return cls(contigs, type_names)
+
+
+def index_path_for(gff_path: str) -> str:
+    """Return the conventional index path for a GFF3 file."""
+    return gff_path + ".idx"
+
+
+def load_or_build_index(gff_path: str) -> AnnotationIndex:
+    """
+    Load the saved index next to a GFF3 file, building (and trying to save) it if
+    missing, older than the GFF3 or unreadable (e.g. written by an older version).
+
+    Args:
+        gff_path (str): Path to the GFF3 file.
+
+    Returns:
+        AnnotationIndex: The index.
+
+    Raises:
+        RuntimeError: If the GFF3 file cannot be opened.
+        ValueError: If the GFF3 file is malformed.
+    """
+    index_path = index_path_for(gff_path)
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(
+        gff_path
+    ):
+        try:
+            return AnnotationIndex.load(index_path)
+        except (OSError, ValueError):
+            pass  # unreadable; rebuild it
+    index = AnnotationIndex.from_features(read_gff3(gff_path))
+    try:
+        index.save(index_path)
+    except OSError:
+        pass  # read-only location; keep the index in memory only
+    return index
+
+
+def feature_summary_key(feature_type: Optional[str]) -> str:
+    """Variant summary key counting records that overlap a feature type."""
+    return f"overlaps_{feature_type}" if feature_type else "intergenic"
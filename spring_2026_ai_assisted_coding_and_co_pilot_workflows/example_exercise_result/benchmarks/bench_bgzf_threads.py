@@ -0,0 +1,92 @@
+"""
+Benchmark: Line throughput of BGZF decompression by thread count.
+
+Writes a synthetic bgzipped VCF, then times reading all of its lines with
+`gzip.open` (the single-threaded baseline) and with `bgzf.iter_lines` at each
+requested thread count. Scaling depends on the number of cores available.
+
+Usage:
+    python benchmarks/bench_bgzf_threads.py --records 1000000 --threads 1 2 4 8
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Iterable
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import bgzf  # noqa: E402
+
+
+def write_synthetic_vcf(path: str, records: int, seed: int = 1) -> int:
+    """Write a bgzipped VCF with `records` records and return its uncompressed size."""
+    rng = random.Random(seed)
+    size = 0
+    with bgzf.BgzfWriter(path) as writer:
+        header = (
+            b"##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+        )
+        writer.write(header)
+        size += len(header)
+        pos = 0
+        for i in range(records):
+            pos += rng.randrange(1, 200)
+            ref = rng.choice("ACGT")
+            alt = rng.choice(["A", "C", "G", "T", "AT", "GCA"])
+            line = (
+                f"chr1\t{pos}\trs{i}\t{ref}\t{alt}\t{rng.randrange(10, 99)}\tPASS\t"
+                f"DP={rng.randrange(1, 500)};AF={rng.random():.3f}\n"
+            ).encode()
+            writer.write(line)
+            size += len(line)
+    return size
+
+
+def time_reader(read: Callable[[], Iterable], repeat: int) -> float:
+    """Return the best wall time of fully consuming `read()` over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in read():
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.vcf.gz")
+        size = write_synthetic_vcf(path, args.records)
+        mb = size / 1e6
+        print(
+            f"{args.records} records, {mb:.1f} MB uncompressed, {os.cpu_count()} CPUs"
+        )
+        print(f"{'reader':<24}{'seconds':>10}{'MB/s':>10}")
+
+        def gzip_lines():
+            with gzip.open(path, "rb") as f:
+                yield from f
+
+        elapsed = time_reader(gzip_lines, args.repeat)
+        print(f"{'gzip.open':<24}{elapsed:>10.3f}{mb / elapsed:>10.1f}")
+        for threads in args.threads:
+            elapsed = time_reader(
+                lambda: bgzf.iter_lines(path, threads=threads), args.repeat
+            )
+            label = f"bgzf threads={threads}"
+            print(f"{label:<24}{elapsed:>10.3f}{mb / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: VCF entry representations and line splitting.
+
+Compares the original parser (full `strip().split("\\t")`, one dict per ALT) with
+`maxsplit` parsing into `VCFRecord` namedtuples and into a `__slots__` class. Reports
+parse throughput and the memory held per retained entry (measured with tracemalloc).
+
+Usage:
+    python benchmarks/bench_record_types.py --records 1000000 --samples 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Iterator, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from vcf_validator import VCFRecord  # noqa: E402
+
+
+class SlottedRecord:
+    __slots__ = ("chrom", "pos", "id", "ref", "alt")
+
+    def __init__(self, chrom: str, pos: int, vid: str, ref: str, alt: str) -> None:
+        self.chrom = chrom
+        self.pos = pos
+        self.id = vid
+        self.ref = ref
+        self.alt = alt
+
+
+def synthetic_lines(records: int, samples: int, seed: int = 1) -> List[str]:
+    """VCF data lines with QUAL/FILTER/INFO/FORMAT and `samples` genotype columns."""
+    rng = random.Random(seed)
+    lines = []
+    pos = 0
+    for i in range(records):
+        pos += rng.randrange(1, 200)
+        alts = ",".join(
+            rng.choice(["A", "C", "GT"]) for _ in range(rng.choice([1, 1, 2]))
+        )
+        genotypes = "\t".join(
+            f"0/1:{rng.randrange(1, 60)}:{rng.randrange(5, 99)}" for _ in range(samples)
+        )
+        lines.append(
+            f"chr{1 + i * 22 // records}\t{pos}\trs{i}\t{rng.choice('ACGT')}\t{alts}\t50"
+            f"\tPASS\tDP={rng.randrange(1, 500)};AF={rng.random():.3f}\tGT:DP:GQ\t{genotypes}\n"
+        )
+    return lines
+
+
+def parse_dicts(lines: List[str]) -> Iterator[dict]:
+    for line in lines:
+        fields = line.strip().split("\t")
+        pos = int(fields[1])
+        for alt in fields[4].split(","):
+            yield {
+                "chrom": fields[0],
+                "pos": pos,
+                "id": fields[2],
+                "ref": fields[3],
+                "alt": alt,
+            }
+
+
+def parse_with(record_type: Callable) -> Callable[[List[str]], Iterator]:
+    def parse(lines: List[str]) -> Iterator:
+        for line in lines:
+            fields = line.split("\t", 5)
+            pos = int(fields[1])
+            chrom, vid, ref = fields[0], fields[2], fields[3]
+            for alt in fields[4].split(","):
+                yield record_type(chrom, pos, vid, ref, alt)
+
+    return parse
+
+
+def parse_records(lines: List[str]) -> Iterator[VCFRecord]:
+    # What VCFValidator._parse_lines does: skip the namedtuple's keyword-handling __new__
+    new = tuple.__new__
+    for line in lines:
+        fields = line.split("\t", 5)
+        pos = int(fields[1])
+        chrom, vid, ref = fields[0], fields[2], fields[3]
+        for alt in fields[4].split(","):
+            yield new(VCFRecord, (chrom, pos, vid, ref, alt))
+
+
+PARSERS = {
+    "dict + full split": parse_dicts,
+    "namedtuple() + maxsplit": parse_with(VCFRecord),
+    "tuple.__new__ + maxsplit": parse_records,
+    "__slots__ + maxsplit": parse_with(SlottedRecord),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.records, args.samples)
+    print(f"{args.records} lines, {args.samples} sample columns")
+    print(f"{'representation':<26}{'records/s':>12}{'bytes/entry':>14}")
+    for name, parse in PARSERS.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count = sum(1 for _ in parse(lines))
+            best = min(best, time.perf_counter() - start)
+        rate = count / best
+
+        tracemalloc.start()
+        retained = list(parse(lines))
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:<26}{rate:>12,.0f}{held / len(retained):>14.0f}")
+        del retained
+
+
+if __name__ == "__main__":
+    main()
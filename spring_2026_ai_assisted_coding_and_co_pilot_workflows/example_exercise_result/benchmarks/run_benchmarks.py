@@ -0,0 +1,191 @@
+"""
+Benchmark harness: Compare the VCF validator implementations on synthetic data.
+
+Generates a reference and VCF with `synthetic.py`, then runs each implementation as
+a subprocess and reports records/sec, peak RSS and startup time (the wall time on a
+header-only VCF) as a table, optionally also writing JSON for regression tracking.
+
+Usage:
+    python benchmarks/run_benchmarks.py --records 200000 --repeat 3 --json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from synthetic import (  # noqa: E402
+    SyntheticParams,
+    add_param_arguments,
+    generate,
+    params_from_args,
+)
+
+ROOT = os.path.dirname(HERE)
+IMPLEMENTATIONS: Dict[str, List[str]] = {
+    # Repeated runs must not be served from the validation cache
+    "vcf_validator": [os.path.join(ROOT, "vcf_validator.py"), "--no-cache"],
+    "vcf_validator-numpy": [
+        os.path.join(ROOT, "vcf_validator.py"),
+        "--engine",
+        "numpy",
+        "--no-cache",
+    ],
+    "prompt3": [os.path.join(ROOT, "prompt3_validate_vcf.py")],
+    "prompt2": [os.path.join(ROOT, "prompt2_validate_vcf.py")],
+}
+
+
+class RunResult(NamedTuple):
+    seconds: float
+    peak_rss_mb: float
+    returncode: int
+
+
+class BenchmarkResult(NamedTuple):
+    implementation: str
+    records_per_sec: float
+    seconds: float
+    startup_seconds: float
+    peak_rss_mb: float
+
+
+def run_once(command: List[str]) -> RunResult:
+    """Run a command with output discarded, measuring wall time and peak RSS."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    seconds = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / (1024 * 1024)
+    return RunResult(seconds, usage.ru_maxrss * scale, proc.returncode)
+
+
+def best_of(command: List[str], repeat: int) -> RunResult:
+    """Run `repeat` times; return the fastest run and the largest peak RSS."""
+    runs = [run_once(command) for _ in range(repeat)]
+    failed = [r for r in runs if r.returncode != 0]
+    if failed:
+        raise RuntimeError(f"{command} exited with status {failed[0].returncode}")
+    fastest = min(runs, key=lambda r: r.seconds)
+    return fastest._replace(peak_rss_mb=max(r.peak_rss_mb for r in runs))
+
+
+def write_header_only(vcf_path: str, out_path: str) -> None:
+    """Copy just the header of a VCF, for measuring startup time."""
+    with open(vcf_path) as src, open(out_path, "w") as dst:
+        for line in src:
+            if not line.startswith("#"):
+                break
+            dst.write(line)
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_benchmarks(
+    data_dir: str, params: SyntheticParams, names: List[str], repeat: int
+) -> Tuple[List[BenchmarkResult], Dict]:
+    """
+    Generate data in `data_dir` and benchmark each named implementation.
+
+    Returns:
+        Tuple[List[BenchmarkResult], Dict]: Results and the generated data's stats.
+    """
+    stats = generate(data_dir, params)
+    fasta = os.path.join(data_dir, "reference.fasta")
+    vcf = os.path.join(data_dir, "variants.vcf")
+    empty_vcf = os.path.join(data_dir, "header_only.vcf")
+    write_header_only(vcf, empty_vcf)
+    results = []
+    for name in names:
+        script = IMPLEMENTATIONS[name]
+        startup = best_of(
+            [sys.executable, script[0], empty_vcf, fasta] + script[1:], repeat
+        )
+        full = best_of([sys.executable, script[0], vcf, fasta] + script[1:], repeat)
+        results.append(
+            BenchmarkResult(
+                name,
+                params.records / full.seconds,
+                full.seconds,
+                startup.seconds,
+                full.peak_rss_mb,
+            )
+        )
+    return results, stats._asdict()
+
+
+def format_table(results: List[BenchmarkResult]) -> str:
+    lines = [
+        f"{'implementation':<22}{'records/s':>12}{'seconds':>10}"
+        f"{'startup s':>11}{'peak RSS MB':>13}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.implementation:<22}{r.records_per_sec:>12,.0f}{r.seconds:>10.2f}"
+            f"{r.startup_seconds:>11.3f}{r.peak_rss_mb:>13.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    add_param_arguments(parser)
+    parser.add_argument(
+        "--implementations",
+        nargs="+",
+        choices=list(IMPLEMENTATIONS),
+        default=list(IMPLEMENTATIONS),
+        help="Implementations to run (default: all; numpy is skipped if missing)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--data-dir", help="Keep generated data here (default: temp)")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    params = params_from_args(args)
+    names = [
+        n
+        for n in args.implementations
+        if n != "vcf_validator-numpy" or numpy_available()
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        results, stats = run_benchmarks(
+            args.data_dir or tmp, params, names, args.repeat
+        )
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "params": params._asdict(),
+                    "data": stats,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "results": [r._asdict() for r in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Synthetic data: Reproducible reference FASTAs and matching VCFs for benchmarks.
+
+The same parameters and seed always produce byte-identical files. Records are sorted
+by contig and position, so the VCFs can also be bgzipped and tabix-indexed.
+
+Usage:
+    python benchmarks/synthetic.py out/ --records 1000000 --contigs 5 --mismatch-rate 0.01
+"""
+
+import argparse
+import os
+import random
+from typing import Dict, NamedTuple
+
+BASES = "ACGT"
+
+
+class SyntheticParams(NamedTuple):
+    """Knobs for `generate`."""
+
+    records: int = 100_000
+    contigs: int = 3
+    contig_length: int = 1_000_000
+    indel_rate: float = 0.15
+    multiallelic_rate: float = 0.05
+    mismatch_rate: float = 0.01
+    samples: int = 0
+    seed: int = 1
+
+
+class SyntheticStats(NamedTuple):
+    """What `generate` wrote, for checking validator output."""
+
+    records: int
+    alt_alleles: int
+    mismatched_records: int
+    mismatched_alleles: int
+
+
+def write_reference(path: str, params: SyntheticParams) -> Dict[str, str]:
+    """Write a random reference FASTA (60 bases per line) and return its sequences."""
+    rng = random.Random(params.seed)
+    sequences = {
+        f"chr{i + 1}": "".join(rng.choices(BASES, k=params.contig_length))
+        for i in range(params.contigs)
+    }
+    with open(path, "w") as f:
+        for name, seq in sequences.items():
+            f.write(f">{name} synthetic\n")
+            for i in range(0, len(seq), 60):
+                f.write(seq[i : i + 60] + "\n")
+    return sequences
+
+
+def _alt_for(rng: random.Random, ref: str, indel: bool) -> str:
+    if indel:
+        # Deletion (REF longer) or insertion (anchor base plus inserted bases)
+        if len(ref) > 1:
+            return ref[0]
+        return ref + "".join(rng.choices(BASES, k=rng.randint(1, 5)))
+    return rng.choice([b for b in BASES if b != ref[0]])
+
+
+def write_vcf(
+    path: str, sequences: Dict[str, str], params: SyntheticParams
+) -> SyntheticStats:
+    """
+    Write a sorted VCF of random SNVs and indels against `sequences`.
+
+    A `mismatch_rate` fraction of records get a REF whose first base differs from the
+    reference. With `samples` > 0, FORMAT and genotype columns are added.
+    """
+    rng = random.Random(params.seed + 1)
+    names = list(sequences)
+    alt_alleles = mismatched_records = mismatched_alleles = 0
+    header = "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO"
+    sample_names = [f"S{i + 1}" for i in range(params.samples)]
+    if sample_names:
+        header += "\tFORMAT\t" + "\t".join(sample_names)
+    with open(path, "w") as f:
+        f.write("##fileformat=VCFv4.2\n")
+        for name, seq in sequences.items():
+            f.write(f"##contig=<ID={name},length={len(seq)}>\n")
+        f.write(header + "\n")
+        for c, name in enumerate(names):
+            seq = sequences[name]
+            # Spread records evenly over contigs, summing exactly to params.records
+            first, last = (params.records * i // len(names) for i in (c, c + 1))
+            count = last - first
+            positions = sorted(rng.randrange(1, len(seq) - 10) for _ in range(count))
+            for pos in positions:
+                indel = rng.random() < params.indel_rate
+                ref_len = rng.randint(2, 6) if indel and rng.random() < 0.5 else 1
+                ref = seq[pos - 1 : pos - 1 + ref_len]
+                n_alts = 2 if rng.random() < params.multiallelic_rate else 1
+                alts = [_alt_for(rng, ref, indel) for _ in range(n_alts)]
+                if rng.random() < params.mismatch_rate:
+                    ref = rng.choice([b for b in BASES if b != ref[0]]) + ref[1:]
+                    mismatched_records += 1
+                    mismatched_alleles += n_alts
+                alt_alleles += n_alts
+                line = f"{name}\t{pos}\t.\t{ref}\t{','.join(alts)}\t50\tPASS\tDP={rng.randint(5, 200)}"
+                if sample_names:
+                    line += "\tGT:DP\t" + "\t".join(
+                        f"{rng.choice(['0/0', '0/1', '1/1'])}:{rng.randint(5, 60)}"
+                        for _ in sample_names
+                    )
+                f.write(line + "\n")
+    return SyntheticStats(
+        params.records, alt_alleles, mismatched_records, mismatched_alleles
+    )
+
+
+def generate(out_dir: str, params: SyntheticParams) -> SyntheticStats:
+    """
+    Write `reference.fasta` and `variants.vcf` into `out_dir`.
+
+    Returns:
+        SyntheticStats: Counts of records, ALT alleles and planted mismatches.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    sequences = write_reference(os.path.join(out_dir, "reference.fasta"), params)
+    return write_vcf(os.path.join(out_dir, "variants.vcf"), sequences, params)
+
+
+def add_param_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add one command-line option per `SyntheticParams` field."""
+    defaults = SyntheticParams()
+    for field in SyntheticParams._fields:
+        default = getattr(defaults, field)
+        parser.add_argument(
+            "--" + field.replace("_", "-"),
+            type=type(default),
+            default=default,
+            help=f"(default: {default})",
+        )
+
+
+def params_from_args(args: argparse.Namespace) -> SyntheticParams:
+    return SyntheticParams(*(getattr(args, field) for field in SyntheticParams._fields))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "out_dir", help="Directory for reference.fasta and variants.vcf"
+    )
+    add_param_arguments(parser)
+    args = parser.parse_args()
+    stats = generate(args.out_dir, params_from_args(args))
+    print(
+        f"{stats.records} records, {stats.alt_alleles} ALT alleles, "
+        f"{stats.mismatched_records} REF mismatches written to {args.out_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""
+BGZF: Minimal reader/writer for blocked GNU zip (bgzip) files.
+
+BGZF files are a series of independent gzip members ("blocks") of at most 64 KiB
+of uncompressed data. Because every block can be inflated on its own, a reader can
+seek straight to any uncompressed offset given a `.gzi` index (pairs of compressed
+and uncompressed block offsets), which is what samtools uses for bgzipped FASTA.
+"""
+
+import bisect
+import collections
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+# gzip magic, CM=deflate, FLG=FEXTRA
+_BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+_HEADER_SIZE = 12
+_MAX_BLOCK_DATA = 0xFF00
+# Empty block samtools/htslib append to mark the end of a BGZF file
+BGZF_EOF = bytes.fromhex(
+    "1f8b08040000000000ff0600424302001b0003000000000000000000"
+)
+
+
+class BgzfBlock(NamedTuple):
+    """Location of a single BGZF block within the compressed file."""
+
+    coffset: int
+    csize: int
+    uoffset: int
+    usize: int
+
+
+def is_bgzf(path: str) -> bool:
+    """
+    Check whether a file starts with a BGZF block header.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        bool: True if the file looks like BGZF.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(18)
+    except OSError:
+        return False
+    return (
+        len(header) == 18
+        and header[:4] == _BGZF_MAGIC
+        and header[12:14] == b"BC"
+        and struct.unpack("<H", header[14:16])[0] == 2
+    )
+
+
+def _read_block_header(fh: BinaryIO, coffset: int) -> Optional[int]:
+    """
+    Read the header of the block at `coffset` and return its total compressed size.
+
+    Returns None at end of file.
+
+    Raises:
+        ValueError: If the bytes at `coffset` are not a BGZF block.
+    """
+    fh.seek(coffset)
+    header = fh.read(_HEADER_SIZE)
+    if not header:
+        return None
+    if len(header) < _HEADER_SIZE or header[:4] != _BGZF_MAGIC:
+        raise ValueError(f"Invalid BGZF block header at offset {coffset}")
+    xlen = struct.unpack("<H", header[10:12])[0]
+    extra = fh.read(xlen)
+    # Walk the extra subfields looking for the 'BC' (block size) subfield
+    i = 0
+    while i + 4 <= len(extra):
+        slen = struct.unpack("<H", extra[i + 2 : i + 4])[0]
+        if extra[i : i + 2] == b"BC" and slen == 2:
+            return struct.unpack("<H", extra[i + 4 : i + 6])[0] + 1
+        i += 4 + slen
+    raise ValueError(f"BGZF block at offset {coffset} has no BC subfield")
+
+
+def read_raw_block(fh: BinaryIO, coffset: int) -> Optional[bytes]:
+    """
+    Read the compressed bytes of the block starting at `coffset`.
+
+    Args:
+        fh (BinaryIO): Open binary file handle.
+        coffset (int): Compressed offset of the block.
+
+    Returns:
+        Optional[bytes]: The whole block (header included), or None at end of file.
+    """
+    bsize = _read_block_header(fh, coffset)
+    if bsize is None:
+        return None
+    fh.seek(coffset)
+    raw = fh.read(bsize)
+    if len(raw) != bsize:
+        raise ValueError(f"Truncated BGZF block at offset {coffset}")
+    return raw
+
+
+def inflate_block(raw: bytes) -> bytes:
+    """
+    Decompress a complete BGZF block.
+
+    Args:
+        raw (bytes): Block bytes as returned by `read_raw_block`.
+
+    Returns:
+        bytes: The uncompressed block contents.
+    """
+    xlen = struct.unpack("<H", raw[10:12])[0]
+    cdata = raw[_HEADER_SIZE + xlen : -8]
+    data = zlib.decompress(cdata, -15)
+    crc, isize = struct.unpack("<II", raw[-8:])
+    if isize != len(data) or crc != zlib.crc32(data):
+        raise ValueError("BGZF block failed CRC/size check")
+    return data
+
+
+def iter_blocks(path: str) -> Iterator[BgzfBlock]:
+    """
+    Iterate over all blocks of a BGZF file.
+
+    Args:
+        path (str): Path to the BGZF file.
+
+    Yields:
+        BgzfBlock: Compressed and uncompressed offsets/sizes for each block.
+    """
+    with open(path, "rb") as fh:
+        coffset = 0
+        uoffset = 0
+        while True:
+            raw = read_raw_block(fh, coffset)
+            if raw is None:
+                return
+            usize = struct.unpack("<I", raw[-4:])[0]
+            yield BgzfBlock(coffset, len(raw), uoffset, usize)
+            coffset += len(raw)
+            uoffset += usize
+
+
+def iter_block_offsets(path: str) -> Iterator[int]:
+    """
+    Iterate over the compressed offsets of all blocks, reading only block headers.
+
+    Args:
+        path (str): Path to the BGZF file.
+
+    Yields:
+        int: Compressed offset of each block.
+    """
+    with open(path, "rb") as fh:
+        coffset = 0
+        while True:
+            bsize = _read_block_header(fh, coffset)
+            if bsize is None:
+                return
+            yield coffset
+            coffset += bsize
+
+
+def read_block_usize(fh: BinaryIO, coffset: int) -> int:
+    """
+    Return the uncompressed size of the block at `coffset`, from its footer.
+
+    Args:
+        fh (BinaryIO): Open binary file handle.
+        coffset (int): Compressed offset of the block.
+    """
+    bsize = _read_block_header(fh, coffset)
+    if bsize is None:
+        raise ValueError(f"No BGZF block at offset {coffset}")
+    fh.seek(coffset + bsize - 4)
+    return struct.unpack("<I", fh.read(4))[0]
+
+
+def iter_inflated_blocks(
+    path: str, start_coffset: int = 0, threads: int = 1
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterate over the inflated contents of consecutive blocks, in file order.
+
+    With more than one thread, blocks are read ahead and inflated in a thread pool
+    (zlib releases the GIL), keeping a few blocks per thread in flight.
+
+    Args:
+        path (str): Path to the BGZF file.
+        start_coffset (int): Compressed offset of the first block to read.
+        threads (int): Number of decompression threads.
+
+    Yields:
+        Tuple[int, bytes]: Each block's compressed offset and uncompressed contents.
+    """
+    with open(path, "rb") as fh:
+        coffset = start_coffset
+        if threads <= 1:
+            while True:
+                raw = read_raw_block(fh, coffset)
+                if raw is None:
+                    return
+                yield coffset, inflate_block(raw)
+                coffset += len(raw)
+        readahead = threads * 4
+        in_flight: collections.deque = collections.deque()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            try:
+                while True:
+                    while len(in_flight) < readahead:
+                        raw = read_raw_block(fh, coffset)
+                        if raw is None:
+                            break
+                        in_flight.append((coffset, pool.submit(inflate_block, raw)))
+                        coffset += len(raw)
+                    if not in_flight:
+                        return
+                    block_coffset, future = in_flight.popleft()
+                    yield block_coffset, future.result()
+            finally:
+                for _, future in in_flight:
+                    future.cancel()
+
+
+def iter_lines(
+    path: str,
+    start_coffset: int = 0,
+    stop_coffset: Optional[int] = None,
+    threads: int = 1,
+) -> Iterator[bytes]:
+    """
+    Iterate over the lines that start within a range of BGZF blocks.
+
+    A line belongs to the block holding its first byte, so a line that starts before
+    `stop_coffset` is completed from the following blocks. The caller is responsible
+    for knowing whether a line actually starts at `start_coffset`.
+
+    Args:
+        path (str): Path to the BGZF file.
+        start_coffset (int): Compressed offset of the first block to read.
+        stop_coffset (Optional[int]): Compressed offset of the first block whose lines
+            are excluded, or None to read to the end of the file.
+        threads (int): Number of decompression threads (see `iter_inflated_blocks`).
+
+    Yields:
+        bytes: Each line, including its newline terminator.
+    """
+    pending = b""
+    for coffset, data in iter_inflated_blocks(path, start_coffset, threads):
+        if stop_coffset is not None and coffset >= stop_coffset:
+            # Past the range: only finish a line that started inside it
+            if not pending:
+                return
+            newline = data.find(b"\n")
+            if newline >= 0:
+                yield pending + data[: newline + 1]
+                return
+            pending += data
+        else:
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line + b"\n"
+    if pending:
+        yield pending
+
+
+def iter_voffset_lines(
+    path: str, start_voffset: int = 0, stop_voffset: Optional[int] = None
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterate over lines from a virtual offset, with the virtual offset each line starts at.
+
+    Args:
+        path (str): Path to the BGZF file.
+        start_voffset (int): Virtual offset of the first line to read.
+        stop_voffset (Optional[int]): Stop before the first line starting at or after
+            this virtual offset (None reads to the end of the file).
+
+    Yields:
+        Tuple[int, bytes]: The line's virtual offset and the line, including its newline.
+    """
+    coffset, within = split_virtual_offset(start_voffset)
+    pending = b""
+    pending_voffset = 0
+    with open(path, "rb") as fh:
+        while True:
+            raw = read_raw_block(fh, coffset)
+            if raw is None:
+                break
+            data = inflate_block(raw)
+            lines = data[within:].split(b"\n")
+            tail = lines.pop()
+            offset = within
+            for line in lines:
+                if pending:
+                    voffset, line = pending_voffset, pending + line
+                    pending = b""
+                else:
+                    voffset = make_virtual_offset(coffset, offset)
+                if stop_voffset is not None and voffset >= stop_voffset:
+                    return
+                yield voffset, line + b"\n"
+                offset = data.index(b"\n", offset) + 1
+            if tail:
+                if not pending:
+                    pending_voffset = make_virtual_offset(
+                        coffset, len(data) - len(tail)
+                    )
+                    if stop_voffset is not None and pending_voffset >= stop_voffset:
+                        return
+                pending += tail
+            coffset += len(raw)
+            within = 0
+    if pending:
+        yield pending_voffset, pending
+
+
+def build_gzi(path: str) -> List[Tuple[int, int]]:
+    """
+    Build the `.gzi` block index of a BGZF file.
+
+    Args:
+        path (str): Path to the BGZF file.
+
+    Returns:
+        List[Tuple[int, int]]: (compressed offset, uncompressed offset) pairs for every
+        block start, excluding the implicit first block at (0, 0).
+    """
+    return [(b.coffset, b.uoffset) for b in iter_blocks(path) if b.coffset > 0]
+
+
+def read_gzi(gzi_path: str) -> List[Tuple[int, int]]:
+    """
+    Read a samtools-compatible `.gzi` index.
+
+    Raises:
+        ValueError: If the index is truncated.
+    """
+    with open(gzi_path, "rb") as f:
+        data = f.read()
+    if len(data) < 8:
+        raise ValueError(f"Truncated GZI index '{gzi_path}'")
+    (count,) = struct.unpack("<Q", data[:8])
+    if len(data) < 8 + 16 * count:
+        raise ValueError(f"Truncated GZI index '{gzi_path}'")
+    values = struct.unpack(f"<{2 * count}Q", data[8 : 8 + 16 * count])
+    return list(zip(values[0::2], values[1::2]))
+
+
+def write_gzi(gzi_path: str, entries: List[Tuple[int, int]]) -> None:
+    """Write a samtools-compatible `.gzi` index."""
+    with open(gzi_path, "wb") as f:
+        f.write(struct.pack("<Q", len(entries)))
+        for coffset, uoffset in entries:
+            f.write(struct.pack("<QQ", coffset, uoffset))
+
+
+class BgzfReader:
+    """
+    Random-access reader over the uncompressed contents of a BGZF file.
+
+    Seeks use the `.gzi` block index, so only the blocks overlapping a requested
+    range are inflated. The most recently inflated block is kept to serve
+    neighbouring reads.
+    """
+
+    def __init__(self, path: str, gzi: List[Tuple[int, int]]) -> None:
+        """
+        Args:
+            path (str): Path to the BGZF file.
+            gzi (List[Tuple[int, int]]): Block index as returned by `read_gzi`.
+        """
+        self._fh = open(path, "rb")
+        entries = [(0, 0)] + list(gzi)
+        self._coffsets = [c for c, _ in entries]
+        self._uoffsets = [u for _, u in entries]
+        self._cached_index: Optional[int] = None
+        self._cached_data = b""
+
+    def _block(self, index: int) -> bytes:
+        if index != self._cached_index:
+            raw = read_raw_block(self._fh, self._coffsets[index])
+            self._cached_data = inflate_block(raw) if raw else b""
+            self._cached_index = index
+        return self._cached_data
+
+    def read_at(self, uoffset: int, length: int) -> bytes:
+        """
+        Read `length` uncompressed bytes starting at uncompressed offset `uoffset`.
+
+        Returns fewer bytes only if the end of the file is reached.
+        """
+        index = bisect.bisect_right(self._uoffsets, uoffset) - 1
+        chunks = []
+        remaining = length
+        pos = uoffset - self._uoffsets[index]
+        while remaining > 0 and index < len(self._coffsets):
+            data = self._block(index)
+            piece = data[pos : pos + remaining]
+            chunks.append(piece)
+            remaining -= len(piece)
+            index += 1
+            pos = 0
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._fh.close()
+
+
+class BgzfWriter:
+    """
+    Write data as BGZF blocks (compatible with `bgzip`/htslib readers).
+    """
+
+    def __init__(self, path: str, compresslevel: int = 6) -> None:
+        self._fh = open(path, "wb")
+        self._level = compresslevel
+        self._buffer = bytearray()
+
+    def __enter__(self) -> "BgzfWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def tell(self) -> int:
+        """Return the current virtual offset (see `make_virtual_offset`)."""
+        return make_virtual_offset(self._fh.tell(), len(self._buffer))
+
+    def write(self, data: bytes) -> None:
+        """Buffer `data`, emitting full blocks as they fill up."""
+        self._buffer.extend(data)
+        while len(self._buffer) >= _MAX_BLOCK_DATA:
+            self._write_block(bytes(self._buffer[:_MAX_BLOCK_DATA]))
+            del self._buffer[:_MAX_BLOCK_DATA]
+
+    def flush(self) -> None:
+        """Emit any buffered data as a (possibly short) block."""
+        if self._buffer:
+            self._write_block(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _write_block(self, data: bytes) -> None:
+        compressor = zlib.compressobj(self._level, zlib.DEFLATED, -15)
+        cdata = compressor.compress(data) + compressor.flush()
+        bsize = _HEADER_SIZE + 6 + len(cdata) + 8
+        header = _BGZF_MAGIC + b"\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+        self._fh.write(header + struct.pack("<H", bsize - 1))
+        self._fh.write(cdata)
+        self._fh.write(struct.pack("<II", zlib.crc32(data), len(data)))
+
+    def close(self) -> None:
+        """Flush remaining data, write the EOF marker block and close the file."""
+        if self._fh.closed:
+            return
+        self.flush()
+        self._fh.write(BGZF_EOF)
+        self._fh.close()
+
+
+def make_virtual_offset(coffset: int, within_block: int) -> int:
+    """Combine a block's compressed offset and an in-block offset into a virtual offset."""
+    return (coffset << 16) | within_block
+
+
+def split_virtual_offset(voffset: int) -> Tuple[int, int]:
+    """Split a virtual offset into (compressed block offset, in-block offset)."""
+    return voffset >> 16, voffset & 0xFFFF
+
+
+def gzi_path_for(path: str) -> str:
+    """Return the conventional `.gzi` path for a BGZF file."""
+    return path + ".gzi"
+
+
+def load_or_build_gzi(path: str) -> List[Tuple[int, int]]:
+    """
+    Load the `.gzi` index next to `path`, building (and trying to save) it if missing.
+
+    Args:
+        path (str): Path to the BGZF file.
+
+    Returns:
+        List[Tuple[int, int]]: The block index.
+    """
+    gzi_path = gzi_path_for(path)
+    if os.path.exists(gzi_path) and os.path.getmtime(gzi_path) >= os.path.getmtime(
+        path
+    ):
+        return read_gzi(gzi_path)
+    entries = build_gzi(path)
+    try:
+        write_gzi(gzi_path, entries)
+    except OSError:
+        pass  # read-only location; the in-memory index is still usable
+    return entries
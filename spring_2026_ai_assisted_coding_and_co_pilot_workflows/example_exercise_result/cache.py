@@ -0,0 +1,265 @@
+"""
+Cache: Persistent results of earlier validation runs, reused for unchanged VCF blocks.
+
+The VCF is cut into content-defined blocks: a block ends after a line whose CRC-32
+has its low bits clear (or once it reaches a maximum length), so inserting or
+deleting records only changes the blocks around the edit and the rest keep their
+hashes. Each block's variant summary counters and mismatches are stored in an
+SQLite database under a key combining the block's hash with the digests of the
+reference and of any annotation inputs, and the contig aliases in use. Least recently
+used blocks are evicted once the database exceeds its size limit.
+
+Each stored block is committed right away, and the database uses write-ahead logging,
+so validators running at the same time can share one cache. A database error (such as
+a lock held longer than the busy timeout) disables the cache for the rest of the run
+instead of failing validation.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Bump when validation results for the same inputs could change
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 256 << 20
+# Blocks average this many lines; none is longer than four times as many
+DEFAULT_BLOCK_LINES = 4096
+_DIGEST_CHUNK = 1 << 20
+# Seconds to wait for another process's write to finish
+BUSY_TIMEOUT = 10.0
+
+
+class CachedBlock(NamedTuple):
+    """Validation results of one VCF block."""
+
+    summary: Dict[str, int]
+    mismatches: List[Tuple[Any, ...]]
+
+
+def default_cache_path() -> str:
+    """Return the default cache database path (under `$XDG_CACHE_HOME` or ~/.cache)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "vcf_validator", "cache.sqlite")
+
+
+def iter_blocks(
+    lines: Iterable[str], average_lines: int = DEFAULT_BLOCK_LINES
+) -> Iterator[Tuple[bytes, List[str]]]:
+    """
+    Cut lines into content-defined blocks.
+
+    Args:
+        lines (Iterable[str]): VCF lines.
+        average_lines (int): Expected block length in lines (a power of two).
+
+    Yields:
+        Tuple[bytes, List[str]]: Each block's BLAKE2b digest and its lines.
+    """
+    mask = average_lines - 1
+    max_lines = average_lines * 4
+    crc32 = zlib.crc32
+    block: List[str] = []
+    hasher = hashlib.blake2b(digest_size=20)
+    for line in lines:
+        data = line.encode()
+        hasher.update(data)
+        block.append(line)
+        if crc32(data) & mask == 0 or len(block) >= max_lines:
+            yield hasher.digest(), block
+            block = []
+            hasher = hashlib.blake2b(digest_size=20)
+    if block:
+        yield hasher.digest(), block
+
+
+class ValidationCache:
+    """
+    SQLite store of `CachedBlock`s with size-bounded LRU eviction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        block_lines: int = DEFAULT_BLOCK_LINES,
+    ) -> None:
+        """
+        Args:
+            path (str): Database path; the file and its directory are created if
+                missing.
+            max_bytes (int): Stored block data kept after `close`, in bytes.
+            block_lines (int): Average VCF block length for `iter_blocks`. Blocks
+                cut with a different length never match.
+
+        Raises:
+            RuntimeError: If the database cannot be opened.
+        """
+        self._path = path
+        self._max_bytes = max_bytes
+        self.block_lines = block_lines
+        # Blocks used by this run share one timestamp, newer than any earlier run's
+        self._now = time.time_ns()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS blocks (
+                    key BLOB PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS blocks_last_used ON blocks (last_used);
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    digest TEXT NOT NULL
+                );
+                """)
+        except (OSError, sqlite3.Error) as e:
+            raise RuntimeError(f"Error opening validation cache '{path}': {e}")
+        self._hits: List[bytes] = []
+        # Why the cache stopped being used during this run, if it did
+        self.error: Optional[str] = None
+
+    def __enter__(self) -> "ValidationCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _disable(self, error: sqlite3.Error) -> None:
+        """Stop using the database for the rest of the run (lookups then miss)."""
+        self.error = str(error)
+        try:
+            self._db.rollback()
+            self._db.close()
+        except sqlite3.Error:
+            pass
+        self._db = None
+
+    def file_digest(self, path: str) -> str:
+        """
+        Return the SHA-256 of a file, reusing the stored digest while the file's size
+        and modification time are unchanged.
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        if self._db is not None:
+            try:
+                row = self._db.execute(
+                    "SELECT digest FROM files "
+                    "WHERE path = ? AND size = ? AND mtime_ns = ?",
+                    (path, stat.st_size, stat.st_mtime_ns),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+            else:
+                if row is not None:
+                    return row[0]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_DIGEST_CHUNK), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        if self._db is not None:
+            try:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                        (path, stat.st_size, stat.st_mtime_ns, digest),
+                    )
+            except sqlite3.Error as e:
+                self._disable(e)
+        return digest
+
+    def context_key(
+        self, *paths: Optional[str], aliases: Optional[Dict[str, str]] = None
+    ) -> bytes:
+        """
+        Digest of everything besides the VCF block that determines its results.
+
+        Args:
+            *paths (Optional[str]): Input files (reference, annotation, ...); None for
+                inputs that are not used.
+            aliases (Optional[Dict[str, str]]): VCF contig name -> reference contig
+                name aliases in use (records on an aliased contig validate only with
+                the alias).
+        """
+        parts = [str(CACHE_VERSION)]
+        parts.extend(self.file_digest(p) if p is not None else "-" for p in paths)
+        parts.append(json.dumps(sorted((aliases or {}).items())))
+        return hashlib.blake2b("\t".join(parts).encode(), digest_size=20).digest()
+
+    def get(self, key: bytes) -> Optional[CachedBlock]:
+        """Return the cached results for a block key, or None."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT data FROM blocks WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+        if row is None:
+            return None
+        self._hits.append(key)
+        summary, mismatches = json.loads(zlib.decompress(row[0]))
+        return CachedBlock(summary, [tuple(m) for m in mismatches])
+
+    def put(self, key: bytes, block: CachedBlock) -> None:
+        """Store (and commit) the results of a block."""
+        if self._db is None:
+            return
+        data = zlib.compress(json.dumps([block.summary, block.mismatches]).encode(), 1)
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?)",
+                    (key, data, len(key) + len(data), self._now),
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def _evict(self) -> None:
+        """Delete least recently used blocks until the stored data fits the limit."""
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blocks"
+        ).fetchone()
+        if total <= self._max_bytes:
+            return
+        stale = []
+        for key, size in self._db.execute(
+            "SELECT key, size FROM blocks ORDER BY last_used"
+        ):
+            stale.append((key,))
+            total -= size
+            if total <= self._max_bytes:
+                break
+        self._db.executemany("DELETE FROM blocks WHERE key = ?", stale)
+
+    def close(self) -> None:
+        """Record which blocks were used, evict, and commit."""
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                self._db.executemany(
+                    "UPDATE blocks SET last_used = ? WHERE key = ?",
+                    ((self._now, key) for key in self._hits),
+                )
+                self._evict()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+        self._db.close()
+        self._db = None
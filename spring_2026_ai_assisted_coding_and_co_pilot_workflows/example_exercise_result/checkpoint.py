@@ -0,0 +1,146 @@
+"""
+Checkpoint: Sidecar files recording how far a VCF validation run has progressed.
+
+A checkpoint holds where to resume reading the VCF (a byte offset for plain text, a
+BGZF virtual offset for bgzipped files, or a line count for ordinary gzip streams,
+which must be re-read from the start), the next line number, the variant summary
+counters, the number of mismatches so far and the size of the mismatch report. It
+also records the VCF's size and modification time, and the other inputs (reference,
+annotation, ...) and options the results depend on (see `run_context`), so that a
+checkpoint is never applied to a file that has changed since it was written or
+merged with results computed against other inputs.
+"""
+
+import json
+import os
+from typing import Any, Dict, NamedTuple, Optional
+
+CHECKPOINT_VERSION = 2
+
+
+class Checkpoint(NamedTuple):
+    """Progress of a validation run after its last completed segment."""
+
+    resume_token: int
+    lines_done: int
+    variant_summary: Dict[str, int]
+    mismatch_count: int
+    report_size: Optional[int]
+
+
+def checkpoint_path_for(vcf_path: str) -> str:
+    """Return the conventional checkpoint path for a VCF."""
+    return vcf_path + ".checkpoint.json"
+
+
+def _fingerprint(vcf_path: str) -> Dict[str, int]:
+    stat = os.stat(vcf_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def run_context(inputs: Dict[str, Optional[str]], **options: Any) -> Dict[str, Any]:
+    """
+    Describe what a run's results depend on besides the VCF, for `save_checkpoint`.
+
+    Input files are identified by their real path, size and modification time (like
+    the VCF itself), not by a digest of their contents.
+
+    Args:
+        inputs (Dict[str, Optional[str]]): Input files by role ("reference",
+            "annotation", ...); None for inputs that are not used.
+        **options (Any): JSON-serializable options that change the results (engine,
+            contig aliases, ...).
+
+    Returns:
+        Dict[str, Any]: The context, as stored in the checkpoint.
+    """
+    files = {
+        role: (
+            {"path": os.path.realpath(path), **_fingerprint(path)}
+            if path is not None
+            else None
+        )
+        for role, path in inputs.items()
+    }
+    # As read back from the JSON file (tuples become lists, keys strings)
+    return json.loads(json.dumps({"inputs": files, "options": options}))
+
+
+def save_checkpoint(
+    path: str, vcf_path: str, checkpoint: Checkpoint, context: Dict[str, Any]
+) -> None:
+    """
+    Atomically write a checkpoint (via a temporary file and rename).
+
+    Args:
+        path (str): Checkpoint file path.
+        vcf_path (str): The VCF being validated.
+        checkpoint (Checkpoint): Progress to record.
+        context (Dict[str, Any]): The run's other inputs and options (`run_context`).
+    """
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "vcf": _fingerprint(vcf_path),
+        "context": context,
+        **checkpoint._asdict(),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(
+    path: str, vcf_path: str, context: Dict[str, Any]
+) -> Optional[Checkpoint]:
+    """
+    Read a checkpoint written by `save_checkpoint`.
+
+    Args:
+        path (str): Checkpoint file path.
+        vcf_path (str): The VCF about to be validated.
+        context (Dict[str, Any]): The run's other inputs and options (`run_context`).
+
+    Returns:
+        Optional[Checkpoint]: The checkpoint, or None if there is no checkpoint file.
+
+    Raises:
+        ValueError: If the checkpoint is unreadable or was written for a different
+            version of the VCF, or with other inputs or options.
+    """
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Unreadable checkpoint '{path}': {e}")
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version in '{path}'")
+    if state.get("vcf") != _fingerprint(vcf_path):
+        raise ValueError(
+            f"Checkpoint '{path}' does not match '{vcf_path}' (the VCF has changed)"
+        )
+    saved = state.get("context") or {}
+    changed = [
+        name
+        for group in ("inputs", "options")
+        for name in sorted(set(saved.get(group, {})) | set(context[group]))
+        if saved.get(group, {}).get(name) != context[group].get(name)
+    ]
+    if changed:
+        raise ValueError(
+            f"Checkpoint '{path}' was written with a different "
+            f"{', '.join(changed)}; rerun without resuming to start over"
+        )
+    return Checkpoint(*(state[field] for field in Checkpoint._fields))
+
+
+def remove_checkpoint(path: str) -> None:
+    """Delete a checkpoint file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
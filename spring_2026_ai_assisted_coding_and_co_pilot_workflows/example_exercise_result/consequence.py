@@ -0,0 +1,331 @@
+"""
+Consequence: Predict the protein-level effect of VCF variants on GFF3 coding sequences.
+
+Each transcript's CDS segments are spliced from the reference once, in coding-strand
+order, and translated with a genetic code table. Codons are encoded as 6-bit integers
+(two bits per base) so that translation is a lookup in a 64-entry table, and every
+CDS segment records the transcript offset of its first base. Classifying a variant
+then costs an interval query plus a few array lookups: the affected codon is read from
+the precomputed codon codes and only the substituted bases are re-encoded.
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from annotation import Feature, IntervalArray
+from reference import ReferenceBackend
+
+# In increasing order of severity; a variant hitting several codons or transcripts is
+# counted under the most severe
+CONSEQUENCES = (
+    "synonymous",
+    "missense",
+    "inframe_indel",
+    "start_lost",
+    "stop_lost",
+    "nonsense",
+    "frameshift",
+)
+_SEVERITY = {name: rank for rank, name in enumerate(CONSEQUENCES)}
+
+# Codon code of codons containing anything other than A/C/G/T (translated as "X")
+UNKNOWN_CODON = 64
+_STOP = ord("*")
+_MET = ord("M")
+
+# Two-bit base codes; 4 marks a base that cannot be encoded
+_BASE_CODES = [4] * 256
+for _code, _base in enumerate("ACGT"):
+    _BASE_CODES[ord(_base)] = _BASE_CODES[ord(_base.lower())] = _code
+_COMPLEMENT = str.maketrans("ACGTNacgtn", "TGCANtgcan")
+_NUCLEOTIDES = frozenset("ACGTNacgtn")
+
+
+def encode_codon(c0: int, c1: int, c2: int) -> int:
+    """Combine three two-bit base codes into a 6-bit codon code."""
+    if (c0 | c1 | c2) & 4:
+        return UNKNOWN_CODON
+    return c0 << 4 | c1 << 2 | c2
+
+
+def load_genetic_code(code_path: str) -> bytes:
+    """
+    Read a genetic code table into a translation table indexed by codon code.
+
+    The file has one codon and its one-letter amino acid (`*` for stop) per line,
+    tab-separated, optionally below a header line.
+
+    Args:
+        code_path (str): Path to the table, e.g. `example_data/genetic_code.tsv`.
+
+    Returns:
+        bytes: 65 amino acid letters; index `UNKNOWN_CODON` is "X".
+
+    Raises:
+        RuntimeError: If the file cannot be opened.
+        ValueError: If a line is malformed or not all 64 codons are listed.
+    """
+    table = bytearray(b"\x00" * 64 + b"X")
+    try:
+        with open(code_path) as f:
+            for lineno, line in enumerate(f, 1):
+                fields = line.split()
+                if not fields:
+                    continue
+                codon = fields[0].upper()
+                codes = [_BASE_CODES[ord(b)] for b in codon if ord(b) < 256]
+                if len(fields) != 2 or len(codon) != 3 or len(codes) != 3 or 4 in codes:
+                    if lineno == 1:
+                        continue  # header
+                    raise ValueError(
+                        f"Malformed genetic code line {lineno} in '{code_path}': "
+                        "expected a codon and an amino acid"
+                    )
+                table[encode_codon(*codes)] = ord(fields[1][0])
+    except OSError as e:
+        raise RuntimeError(f"Error opening genetic code file '{code_path}': {e}")
+    if 0 in table:
+        raise ValueError(f"Genetic code '{code_path}' does not list all 64 codons")
+    return bytes(table)
+
+
+class Transcript:
+    """A spliced, translated coding sequence."""
+
+    __slots__ = ("id", "cds", "phase", "codons", "protein")
+
+    def __init__(self, transcript_id: str, cds: str, phase: int, table: bytes):
+        """
+        Args:
+            transcript_id (str): Transcript (CDS parent) identifier.
+            cds (str): Spliced CDS on the coding strand.
+            phase (int): Bases before the first complete codon (the GFF3 phase of the
+                first CDS segment).
+            table (bytes): Translation table from `load_genetic_code`.
+        """
+        self.id = transcript_id
+        self.cds = cds.upper()
+        self.phase = phase
+        codes = [_BASE_CODES[ord(b)] for b in self.cds]
+        self.codons = array(
+            "B",
+            (
+                encode_codon(codes[i], codes[i + 1], codes[i + 2])
+                for i in range(phase, len(codes) - 2, 3)
+            ),
+        )
+        self.protein = bytes(table[code] for code in self.codons)
+
+
+class ConsequenceIndex:
+    """
+    Coding consequences of variants against precomputed transcripts.
+    """
+
+    def __init__(
+        self,
+        transcripts: List[Transcript],
+        contigs: Dict[str, IntervalArray],
+        segment_offsets: Dict[str, array],
+        table: bytes,
+    ) -> None:
+        self.transcripts = transcripts
+        self._contigs = contigs
+        # Per contig, per segment: on the + strand, the transcript offset of the
+        # segment's first base; on the - strand, the offset genomic position 0 would
+        # have (offsets count down along the genome), stored as -(offset) - 1
+        self._segment_offsets = segment_offsets
+        self._table = table
+
+    @classmethod
+    def from_features(
+        cls,
+        features: Iterable[Feature],
+        reference: ReferenceBackend,
+        table: bytes,
+    ) -> "ConsequenceIndex":
+        """
+        Splice and translate the transcripts of the CDS features.
+
+        CDS features are grouped into transcripts by their `Parent` attribute (or
+        `ID` if they have none). Transcripts on contigs missing from the reference are
+        skipped.
+
+        Args:
+            features (Iterable[Feature]): Features, e.g. from `read_gff3`.
+            reference (ReferenceBackend): Reference the CDS sequence is read from.
+            table (bytes): Translation table from `load_genetic_code`.
+
+        Returns:
+            ConsequenceIndex: The built index.
+        """
+        groups: Dict[str, List[Feature]] = {}
+        for feature in features:
+            if feature.type != "CDS":
+                continue
+            parents = feature.attributes.get("Parent") or feature.attributes.get(
+                "ID", f"{feature.chrom}:{feature.start}"
+            )
+            for parent in parents.split(","):
+                groups.setdefault(parent, []).append(feature)
+
+        transcripts: List[Transcript] = []
+        rows: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        for transcript_id, segments in groups.items():
+            chrom, strand = segments[0].chrom, segments[0].strand
+            if chrom not in reference:
+                continue
+            reverse = strand == "-"
+            segments.sort(key=lambda f: f.start, reverse=reverse)
+            parts = [reference.fetch(chrom, f.start, f.end) for f in segments]
+            if reverse:
+                parts = [part.translate(_COMPLEMENT)[::-1] for part in parts]
+            cds = "".join(parts)
+            phase = int(segments[0].phase) if segments[0].phase.isdigit() else 0
+            number = len(transcripts)
+            transcripts.append(Transcript(transcript_id, cds, phase, table))
+            offset = 0
+            for f in segments:
+                # Minus-strand offsets count down from the segment's last base
+                anchor = -(offset + f.end - 1) - 1 if reverse else offset
+                rows.setdefault(chrom, []).append((f.start, f.end, number, anchor))
+                offset += f.end - f.start
+
+        contigs = {}
+        segment_offsets = {}
+        for chrom, segments in rows.items():
+            segments.sort()
+            contigs[chrom] = IntervalArray(
+                array("q", (r[0] for r in segments)),
+                array("q", (r[1] for r in segments)),
+                array("I", (r[2] for r in segments)),
+            )
+            segment_offsets[chrom] = array("q", (r[3] for r in segments))
+        return cls(transcripts, contigs, segment_offsets, table)
+
+    def __len__(self) -> int:
+        return len(self.transcripts)
+
+    def add_aliases(self, aliases: Dict[str, str]) -> None:
+        """
+        Let contigs also be looked up by other names, e.g. "1" for "chr1" (see
+        `ReferenceBackend.add_aliases`). Aliases of contigs without transcripts, or
+        that clash with existing names, are ignored.
+
+        Args:
+            aliases (Dict[str, str]): Alias -> contig name.
+        """
+        for alias, name in aliases.items():
+            if name in self._contigs and alias not in self._contigs:
+                self._contigs[alias] = self._contigs[name]
+                self._segment_offsets[alias] = self._segment_offsets[name]
+
+    def _cds_offsets(
+        self, chrom: str, start: int, end: int
+    ) -> Dict[int, List[Tuple[int, int, bool]]]:
+        """
+        Map the CDS bases within [start, end) to their transcripts.
+
+        Returns:
+            Dict[int, List[Tuple[int, int, bool]]]: Per transcript number, the
+            (genomic position, transcript offset, reverse strand) of each coding base.
+        """
+        intervals = self._contigs.get(chrom)
+        hits: Dict[int, List[Tuple[int, int, bool]]] = {}
+        if intervals is None:
+            return hits
+        offsets = self._segment_offsets[chrom]
+        for i in intervals.overlapping(start, end):
+            anchor = offsets[i]
+            reverse = anchor < 0
+            bases = hits.setdefault(intervals.values[i], [])
+            for p in range(
+                max(start, intervals.starts[i]), min(end, intervals.ends[i])
+            ):
+                # -(anchor + 1) is the transcript offset of genomic position 0
+                bases.append(
+                    (p, -(anchor + 1) - p, True)
+                    if reverse
+                    else (p, anchor + p - intervals.starts[i], False)
+                )
+        return hits
+
+    def classify(self, chrom: str, pos: int, ref: str, alt: str) -> Optional[str]:
+        """
+        Classify one ALT allele by its most severe effect on any transcript.
+
+        Substitutions (REF and ALT of equal length) are translated codon by codon;
+        other alleles overlapping a CDS are frameshifts or in-frame indels, by their
+        length change. The ALT bases are applied to the reference sequence, so a REF
+        mismatch does not change the prediction.
+
+        Args:
+            chrom (str): Contig name.
+            pos (int): 1-based VCF position.
+            ref (str): REF allele.
+            alt (str): ALT allele.
+
+        Returns:
+            Optional[str]: One of `CONSEQUENCES`, or None if the allele does not
+            touch a CDS or is symbolic (e.g. `<DEL>` or `*`).
+        """
+        if not _NUCLEOTIDES.issuperset(alt):
+            return None
+        start = pos - 1
+        if len(ref) != len(alt):
+            # Drop the padding base shared by REF and ALT
+            padded = ref[:1] == alt[:1]
+            start += padded
+            if self._cds_offsets(chrom, start, start + max(len(ref) - padded, 1)):
+                return (
+                    "inframe_indel" if (len(alt) - len(ref)) % 3 == 0 else "frameshift"
+                )
+            return None
+
+        worst = None
+        for number, bases in self._cds_offsets(chrom, start, start + len(ref)).items():
+            transcript = self.transcripts[number]
+            # Substituted bases per codon: codon index -> {position in codon: base}
+            changes: Dict[int, Dict[int, str]] = {}
+            for p, offset, reverse in bases:
+                base = alt[p - start].upper()
+                if reverse:
+                    base = base.translate(_COMPLEMENT)
+                frame_offset = offset - transcript.phase
+                if frame_offset < 0 or base == transcript.cds[offset]:
+                    continue
+                codon_index, within = divmod(frame_offset, 3)
+                if codon_index < len(transcript.codons):
+                    changes.setdefault(codon_index, {})[within] = base
+            for codon_index, substituted in changes.items():
+                consequence = self._codon_consequence(
+                    transcript, codon_index, substituted
+                )
+                if worst is None or _SEVERITY[consequence] > _SEVERITY[worst]:
+                    worst = consequence
+        return worst
+
+    def _codon_consequence(
+        self, transcript: Transcript, codon_index: int, substituted: Dict[int, str]
+    ) -> str:
+        """Classify the substitution of some bases of one codon."""
+        code = transcript.codons[codon_index]
+        if code == UNKNOWN_CODON:
+            # Re-encode from the bases, since the unknown code lost them
+            first = transcript.phase + codon_index * 3
+            codes = [_BASE_CODES[ord(b)] for b in transcript.cds[first : first + 3]]
+        else:
+            codes = [code >> 4, (code >> 2) & 3, code & 3]
+        for within, base in substituted.items():
+            codes[within] = _BASE_CODES[ord(base)]
+        ref_aa = transcript.protein[codon_index]
+        alt_aa = self._table[encode_codon(*codes)]
+        if alt_aa == ref_aa:
+            return "synonymous"
+        if alt_aa == _STOP:
+            return "nonsense"
+        if ref_aa == _STOP:
+            return "stop_lost"
+        if codon_index == 0 and ref_aa == _MET:
+            return "start_lost"
+        return "missense"
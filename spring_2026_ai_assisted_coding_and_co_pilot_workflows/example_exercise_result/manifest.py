@@ -0,0 +1,290 @@
+"""
+Manifest: Contig names, lengths and MD5 digests of a reference, checked against VCF headers.
+
+The manifest is computed with one pass over the reference and cached next to it
+(`<fasta>.manifest.json`, or in the user cache directory if the reference's directory
+is read-only), reused while it is newer than the reference. Before a run,
+the VCF's `##contig=<ID=...,length=...,md5=...>` header lines are compared against
+it, so a VCF called against a different assembly (contigs with other lengths or
+sequences) fails immediately instead of partway through. Header contigs missing from
+the reference only matter if records use them, so they are reported separately.
+Digests follow the VCF/SAM convention: the MD5 of the upper-cased sequence.
+
+VCF contigs named differently from the reference ("1" for "chr1", "MT" for "chrM",
+or any name whose header MD5 matches a reference contig) are resolved to aliases,
+which the reference backends then accept as contig names.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from cache import default_cache_path
+
+MANIFEST_VERSION = 2
+_FETCH_CHUNK = 1 << 20
+_HEADER_FIELD = re.compile(r'(\w+)=("(?:[^"\\]|\\.)*"|[^,>]*)')
+_MITOCHONDRIAL = ("chrM", "chrMT", "M", "MT")
+
+
+class ContigInfo(NamedTuple):
+    """A contig's name, and its length and MD5 digest where known."""
+
+    name: str
+    length: Optional[int]
+    md5: Optional[str]
+
+
+def manifest_path_for(fasta_path: str) -> str:
+    """Return the conventional manifest path for a reference."""
+    return fasta_path + ".manifest.json"
+
+
+def user_manifest_path(fasta_path: str) -> str:
+    """Return the manifest path for a reference in the user cache directory."""
+    real_path = os.path.realpath(fasta_path)
+    digest = hashlib.blake2b(real_path.encode(), digest_size=8).hexdigest()
+    return os.path.join(
+        os.path.dirname(default_cache_path()),
+        "manifests",
+        f"{digest}-{os.path.basename(real_path)}.manifest.json",
+    )
+
+
+def _fasta_manifest(fasta_path: str) -> List[ContigInfo]:
+    opener = gzip.open if fasta_path.endswith(".gz") else open
+    contigs = []
+    name = None
+    length = 0
+    md5 = hashlib.md5()
+    with opener(fasta_path, "rb") as fasta:
+        for line in fasta:
+            if line.startswith(b">"):
+                if name is not None:
+                    contigs.append(ContigInfo(name, length, md5.hexdigest()))
+                header = line[1:].split()
+                if not header:
+                    raise ValueError(
+                        f"Invalid FASTA format: empty header in {fasta_path}"
+                    )
+                name = header[0].decode()
+                length = 0
+                md5 = hashlib.md5()
+                continue
+            bases = line.strip()
+            if bases and name is None:
+                raise ValueError(
+                    f"Invalid FASTA format: sequence data before header in {fasta_path}"
+                )
+            length += len(bases)
+            md5.update(bases.upper())
+    if name is not None:
+        contigs.append(ContigInfo(name, length, md5.hexdigest()))
+    return contigs
+
+
+def _twobit_manifest(twobit_path: str) -> List[ContigInfo]:
+    from reference import TwoBitReference
+
+    reference = TwoBitReference(twobit_path)
+    try:
+        contigs = []
+        for name, length in reference.contig_lengths().items():
+            if reference.has_n_blocks(name):
+                # IUPAC codes were stored as N, so the FASTA's MD5 is unknown
+                contigs.append(ContigInfo(name, length, None))
+                continue
+            md5 = hashlib.md5()
+            for start in range(0, length, _FETCH_CHUNK):
+                chunk = reference.fetch(name, start, start + _FETCH_CHUNK)
+                md5.update(chunk.upper().encode())
+            contigs.append(ContigInfo(name, length, md5.hexdigest()))
+        return contigs
+    finally:
+        reference.close()
+
+
+def build_manifest(fasta_path: str, twobit: bool = False) -> List[ContigInfo]:
+    """
+    Compute the manifest of a reference.
+
+    A `.2bit` file does not keep IUPAC ambiguity codes, so contigs with non-ACGT
+    bases get no MD5 (`pack-reference` saves the manifest of the source FASTA
+    instead, see `save_manifest`).
+
+    Args:
+        fasta_path (str): Path to the FASTA (plain or gzipped) or `.2bit` file.
+        twobit (bool): Whether `fasta_path` is a `.2bit` file.
+
+    Returns:
+        List[ContigInfo]: One entry per contig, in file order.
+
+    Raises:
+        RuntimeError: If the file cannot be opened.
+        ValueError: If the FASTA is malformed.
+    """
+    try:
+        if twobit:
+            return _twobit_manifest(fasta_path)
+        return _fasta_manifest(fasta_path)
+    except OSError as e:
+        raise RuntimeError(f"Error opening FASTA file '{fasta_path}': {e}")
+
+
+def _load_manifest(manifest_path: str, fasta_path: str) -> Optional[List[ContigInfo]]:
+    """Return a saved manifest if it exists and is newer than the reference."""
+    try:
+        if os.path.getmtime(manifest_path) < os.path.getmtime(fasta_path):
+            return None
+        with open(manifest_path) as f:
+            state = json.load(f)
+        if state.get("version") == MANIFEST_VERSION:
+            return [ContigInfo(*contig) for contig in state["contigs"]]
+    except (OSError, ValueError, TypeError, KeyError):
+        pass  # missing or unreadable; rebuild it
+    return None
+
+
+def save_manifest(fasta_path: str, contigs: List[ContigInfo]) -> Optional[str]:
+    """
+    Save a reference's manifest next to it, or in the user cache directory if that
+    location is read-only.
+
+    Returns:
+        Optional[str]: The path written, or None if neither location is writable.
+    """
+    state = {"version": MANIFEST_VERSION, "contigs": contigs}
+    for manifest_path in (
+        manifest_path_for(fasta_path),
+        user_manifest_path(fasta_path),
+    ):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+            with open(manifest_path, "w") as f:
+                json.dump(state, f)
+            return manifest_path
+        except OSError:
+            continue
+    return None
+
+
+def load_or_build_manifest(fasta_path: str, twobit: bool = False) -> List[ContigInfo]:
+    """
+    Load the saved manifest of a reference (next to it, else in the user cache
+    directory), building and saving it if missing or older than the reference.
+
+    Raises:
+        RuntimeError: If the reference cannot be opened.
+        ValueError: If the reference is malformed.
+    """
+    for manifest_path in (
+        manifest_path_for(fasta_path),
+        user_manifest_path(fasta_path),
+    ):
+        contigs = _load_manifest(manifest_path, fasta_path)
+        if contigs is not None:
+            return contigs
+    contigs = build_manifest(fasta_path, twobit)
+    save_manifest(fasta_path, contigs)
+    return contigs
+
+
+def read_vcf_contigs(lines: Iterable[str]) -> List[ContigInfo]:
+    """
+    Parse the `##contig` lines of a VCF header.
+
+    Reading stops at the `#CHROM` line (or the first record), so only the header is
+    consumed.
+
+    Args:
+        lines (Iterable[str]): VCF lines.
+
+    Returns:
+        List[ContigInfo]: The declared contigs; length and md5 are None if absent.
+
+    Raises:
+        ValueError: If a contig line has no ID or a non-integer length.
+    """
+    contigs = []
+    for line in lines:
+        if not line.startswith("##"):
+            break
+        if not line.startswith("##contig=<"):
+            continue
+        fields = {
+            key: value.strip('"')
+            for key, value in _HEADER_FIELD.findall(line[len("##contig=<") :])
+        }
+        if not fields.get("ID"):
+            raise ValueError(f"VCF contig header without an ID: {line.strip()}")
+        try:
+            length = int(fields["length"]) if "length" in fields else None
+        except ValueError:
+            raise ValueError(f"Non-integer contig length in VCF header: {line.strip()}")
+        md5 = fields.get("md5")
+        contigs.append(ContigInfo(fields["ID"], length, md5.lower() if md5 else None))
+    return contigs
+
+
+def name_variants(name: str) -> List[str]:
+    """Other common names of a contig: with or without "chr", and M/MT spellings."""
+    if name in _MITOCHONDRIAL:
+        return [n for n in _MITOCHONDRIAL if n != name]
+    if name.startswith("chr"):
+        return [name[3:]]
+    return ["chr" + name]
+
+
+def match_contigs(
+    vcf_contigs: Iterable[ContigInfo], manifest: Iterable[ContigInfo]
+) -> Tuple[Dict[str, str], List[str], List[str]]:
+    """
+    Resolve VCF header contigs to reference contigs and check their lengths and MD5s.
+
+    A VCF contig matches the reference contig of the same name, else one named by
+    `name_variants`, else the reference contig with the same MD5 (if unique).
+
+    Args:
+        vcf_contigs (Iterable[ContigInfo]): From `read_vcf_contigs`.
+        manifest (Iterable[ContigInfo]): From `load_or_build_manifest`.
+
+    Returns:
+        Tuple[Dict[str, str], List[str], List[str]]: Aliases (VCF name -> reference
+        name) for contigs matched under another name, the VCF contigs missing from the
+        reference, and a description of each length or MD5 conflict.
+    """
+    by_name = {contig.name: contig for contig in manifest}
+    by_md5: Dict[str, List[ContigInfo]] = {}
+    for contig in by_name.values():
+        if contig.md5:
+            by_md5.setdefault(contig.md5, []).append(contig)
+    aliases: Dict[str, str] = {}
+    missing = []
+    problems = []
+    for contig in vcf_contigs:
+        target = by_name.get(contig.name)
+        if target is None:
+            target = next(
+                (by_name[n] for n in name_variants(contig.name) if n in by_name), None
+            )
+        if target is None and contig.md5 and len(by_md5.get(contig.md5, ())) == 1:
+            target = by_md5[contig.md5][0]
+        if target is None:
+            missing.append(contig.name)
+            continue
+        if target.name != contig.name:
+            aliases[contig.name] = target.name
+        if contig.length is not None and contig.length != target.length:
+            problems.append(
+                f"contig '{contig.name}' has length {contig.length} in the VCF but "
+                f"{target.length} in the reference ('{target.name}')"
+            )
+        elif contig.md5 and target.md5 and contig.md5 != target.md5:
+            problems.append(
+                f"contig '{contig.name}' has MD5 {contig.md5} in the VCF but "
+                f"{target.md5} in the reference ('{target.name}')"
+            )
+    return aliases, missing, problems
@@ -1,5 +1,9 @@
 import argparse
 import gzip
+from collections import namedtuple
+
+# One ALT allele of a VCF line; much smaller than a dict per entry
+VCFRecord = namedtuple("VCFRecord", ["chrom", "pos", "id", "ref", "alt"])
 
 
 def load_fasta(fasta_path):
@@ -33,17 +37,14 @@ def load_fasta(fasta_path):
 
 
 def validate_vcf(vcf_entries, fasta_sequences):
-    for vcf_entry in vcf_entries:
-        chrom = vcf_entry["chrom"]
+    for chrom, pos, vid, ref, alt in vcf_entries:
         if chrom not in fasta_sequences:
             raise ValueError(f"Reference chromosome '{chrom}' not found in FASTA.")
-        ref_base = fasta_sequences[chrom][
-            vcf_entry["pos"] - 1 : vcf_entry["pos"] - 1 + len(vcf_entry["ref"])
-        ]
-        if vcf_entry["ref"] != ref_base:
+        ref_base = fasta_sequences[chrom][pos - 1 : pos - 1 + len(ref)]
+        if ref != ref_base:
             print(
-                f"Mismatch: {vcf_entry['chrom']}\t{vcf_entry['pos']}\t{vcf_entry['id']}\t"
-                f"VCF_REF={vcf_entry['ref']}\tFASTA_REF={ref_base}\tALT={vcf_entry['alt']}"
+                f"Mismatch: {chrom}\t{pos}\t{vid}\t"
+                f"VCF_REF={ref}\tFASTA_REF={ref_base}\tALT={alt}"
             )
 
 
@@ -54,7 +55,15 @@ def parse_vcf(vcf_path):
             for lineno, line in enumerate(vcf, 1):
                 if line.startswith("#"):
                     continue
-                fields = line.strip().split("\t")
+                # Only the first five columns are used: leave the rest unsplit
+                fields = line.split("\t", 5)
+                if (
+                    len(fields) < 6
+                    or not fields[5]
+                    or fields[5].isspace()
+                    or line[:1].isspace()
+                ):
+                    fields = line.strip().split("\t")
                 if len(fields) < 5:
                     raise ValueError(
                         f"Malformed VCF line {lineno} in '{vcf_path}': fewer than 5 columns"
@@ -70,14 +79,10 @@ def parse_vcf(vcf_path):
                     raise ValueError(
                         f"Non-integer POS at line {lineno} in '{vcf_path}': {fields[1]}"
                     )
+                chrom, vid, ref = fields[0], fields[2], fields[3]
                 for alt in alts:
-                    yield {
-                        "chrom": fields[0],
-                        "pos": pos,
-                        "id": fields[2],
-                        "ref": fields[3],
-                        "alt": alt,
-                    }
+                    # tuple.__new__ skips the namedtuple constructor's argument handling
+                    yield tuple.__new__(VCFRecord, (chrom, pos, vid, ref, alt))
     except OSError as e:
         raise RuntimeError(f"Error opening VCF file '{vcf_path}': {e}")
 
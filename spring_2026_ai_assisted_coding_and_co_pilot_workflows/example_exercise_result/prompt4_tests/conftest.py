@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_validation_cache(tmp_path, monkeypatch):
+    # Keep CLI runs from reading or writing the user's validation cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg-cache"))
@@ -0,0 +1,996 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..")))
+
+import bgzf  # noqa: E402
+from annotation import AnnotationIndex, Feature, read_gff3  # noqa: E402
+from consequence import ConsequenceIndex, load_genetic_code  # noqa: E402
+import report  # noqa: E402
+import tabix  # noqa: E402
+from reference import (  # noqa: E402
+    IndexedFastaReference,
+    InMemoryReference,
+    TwoBitReference,
+    pack_fasta_to_twobit,
+)
+
+EXAMPLE_DIR = os.path.abspath(os.path.join(HERE, "../../example_data"))
+SCRIPT = os.path.abspath(os.path.join(HERE, "../vcf_validator.py"))
+
+
+def write_fasta(path, sequences, width=60):
+    with open(path, "w") as f:
+        for name, seq in sequences.items():
+            f.write(f">{name} test contig\n")
+            for i in range(0, len(seq), width):
+                f.write(seq[i : i + width] + "\n")
+
+
+@pytest.fixture
+def sequences():
+    rng = random.Random(42)
+    return {
+        name: "".join(rng.choice("ACGTN") for _ in range(length))
+        for name, length in [("chr1", 1000), ("chr2", 61), ("chr3", 7)]
+    }
+
+
+def assert_same_slices(reference, sequences):
+    for name, seq in sequences.items():
+        for start, end in [
+            (0, 1),
+            (0, len(seq)),
+            (59, 62),
+            (5, 300),
+            (len(seq) - 2, len(seq) + 5),
+        ]:
+            assert reference.fetch(name, start, end) == seq[start:end]
+
+
+def test_indexed_reference_matches_memory(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    reference = IndexedFastaReference(str(fasta))
+    assert_same_slices(reference, sequences)
+    assert (
+        reference.contig_lengths()
+        == InMemoryReference.from_fasta(str(fasta)).contig_lengths()
+    )
+    reference.close()
+    # samtools-compatible .fai: name, length, offset, line bases, line width
+    fai_lines = (tmp_path / "ref.fa.fai").read_text().splitlines()
+    assert fai_lines[0] == "chr1\t1000\t18\t60\t61"
+
+
+def test_indexed_reference_bgzipped(tmp_path, sequences):
+    plain = tmp_path / "ref.fa"
+    write_fasta(plain, sequences)
+    packed = tmp_path / "ref.fa.gz"
+    with bgzf.BgzfWriter(str(packed)) as writer:
+        # Small writes across many blocks exercise cross-block reads
+        data = plain.read_bytes()
+        for i in range(0, len(data), 100):
+            writer.write(data[i : i + 100])
+            writer.flush()
+    reference = IndexedFastaReference(str(packed))
+    assert_same_slices(reference, sequences)
+    reference.close()
+    assert os.path.exists(str(packed) + ".gzi")
+
+
+def test_indexed_reference_rejects_ragged_lines():
+    with pytest.raises(ValueError, match="inconsistent line length"):
+        IndexedFastaReference(os.path.join(EXAMPLE_DIR, "reference.fasta"))
+
+
+def test_indexed_reference_blank_lines(tmp_path):
+    fasta = tmp_path / "blank.fa"
+    # A blank line inside a record breaks the fixed line layout (as in samtools faidx)
+    fasta.write_bytes(b">a\nACGT\n\nTTGG\nCC\n")
+    with pytest.raises(ValueError, match="inconsistent line length"):
+        IndexedFastaReference(str(fasta))
+    # Blank lines after a header or at the end of a record are fine
+    fasta.write_bytes(b">a\n\nACGT\nTTGG\nCC\n\n>b\nGG\n")
+    reference = IndexedFastaReference(str(fasta))
+    assert reference.fetch("a", 0, 10) == "ACGTTTGGCC"
+    assert reference.fetch("b", 0, 2) == "GG"
+
+
+def test_cli_indexed_backend(tmp_path):
+    sequences = InMemoryReference.from_fasta(
+        os.path.join(EXAMPLE_DIR, "reference.fasta")
+    )
+    fasta = tmp_path / "reference.fasta"
+    write_fasta(fasta, {"chrToy": sequences.fetch("chrToy", 0, 10**6)})
+    vcf = os.path.join(EXAMPLE_DIR, "variants.vcf")
+    memory = subprocess.run(
+        [sys.executable, SCRIPT, vcf, str(fasta)], capture_output=True, text=True
+    )
+    indexed = subprocess.run(
+        [sys.executable, SCRIPT, vcf, str(fasta), "--reference-backend", "indexed"],
+        capture_output=True,
+        text=True,
+    )
+    assert indexed.returncode == 0
+    assert indexed.stderr == memory.stderr
+
+
+def test_twobit_round_trip(tmp_path, sequences):
+    # Soft-masked stretch and N runs crossing line boundaries
+    sequences["chr1"] = (
+        sequences["chr1"][:50]
+        + sequences["chr1"][50:130].lower()
+        + sequences["chr1"][130:]
+    )
+    sequences["chr2"] = "N" * 70 + "ACGT"
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    lengths = pack_fasta_to_twobit(str(fasta), str(tmp_path / "ref.2bit"))
+    assert lengths == {name: len(seq) for name, seq in sequences.items()}
+    reference = TwoBitReference(str(tmp_path / "ref.2bit"))
+    assert_same_slices(reference, sequences)
+    assert "chrX" not in reference
+    reference.close()
+
+
+def test_cli_pack_reference_and_twobit_backend(tmp_path):
+    fasta = os.path.join(EXAMPLE_DIR, "reference.fasta")
+    vcf = os.path.join(EXAMPLE_DIR, "variants.vcf")
+    twobit = tmp_path / "reference.2bit"
+    packed = subprocess.run(
+        [sys.executable, SCRIPT, "pack-reference", fasta, "-o", str(twobit)],
+        capture_output=True,
+        text=True,
+    )
+    assert packed.returncode == 0
+    memory = subprocess.run(
+        [sys.executable, SCRIPT, vcf, fasta], capture_output=True, text=True
+    )
+    mapped = subprocess.run(
+        [sys.executable, SCRIPT, vcf, str(twobit), "--reference-backend", "twobit"],
+        capture_output=True,
+        text=True,
+    )
+    assert mapped.returncode == 0
+    assert mapped.stderr == memory.stderr
+
+
+def write_vcf(path, sequences, records=600, seed=7, bad_line=None):
+    rng = random.Random(seed)
+    names = list(sequences)
+    lines = ["##fileformat=VCFv4.2", "#CHROM\tPOS\tID\tREF\tALT"]
+    for i in range(records):
+        chrom = names[i * len(names) // records]
+        seq = sequences[chrom]
+        pos = rng.randrange(1, len(seq) - 3)
+        ref = seq[pos - 1 : pos - 1 + rng.choice([1, 1, 2])]
+        if rng.random() < 0.2:
+            ref = "T" + ref  # REF mismatch
+        alts = ",".join(
+            rng.choice(["A", "C", "GT"]) for _ in range(rng.choice([1, 1, 2]))
+        )
+        lines.append(f"{chrom}\t{pos}\trec{i}\t{ref}\t{alts}")
+    if bad_line is not None:
+        lines[bad_line] = "chr1\t5\tbad\tA"
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.mark.parametrize("compression", ["plain", "gzip", "bgzf"])
+def test_parallel_matches_serial(tmp_path, sequences, compression):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences)
+    if compression == "gzip":
+        import gzip
+
+        with gzip.open(tmp_path / "calls.vcf.gz", "wb") as f:
+            f.write(vcf.read_bytes())
+        vcf = tmp_path / "calls.vcf.gz"
+    elif compression == "bgzf":
+        with bgzf.BgzfWriter(str(tmp_path / "calls.vcf.gz")) as writer:
+            for line in vcf.read_bytes().splitlines(keepends=True):
+                writer.write(line)
+                writer.flush()  # one small block per line exercises boundaries
+        vcf = tmp_path / "calls.vcf.gz"
+    serial = subprocess.run(
+        [sys.executable, SCRIPT, str(vcf), str(fasta)], capture_output=True, text=True
+    )
+    parallel = subprocess.run(
+        [sys.executable, SCRIPT, str(vcf), str(fasta), "--jobs", "3"],
+        capture_output=True,
+        text=True,
+    )
+    assert parallel.returncode == 0
+    assert "Mismatch" in serial.stderr
+    assert parallel.stderr == serial.stderr
+
+
+def test_parallel_concatenated_bgzf(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences, records=200)
+    # `cat a.vcf.gz b.vcf.gz ...`: an empty EOF block ends each member, and some
+    # members end mid-line
+    member = tmp_path / "member.gz"
+    with open(tmp_path / "calls.vcf.gz", "wb") as out:
+        for i, line in enumerate(vcf.read_bytes().splitlines(keepends=True)):
+            for part in (line[:9], line[9:]) if i % 3 == 0 else (line,):
+                with bgzf.BgzfWriter(str(member)) as writer:
+                    writer.write(part)
+                out.write(member.read_bytes())
+    vcf = tmp_path / "calls.vcf.gz"
+    serial = subprocess.run(
+        [sys.executable, SCRIPT, str(vcf), str(fasta)], capture_output=True, text=True
+    )
+    assert "Mismatch" in serial.stderr
+    for jobs in ("2", "5"):
+        parallel = subprocess.run(
+            [sys.executable, SCRIPT, str(vcf), str(fasta), "--jobs", jobs],
+            capture_output=True,
+            text=True,
+        )
+        assert parallel.stderr == serial.stderr
+
+
+def test_parallel_reports_absolute_line_numbers(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences, bad_line=450)
+    result = subprocess.run(
+        [sys.executable, SCRIPT, str(vcf), str(fasta), "--jobs", "4"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "Malformed VCF line 451 " in result.stderr
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_numpy_engine_matches_python(tmp_path, sequences, jobs):
+    pytest.importorskip("numpy")
+    sequences["chr2"] = sequences["chr2"].lower()
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences, records=2000)
+    with open(vcf, "a") as f:
+        # Past the contig end, before position 1 and a missing contig last
+        f.write("chr3\t6\tend\tTTTT\tA\nchr1\t0\tzero\tA\tC\nchrZ\t1\tmissing\tA\tC\n")
+    runs = [
+        subprocess.run(
+            [sys.executable, SCRIPT, str(vcf), str(fasta), "--jobs", jobs]
+            + ["--engine", engine, "--no-cache"],
+            capture_output=True,
+            text=True,
+        )
+        for engine in ("python", "numpy")
+    ]
+    assert runs[0].returncode == runs[1].returncode == 1
+    assert "chrZ" in runs[1].stderr
+    # Compare everything before the traceback (mismatches and the error)
+    assert runs[1].stderr.split("Traceback")[0] == runs[0].stderr.split("Traceback")[0]
+
+
+def test_numpy_engine_fetches_windows_not_contig_span():
+    pytest.importorskip("numpy")
+    import numpy_engine
+
+    rng = random.Random(7)
+    # Records about 10 kb apart, farther than numpy_engine.FETCH_GAP
+    seq = "".join(rng.choices("ACGT", k=2_000_000))
+    records = []
+    for i in range(200):
+        pos = rng.randrange(-2, len(seq) + 5)
+        ref = seq[max(pos - 1, 0) : pos - 1 + rng.randint(1, 6)] or "A"
+        if i % 3 == 0:
+            ref = "N" + ref[1:]  # mismatch
+        records.append((pos, ref))
+    lines = [
+        (i + 1, f"chr1\t{pos}\t.\t{ref}\tC") for i, (pos, ref) in enumerate(records)
+    ]
+
+    class CountingReference(InMemoryReference):
+        fetched = 0
+
+        def fetch(self, chrom, start, end):
+            seq = super().fetch(chrom, start, end)
+            CountingReference.fetched += len(seq)
+            return seq
+
+    reference = CountingReference({"chr1": seq})
+    summary = {"snv": 0, "indel": 0, "del": 0, "ins": 0}
+
+    def split_record(lineno, line):
+        chrom, pos, vid, ref, alt = line.split("\t")
+        return chrom, int(pos), vid, ref, [alt]
+
+    found = [
+        lineno
+        for lineno, _ in numpy_engine.iter_mismatches(
+            lines, split_record, reference, summary, batch_size=1000
+        )
+    ]
+    expected = [
+        lineno
+        for lineno, (pos, ref) in enumerate(records, 1)
+        if pos < 1 or seq[pos - 1 : pos - 1 + len(ref)] != ref
+    ]
+    assert found == expected
+    # Windows around the records, not one fetch of the whole contig
+    assert CountingReference.fetched < len(seq) / 10
+
+
+def bgzip(path, out):
+    with bgzf.BgzfWriter(str(out)) as writer:
+        for line in path.read_bytes().splitlines(keepends=True):
+            writer.write(line)
+            if len(line) % 3 == 0:
+                writer.flush()  # vary block boundaries
+    return out
+
+
+def sorted_vcf(path, sequences, records=600):
+    write_vcf(path, sequences, records=records)
+    lines = path.read_text().splitlines(keepends=True)
+    header = [line for line in lines if line.startswith("#")]
+    body = sorted(
+        (line for line in lines if not line.startswith("#")),
+        key=lambda line: (line.split("\t")[0], int(line.split("\t")[1])),
+    )
+    path.write_text("".join(header + body))
+
+
+def test_region_indexed_matches_streaming(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    sorted_vcf(vcf, sequences)
+    indexed_vcf = bgzip(vcf, tmp_path / "calls.vcf.gz")
+    tabix.build_tbi(str(indexed_vcf))
+    region_args = ["--region", "chr1:200-450", "--region", "chr2", "--region", "chr9"]
+    runs = [
+        subprocess.run(
+            [sys.executable, SCRIPT, str(path), str(fasta)] + region_args,
+            capture_output=True,
+            text=True,
+        )
+        for path in (vcf, indexed_vcf)
+    ]
+    assert runs[0].returncode == runs[1].returncode == 0
+    assert "scanning the whole file" in runs[0].stderr
+    mismatches = [line for line in runs[1].stderr.splitlines() if "Mismatch" in line]
+    assert mismatches
+    for line in mismatches:
+        chrom, pos = line.split("\t")[0].split()[-1], int(line.split("\t")[1])
+        assert chrom == "chr2" or (chrom == "chr1" and 190 <= pos <= 450)
+    assert mismatches == [
+        line for line in runs[0].stderr.splitlines() if "Mismatch" in line
+    ]
+    assert runs[1].stderr.split("Variant type summary")[1] == (
+        runs[0].stderr.split("Variant type summary")[1]
+    )
+
+
+def test_targets_bed_and_region_errors(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    sorted_vcf(vcf, sequences)
+    with open(vcf, "a") as f:
+        f.write("chr3\t7\tbad\tA\n")
+    indexed_vcf = bgzip(vcf, tmp_path / "calls.vcf.gz")
+    tabix.build_tbi(str(indexed_vcf))
+    bed = tmp_path / "targets.bed"
+    bed.write_text("track name=targets\nchr1\t0\t100\nchr3\t0\t7\n")
+    result = subprocess.run(
+        [sys.executable, SCRIPT, str(indexed_vcf), str(fasta), "--targets", str(bed)],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    assert "Malformed VCF line at virtual offset " in result.stderr
+    clean = subprocess.run(
+        [sys.executable, SCRIPT, str(indexed_vcf), str(fasta)]
+        + ["--region", "chr1:1-100"],
+        capture_output=True,
+        text=True,
+    )
+    assert clean.returncode == 0
+    conflict = subprocess.run(
+        [
+            sys.executable,
+            SCRIPT,
+            str(vcf),
+            str(fasta),
+            "--region",
+            "chr1",
+            "--jobs",
+            "2",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert conflict.returncode == 2
+
+
+def test_threaded_decompression_matches_gzip(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences, records=2000)
+    packed = bgzip(vcf, tmp_path / "calls.vcf.gz")
+    lines = list(bgzf.iter_lines(str(packed), threads=3))
+    assert b"".join(lines) == vcf.read_bytes()
+    runs = [
+        subprocess.run(
+            [sys.executable, SCRIPT, str(packed), str(fasta)]
+            + ["--decompress-threads", threads],
+            capture_output=True,
+            text=True,
+        )
+        for threads in ("1", "4")
+    ]
+    assert runs[1].returncode == 0
+    assert runs[1].stderr == runs[0].stderr
+
+
+@pytest.mark.parametrize("report_format", report.REPORT_FORMATS)
+def test_mismatch_report_and_log_cap(tmp_path, sequences, report_format):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences)
+    logged = subprocess.run(
+        [sys.executable, SCRIPT, str(vcf), str(fasta)], capture_output=True, text=True
+    )
+    expected = [
+        line.split("Mismatch: ")[1]
+        for line in logged.stderr.splitlines()
+        if "Mismatch: " in line
+    ]
+    out = tmp_path / "mismatches.out"
+    result = subprocess.run(
+        [sys.executable, SCRIPT, str(vcf), str(fasta), "--max-mismatch-log", "3"]
+        + ["--report-format", report_format, "--report-out", str(out)],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert result.stderr.count("Mismatch: ") == 3
+    assert f"{len(expected)} REF mismatches in total" in result.stderr
+    if report_format == "tsv":
+        rows = [line.split("\t") for line in out.read_text().splitlines()[1:]]
+    elif report_format == "jsonl":
+        rows = [
+            list(json.loads(line).values()) for line in out.read_text().splitlines()
+        ]
+    else:
+        rows = list(report.read_columnar(str(out)))
+    assert [
+        "{}\t{}\t{}\tVCF_REF={}\tFASTA_REF={}\tALT={}".format(*row) for row in rows
+    ] == expected
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.mark.parametrize("compression", ["plain", "gzip", "bgzf"])
+def test_resume_after_interruption(tmp_path, sequences, monkeypatch, compression):
+    from vcf_validator import VCFValidator
+
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences)
+    if compression == "gzip":
+        import gzip
+
+        with gzip.open(tmp_path / "calls.vcf.gz", "wb") as f:
+            f.write(vcf.read_bytes())
+        vcf = tmp_path / "calls.vcf.gz"
+    elif compression == "bgzf":
+        vcf = bgzip(vcf, tmp_path / "calls.vcf.gz")
+
+    def validate(out, resume=False, fail_after=None):
+        sink = report.open_report(str(out), "tsv", batch_size=1, append=resume)
+        validator = VCFValidator(
+            str(fasta), str(vcf), report=sink, checkpoint_every=50, resume=resume
+        )
+        if fail_after is not None:
+            original = validator._report_mismatch
+
+            def report_then_fail(mismatch):
+                original(mismatch)
+                if validator._mismatch_count == fail_after:
+                    raise Interrupted()
+
+            monkeypatch.setattr(validator, "_report_mismatch", report_then_fail)
+        validator.load_fasta()
+        try:
+            validator.validate()
+        finally:
+            sink.close()
+        return validator._variant_summary
+
+    expected_summary = validate(tmp_path / "full.tsv")
+    assert not os.path.exists(str(vcf) + ".checkpoint.json")
+    with pytest.raises(Interrupted):
+        validate(tmp_path / "resumed.tsv", fail_after=70)
+    assert os.path.exists(str(vcf) + ".checkpoint.json")
+    assert validate(tmp_path / "resumed.tsv", resume=True) == expected_summary
+    assert (tmp_path / "resumed.tsv").read_text() == (tmp_path / "full.tsv").read_text()
+    assert not os.path.exists(str(vcf) + ".checkpoint.json")
+
+
+def test_resume_refuses_other_inputs(tmp_path, sequences, monkeypatch):
+    from vcf_validator import VCFValidator
+
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    other = tmp_path / "other.fa"
+    write_fasta(other, {**sequences, "chr1": sequences["chr1"][::-1]})
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences)
+
+    def validate(reference, engine="python", resume=False, fail=False):
+        validator = VCFValidator(
+            str(reference), str(vcf), checkpoint_every=50, resume=resume
+        )
+        if fail:
+            original = validator._report_mismatch
+
+            def report_then_fail(mismatch):
+                original(mismatch)
+                if validator._mismatch_count == 70:
+                    raise Interrupted()
+
+            monkeypatch.setattr(validator, "_report_mismatch", report_then_fail)
+        validator.load_fasta()
+        validator.validate(engine)
+        return validator._variant_summary
+
+    with pytest.raises(Interrupted):
+        validate(fasta, fail=True)
+    with pytest.raises(ValueError, match="different reference"):
+        validate(other, resume=True)
+    with pytest.raises(ValueError, match="different engine"):
+        validate(fasta, engine="numpy", resume=True)
+    assert validate(fasta, resume=True) == validate(fasta)
+
+
+def test_synthetic_data_is_reproducible_and_counted(tmp_path):
+    sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+    from synthetic import SyntheticParams, generate
+
+    params = SyntheticParams(records=3000, contigs=2, contig_length=20000, seed=3)
+    stats = generate(str(tmp_path / "a"), params)
+    generate(str(tmp_path / "b"), params)
+    for name in ("reference.fasta", "variants.vcf"):
+        assert (tmp_path / "a" / name).read_bytes() == (
+            tmp_path / "b" / name
+        ).read_bytes()
+    result = subprocess.run(
+        [sys.executable, SCRIPT]
+        + [
+            str(tmp_path / "a" / "variants.vcf"),
+            str(tmp_path / "a" / "reference.fasta"),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert stats.mismatched_records > 0
+    assert result.stderr.count("Mismatch: ") == stats.mismatched_alleles
+
+
+def test_annotation_index_matches_linear_scan(tmp_path):
+    rng = random.Random(5)
+    features = []
+    for _ in range(500):
+        start = rng.randrange(0, 20000)
+        length = rng.choice([1, 10, 300, 5000])
+        kind = rng.choice(["gene", "exon", "CDS", "UTR"])
+        features.append(Feature("chr1", start, start + length, kind, "+", ".", {}))
+    index = AnnotationIndex.from_features(iter(features))
+    index.save(str(tmp_path / "features.idx"))
+    loaded = AnnotationIndex.load(str(tmp_path / "features.idx"))
+    for _ in range(300):
+        start = rng.randrange(0, 26000)
+        end = start + rng.choice([1, 3, 200])
+        expected = {f.type for f in features if f.start < end and start < f.end}
+        assert index.overlapping_types("chr1", start, end) == expected
+        assert loaded.overlapping_types("chr1", start, end) == expected
+    assert index.overlapping_types("chr2", 0, 10) == set()
+
+
+def test_annotation_index_file_is_rebuilt_when_malformed(tmp_path):
+    import struct
+
+    from annotation import INDEX_MAGIC, load_or_build_index
+
+    gff = tmp_path / "annotation.gff3"
+    gff.write_bytes(open(os.path.join(EXAMPLE_DIR, "annotation.gff3"), "rb").read())
+    index = load_or_build_index(str(gff))
+    idx = tmp_path / "annotation.gff3.idx"
+    data = idx.read_bytes()
+    assert not os.path.exists(str(idx) + ".tmp")
+    # Columns are little-endian: the first start follows the JSON header
+    (header_len,) = struct.unpack_from("<I", data, len(INDEX_MAGIC))
+    start = len(INDEX_MAGIC) + 4 + header_len
+    starts = sorted(f.start for f in read_gff3(str(gff)))
+    assert struct.unpack_from("<q", data, start)[0] == starts[0]
+
+    for damaged in (data[: len(data) // 2], data + b"\0", data[:20]):
+        idx.write_bytes(damaged)  # e.g. a write interrupted by an older version
+        with pytest.raises(ValueError, match="Malformed annotation index"):
+            AnnotationIndex.load(str(idx))
+        rebuilt = load_or_build_index(str(gff))
+        assert len(rebuilt) == len(index)
+        assert idx.read_bytes() == data
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_cli_annotation_summary(tmp_path, jobs):
+    gff = tmp_path / "annotation.gff3"
+    gff.write_bytes(open(os.path.join(EXAMPLE_DIR, "annotation.gff3"), "rb").read())
+    command = [
+        sys.executable,
+        SCRIPT,
+        os.path.join(EXAMPLE_DIR, "variants.vcf"),
+        os.path.join(EXAMPLE_DIR, "reference.fasta"),
+        "--annotation",
+        str(gff),
+        "--jobs",
+        jobs,
+    ]
+    for _ in range(2):  # the second run loads the saved index
+        result = subprocess.run(command, capture_output=True, text=True)
+        assert result.returncode == 0
+        summary = json.loads(result.stderr.split("Variant type summary: ")[-1])
+        assert summary["overlaps_CDS"] == 11
+        assert summary["overlaps_three_prime_UTR"] == 2
+        assert summary["intergenic"] == 1
+        assert os.path.exists(str(gff) + ".idx")
+
+
+def test_consequences_translate_and_mirror_minus_strand():
+    table = load_genetic_code(os.path.join(EXAMPLE_DIR, "genetic_code.tsv"))
+    reference = InMemoryReference.from_fasta(
+        os.path.join(EXAMPLE_DIR, "reference.fasta")
+    )
+    features = list(read_gff3(os.path.join(EXAMPLE_DIR, "annotation.gff3")))
+    plus = ConsequenceIndex.from_features(features, reference, table)
+    with open(os.path.join(EXAMPLE_DIR, "toy_protein.fasta")) as f:
+        assert plus.transcripts[0].protein.decode() == f.read().split()[-1]
+
+    # The same transcript on the reverse strand of the reverse-complemented contig
+    seq = reference.fetch("chrToy", 0, 10**6)
+    length = len(seq)
+    complement = str.maketrans("ACGTN", "TGCAN")
+    mirrored = InMemoryReference({"chrToy": seq.translate(complement)[::-1]})
+    minus = ConsequenceIndex.from_features(
+        [
+            f._replace(start=length - f.end, end=length - f.start, strand="-")
+            for f in features
+        ],
+        mirrored,
+        table,
+    )
+    assert minus.transcripts[0].protein == plus.transcripts[0].protein
+
+    rng = random.Random(3)
+    for pos in range(190, 570):
+        alt = rng.choice([b for b in "ACGT" if b != seq[pos - 1]])
+        assert minus.classify(
+            "chrToy", length - pos + 1, "N", alt.translate(complement)
+        ) == plus.classify("chrToy", pos, "N", alt)
+    assert plus.classify("chrToy", 250, "A", "ATT") == "frameshift"
+    assert plus.classify("chrToy", 250, "AGGT", "A") == "inframe_indel"
+    assert plus.classify("chrToy", 150, "A", "G") is None
+    assert plus.classify("chrToy", 250, "A", "<DEL>") is None
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_cli_consequence_summary(tmp_path, jobs):
+    gff = tmp_path / "annotation.gff3"
+    gff.write_bytes(open(os.path.join(EXAMPLE_DIR, "annotation.gff3"), "rb").read())
+    command = [
+        sys.executable,
+        SCRIPT,
+        os.path.join(EXAMPLE_DIR, "variants.vcf"),
+        os.path.join(EXAMPLE_DIR, "reference.fasta"),
+        "--annotation",
+        str(gff),
+        "--consequences",
+        os.path.join(EXAMPLE_DIR, "genetic_code.tsv"),
+        "--jobs",
+        jobs,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    assert result.returncode == 0
+    summary = json.loads(result.stderr.split("Variant type summary: ")[-1])
+    assert {
+        key: summary[key]
+        for key in (
+            "synonymous",
+            "missense",
+            "stop_lost",
+            "inframe_indel",
+            "frameshift",
+        )
+    } == {
+        "synonymous": 3,
+        "missense": 5,
+        "stop_lost": 1,
+        "inframe_indel": 1,
+        "frameshift": 2,
+    }
+    result = subprocess.run(command[:4] + command[6:8], capture_output=True)
+    assert result.returncode != 0
+
+
+def test_validation_cache_reuses_unchanged_blocks(tmp_path, sequences, caplog):
+    import logging
+    import sqlite3
+
+    from cache import ValidationCache
+    from vcf_validator import VCFValidator
+
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences, records=2000)
+    db = str(tmp_path / "cache.sqlite")
+
+    def validate(cache):
+        out = tmp_path / "mismatches.tsv"
+        with report.open_report(str(out)) as sink:
+            validator = VCFValidator(str(fasta), str(vcf), report=sink, cache=cache)
+            validator.load_fasta()
+            validator.validate()
+        if cache is not None:
+            cache.close()
+        return validator._variant_summary, out.read_text()
+
+    caplog.set_level(logging.DEBUG, logger="VCFValidator")
+    expected = validate(None)
+    assert validate(ValidationCache(db, block_lines=32)) == expected
+    assert validate(ValidationCache(db, block_lines=32)) == expected
+    reused, blocks = map(int, caplog.messages[-1].split()[1:4:2])
+    assert reused == blocks > 10
+
+    # Change one record: only the blocks around it are validated again
+    lines = vcf.read_text().splitlines(keepends=True)
+    fields = lines[1000].split("\t")
+    fields[3] = "T" + fields[3]
+    lines[1000] = "\t".join(fields)
+    vcf.write_text("".join(lines))
+    expected = validate(None)
+    assert validate(ValidationCache(db, block_lines=32)) == expected
+    reused, blocks = map(int, caplog.messages[-1].split()[1:4:2])
+    assert blocks - 2 <= reused < blocks
+
+    # A size limit below one block evicts everything on close
+    validate(ValidationCache(db, max_bytes=1, block_lines=32))
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM blocks").fetchone() == (0,)
+
+
+def test_validation_cache_concurrent_runs_and_locks(tmp_path, monkeypatch):
+    import sqlite3
+
+    import cache
+    from cache import CachedBlock, ValidationCache
+
+    db = str(tmp_path / "cache.sqlite")
+    block = CachedBlock({"snv": 1}, [["chr1", 5, ".", "A", "C", "G"]])
+    # Two runs at once: each block is committed as it is stored
+    first, second = ValidationCache(db), ValidationCache(db)
+    first.put(b"a", block)
+    second.put(b"b", block)
+    assert second.get(b"a") == first.get(b"b") == (block.summary, [tuple(block[1][0])])
+    first.close()
+    second.close()
+    assert first.error is second.error is None
+
+    # A lock held past the busy timeout disables the cache instead of failing
+    monkeypatch.setattr(cache, "BUSY_TIMEOUT", 0.1)
+    locked = ValidationCache(db)
+    holder = sqlite3.connect(db)
+    holder.execute("BEGIN EXCLUSIVE")
+    locked.put(b"c", block)
+    assert locked.error is not None and "locked" in locked.error
+    assert locked.get(b"a") is None
+    locked.close()
+    holder.rollback()
+    holder.close()
+
+
+def test_validation_cache_key_includes_contig_aliases(tmp_path, sequences):
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences)
+    lines = vcf.read_text().splitlines(keepends=True)
+    vcf.write_text(
+        lines[0]
+        + "##contig=<ID=1,length=1000>\n##contig=<ID=chr2>\n##contig=<ID=chr3>\n"
+        + "".join(line.replace("chr1\t", "1\t") for line in lines[1:])
+    )
+    cache_options = ["--cache", str(tmp_path / "cache.sqlite")]
+
+    def run(*options):
+        return subprocess.run(
+            [sys.executable, SCRIPT, str(vcf), str(fasta), *cache_options, *options],
+            capture_output=True,
+            text=True,
+        )
+
+    assert run().returncode == 0
+    # Without preflight there is no alias, so the cached blocks do not apply
+    result = run("--no-preflight")
+    assert result.returncode == 1
+    assert "Reference chromosome '1' not found" in result.stderr
+
+
+def test_preflight_contig_headers(tmp_path, sequences):
+    import hashlib
+
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    vcf = tmp_path / "calls.vcf"
+    write_vcf(vcf, sequences)
+    records = vcf.read_text().splitlines(keepends=True)[2:]
+    md5 = hashlib.md5(sequences["chr2"].upper().encode()).hexdigest()
+
+    def run(headers, records, *options):
+        renamed = tmp_path / "renamed.vcf"
+        renamed.write_text(
+            "##fileformat=VCFv4.2\n"
+            + "".join(f"##contig=<{h}>\n" for h in headers)
+            + "#CHROM\tPOS\tID\tREF\tALT\n"
+            + "".join(records)
+        )
+        return subprocess.run(
+            [sys.executable, SCRIPT, str(renamed), str(fasta), *options],
+            capture_output=True,
+            text=True,
+        )
+
+    expected = run([], records)
+    assert expected.returncode == 0
+    # chr1 as "1", chr2 by MD5 under an unrelated name
+    aliased = [
+        line.replace("chr1\t", "1\t").replace("chr2\t", "NC_2\t") for line in records
+    ]
+    headers = [
+        "ID=1,length=1000",
+        f'ID=NC_2,length=61,md5={md5},assembly="toy, v1"',
+        "ID=chr3,length=7",
+    ]
+    for jobs in ("1", "2"):
+        result = run(headers, aliased, "--jobs", jobs)
+        assert result.returncode == 0
+        assert "VCF contig 'NC_2' is 'chr2' in the reference" in result.stderr
+        assert [
+            line.replace(": 1\t", ": chr1\t").replace(": NC_2\t", ": chr2\t")
+            for line in result.stderr.splitlines()
+            if line.startswith("WARNING")
+        ] == [
+            line for line in expected.stderr.splitlines() if line.startswith("WARNING")
+        ]
+    assert os.path.exists(str(fasta) + ".manifest.json")
+
+    result = run(["ID=chr1,length=999", "ID=chrX"], records)
+    assert result.returncode == 1
+    assert "Mismatch" not in result.stderr
+    assert "'chr1' has length 999 in the VCF but 1000" in result.stderr
+    # Header contigs no record uses (e.g. decoys) are only reported
+    result = run(["ID=chr1", "ID=chrX", "ID=chrUn_decoy"], records)
+    assert result.returncode == 0
+    assert "not in reference" in result.stderr and "chrX, chrUn_decoy" in result.stderr
+    assert result.stdout == expected.stdout
+    # Records on such a contig still fail
+    result = run(["ID=chrX"], records + ["chrX\t5\tx\tA\tC\n"])
+    assert result.returncode == 1
+    assert "Reference chromosome 'chrX' not found" in result.stderr
+
+
+def test_manifest_twobit_iupac_and_read_only_fallback(tmp_path, monkeypatch):
+    import hashlib
+
+    import manifest
+
+    sequences = {"chr1": "ACGTRYACGT" * 20, "chr2": "ACGT" * 30}
+    fasta = tmp_path / "ref.fa"
+    write_fasta(fasta, sequences)
+    md5 = {
+        name: hashlib.md5(seq.encode()).hexdigest() for name, seq in sequences.items()
+    }
+    twobit = tmp_path / "ref.2bit"
+    packed = subprocess.run(
+        [sys.executable, SCRIPT, "pack-reference", str(fasta), "-o", str(twobit)],
+        capture_output=True,
+        text=True,
+    )
+    assert packed.returncode == 0
+    # pack-reference saves the FASTA's MD5s; the 2bit file alone lost R and Y
+    saved = manifest.load_or_build_manifest(str(twobit), twobit=True)
+    assert {c.name: c.md5 for c in saved} == md5
+    rebuilt = manifest.build_manifest(str(twobit), twobit=True)
+    assert {c.name: c.md5 for c in rebuilt} == {"chr1": None, "chr2": md5["chr2"]}
+    header = [manifest.ContigInfo("chr1", 200, md5["chr1"])]
+    assert manifest.match_contigs(header, rebuilt) == ({}, [], [])
+
+    # A reference directory that cannot be written to
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    monkeypatch.setattr(
+        manifest,
+        "manifest_path_for",
+        lambda path: str(blocker / (os.path.basename(path) + ".manifest.json")),
+    )
+    assert manifest.load_or_build_manifest(str(fasta)) == manifest.build_manifest(
+        str(fasta)
+    )
+    assert os.path.exists(manifest.user_manifest_path(str(fasta)))
+
+    def rebuild(*args):
+        raise AssertionError("manifest rebuilt")
+
+    monkeypatch.setattr(manifest, "build_manifest", rebuild)
+    assert {c.md5 for c in manifest.load_or_build_manifest(str(fasta))} == set(
+        md5.values()
+    )
+
+
+def test_annotation_and_consequences_follow_contig_aliases(tmp_path):
+    gff = tmp_path / "annotation.gff3"
+    gff.write_bytes(open(os.path.join(EXAMPLE_DIR, "annotation.gff3"), "rb").read())
+    with open(os.path.join(EXAMPLE_DIR, "variants.vcf")) as f:
+        renamed = f.read().replace("chrToy", "Toy")
+    vcf = tmp_path / "renamed.vcf"
+    vcf.write_text(renamed)
+
+    def summary(vcf_path, gff_path):
+        result = subprocess.run(
+            [
+                sys.executable,
+                SCRIPT,
+                str(vcf_path),
+                os.path.join(EXAMPLE_DIR, "reference.fasta"),
+                "--annotation",
+                str(gff_path),
+                "--consequences",
+                os.path.join(EXAMPLE_DIR, "genetic_code.tsv"),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0
+        counts = json.loads(result.stderr.split("Variant type summary: ")[-1])
+        return counts, result.stderr
+
+    expected, _ = summary(os.path.join(EXAMPLE_DIR, "variants.vcf"), gff)
+    aliased, _ = summary(vcf, gff)
+    assert aliased == expected
+    assert aliased["overlaps_CDS"] == 11 and aliased["missense"] == 5
+
+    other = tmp_path / "other.gff3"
+    other.write_text(gff.read_text().replace("chrToy", "scaffold_9"))
+    counts, stderr = summary(vcf, other)
+    assert (
+        "No contig of" in stderr and "every record will count as intergenic" in stderr
+    )
+    assert "overlaps_CDS" not in counts
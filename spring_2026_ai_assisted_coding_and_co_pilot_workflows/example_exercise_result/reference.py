@@ -0,0 +1,681 @@
+"""
+Reference backends: Serve reference sequence slices to the VCFValidator.
+
+Three backends are provided:
+
+- `InMemoryReference` reads the whole FASTA into a dictionary of strings (the
+  original behaviour; simple, but memory grows with the genome).
+- `IndexedFastaReference` uses a samtools-compatible `.fai` index (plus a `.gzi`
+  index for bgzipped FASTA) and seeks straight to the bytes needed for each slice,
+  so memory use stays near-constant and startup only reads the index.
+- `TwoBitReference` memory-maps a UCSC `.2bit` file (2 bits per base plus N and
+  soft-mask run tables) written once by `pack_fasta_to_twobit`; processes share the
+  mapped pages and a lookup decodes only the bytes it needs.
+"""
+
+import bisect
+import gzip
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from abc import ABC, abstractmethod
+from array import array
+from typing import (
+    Any,
+    BinaryIO,
+    Container,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+import bgzf
+
+
+class ReferenceBackend(ABC):
+    """
+    Interface for looking up reference sequence by contig and 0-based coordinates.
+    """
+
+    # Names added by `add_aliases`, left out of `contig_lengths`
+    _aliases: frozenset = frozenset()
+
+    @abstractmethod
+    def __contains__(self, chrom: str) -> bool:
+        """Return True if `chrom` is present in the reference."""
+
+    @abstractmethod
+    def fetch(self, chrom: str, start: int, end: int) -> str:
+        """
+        Return the reference sequence for the 0-based, half-open interval [start, end).
+
+        Like string slicing, the interval is clipped to the contig length.
+
+        Args:
+            chrom (str): Contig name.
+            start (int): 0-based start position.
+            end (int): 0-based exclusive end position.
+
+        Returns:
+            str: The reference bases.
+        """
+
+    @abstractmethod
+    def contig_lengths(self) -> Dict[str, int]:
+        """Return a mapping of contig name to sequence length, in FASTA order."""
+
+    @abstractmethod
+    def _contig_table(self) -> Dict[str, Any]:
+        """Return the dictionary the backend looks contigs up in, keyed by name."""
+
+    def add_aliases(self, aliases: Dict[str, str]) -> None:
+        """
+        Let contigs also be looked up by other names, e.g. "1" for "chr1".
+
+        Aliases are entered in the backend's contig table, so a lookup by alias costs
+        the same as one by the reference name. Aliases of contigs that are not
+        loaded, or that clash with existing names, are ignored.
+
+        Args:
+            aliases (Dict[str, str]): Alias -> reference contig name.
+        """
+        table = self._contig_table()
+        added = set()
+        for alias, name in aliases.items():
+            if name in table and alias not in table:
+                table[alias] = table[name]
+                added.add(alias)
+        self._aliases = self._aliases | added
+
+    def close(self) -> None:
+        """Release any open file handles."""
+
+
+class InMemoryReference(ReferenceBackend):
+    """
+    Reference held entirely in memory as one string per contig.
+    """
+
+    def __init__(self, sequences: Dict[str, str]) -> None:
+        self._sequences = sequences
+
+    @classmethod
+    def from_fasta(
+        cls, fasta_path: str, contigs: Optional[Container[str]] = None
+    ) -> "InMemoryReference":
+        """
+        Load a FASTA file into memory.
+
+        Args:
+            fasta_path (str): Path to the reference FASTA file.
+            contigs (Optional[Container[str]]): If given, only keep these contigs.
+
+        Returns:
+            InMemoryReference: The loaded reference.
+
+        Raises:
+            RuntimeError: If the FASTA file cannot be opened.
+            ValueError: If the FASTA file is empty or malformed.
+        """
+        sequences = {}
+        try:
+            with open(fasta_path) as f:
+                chrom = None
+                keep = False
+                seq = []
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue  # skip blank lines
+
+                    # Start of a new sequence record
+                    if line.startswith(">"):
+                        if chrom and keep:
+                            # Save the previous chromosome's sequence
+                            sequences[chrom] = "".join(seq)
+                        chrom = line[1:].split()[0]
+                        keep = contigs is None or chrom in contigs
+                        seq = []
+                    elif chrom is None:
+                        # Sequence data before any header is invalid
+                        raise ValueError(
+                            f"Invalid FASTA format: sequence data before header in {fasta_path}"
+                        )
+                    elif keep:
+                        # Accumulate sequence lines for the current chromosome
+                        seq.append(line)
+                # Save the last chromosome's sequence
+                if chrom and keep:
+                    sequences[chrom] = "".join(seq)
+        except OSError as e:
+            raise RuntimeError(f"Error opening FASTA file '{fasta_path}': {e}")
+        if not sequences and contigs is None:
+            raise ValueError(f"No sequences found in FASTA file '{fasta_path}'")
+        return cls(sequences)
+
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._sequences
+
+    def fetch(self, chrom: str, start: int, end: int) -> str:
+        return self._sequences[chrom][start:end]
+
+    def contig_lengths(self) -> Dict[str, int]:
+        return {
+            chrom: len(seq)
+            for chrom, seq in self._sequences.items()
+            if chrom not in self._aliases
+        }
+
+    def _contig_table(self) -> Dict[str, str]:
+        return self._sequences
+
+
+class FaiEntry(NamedTuple):
+    """One line of a samtools `.fai` index."""
+
+    name: str
+    length: int
+    offset: int
+    line_bases: int
+    line_width: int
+
+
+def _scan_fai_entries(lines: Iterable[bytes], fasta_path: str) -> List[FaiEntry]:
+    """
+    Build `.fai` entries from the (uncompressed) lines of a FASTA file.
+
+    Args:
+        lines (Iterable[bytes]): FASTA lines including their line terminators.
+        fasta_path (str): Path used in error messages.
+
+    Returns:
+        List[FaiEntry]: One entry per sequence record.
+
+    Raises:
+        ValueError: If the FASTA is malformed or has inconsistent line lengths.
+    """
+    entries: List[FaiEntry] = []
+    name: Optional[str] = None
+    offset = length = line_bases = line_width = 0
+    short_line_seen = False
+    position = 0
+
+    def finish() -> None:
+        if name is not None:
+            entries.append(FaiEntry(name, length, offset, line_bases, line_width))
+
+    for line in lines:
+        line_start = position
+        position += len(line)
+        if line.startswith(b">"):
+            finish()
+            header = line[1:].split()
+            if not header:
+                raise ValueError(f"Invalid FASTA format: empty header in {fasta_path}")
+            name = header[0].decode()
+            offset = position
+            length = line_bases = line_width = 0
+            short_line_seen = False
+            continue
+        bases = len(line.rstrip(b"\r\n"))
+        if bases == 0:
+            # No sequence, but it breaks the fixed layout: only the end may follow
+            short_line_seen = short_line_seen or line_bases > 0
+            continue
+        if name is None:
+            raise ValueError(
+                f"Invalid FASTA format: sequence data before header in {fasta_path}"
+            )
+        if line_bases == 0:
+            offset, line_bases, line_width = line_start, bases, len(line)
+        elif short_line_seen or bases > line_bases:
+            # Only the final line of a record may be shorter than the rest
+            raise ValueError(
+                f"Cannot index FASTA '{fasta_path}': inconsistent line length in "
+                f"'{name}' near byte {line_start}"
+            )
+        elif bases < line_bases:
+            short_line_seen = True
+        length += bases
+    finish()
+    if not entries:
+        raise ValueError(f"No sequences found in FASTA file '{fasta_path}'")
+    return entries
+
+
+def read_fai(fai_path: str) -> List[FaiEntry]:
+    """
+    Read a samtools `.fai` index.
+
+    Raises:
+        ValueError: If a line does not have the five expected columns.
+    """
+    entries = []
+    with open(fai_path) as f:
+        for lineno, line in enumerate(f, 1):
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 5:
+                raise ValueError(f"Malformed FASTA index line {lineno} in '{fai_path}'")
+            entries.append(FaiEntry(fields[0], *(int(v) for v in fields[1:5])))
+    return entries
+
+
+def write_fai(fai_path: str, entries: Iterable[FaiEntry]) -> None:
+    """Write a samtools-compatible `.fai` index."""
+    with open(fai_path, "w") as f:
+        for entry in entries:
+            f.write("\t".join(str(v) for v in entry) + "\n")
+
+
+def _is_fresh(index_path: str, data_path: str) -> bool:
+    return os.path.exists(index_path) and os.path.getmtime(
+        index_path
+    ) >= os.path.getmtime(data_path)
+
+
+class IndexedFastaReference(ReferenceBackend):
+    """
+    Reference served by seeking into a FASTA (plain or bgzipped) using its `.fai` index.
+
+    An existing, up-to-date `<fasta>.fai` (and `<fasta>.gzi` for bgzipped input) is
+    reused; otherwise the indexes are built with one pass over the file and saved next
+    to it when the location is writable.
+    """
+
+    def __init__(self, fasta_path: str) -> None:
+        """
+        Args:
+            fasta_path (str): Path to the reference FASTA file (optionally bgzipped).
+
+        Raises:
+            RuntimeError: If the FASTA file cannot be opened.
+            ValueError: If the FASTA cannot be indexed.
+        """
+        self._fasta_path = fasta_path
+        try:
+            if bgzf.is_bgzf(fasta_path):
+                self._bgzf: Optional[bgzf.BgzfReader] = bgzf.BgzfReader(
+                    fasta_path, bgzf.load_or_build_gzi(fasta_path)
+                )
+                self._fh = None
+            else:
+                self._bgzf = None
+                self._fh = open(fasta_path, "rb")
+            self._index = {e.name: e for e in self._load_or_build_fai()}
+        except OSError as e:
+            raise RuntimeError(f"Error opening FASTA file '{fasta_path}': {e}")
+
+    def _iter_lines(self) -> Iterable[bytes]:
+        if self._bgzf is None:
+            with open(self._fasta_path, "rb") as f:
+                yield from f
+        else:
+            with gzip.open(self._fasta_path, "rb") as f:
+                yield from f
+
+    def _load_or_build_fai(self) -> List[FaiEntry]:
+        fai_path = self._fasta_path + ".fai"
+        if _is_fresh(fai_path, self._fasta_path):
+            return read_fai(fai_path)
+        entries = _scan_fai_entries(self._iter_lines(), self._fasta_path)
+        try:
+            write_fai(fai_path, entries)
+        except OSError:
+            pass  # read-only location; keep the index in memory only
+        return entries
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self._bgzf is not None:
+            return self._bgzf.read_at(offset, length)
+        self._fh.seek(offset)
+        return self._fh.read(length)
+
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._index
+
+    def fetch(self, chrom: str, start: int, end: int) -> str:
+        entry = self._index[chrom]
+        start = max(0, start)
+        end = min(end, entry.length)
+        if start >= end:
+            return ""
+        # Translate base coordinates to byte offsets, accounting for line breaks
+        first = entry.offset + (start // entry.line_bases) * entry.line_width
+        first += start % entry.line_bases
+        last = entry.offset + ((end - 1) // entry.line_bases) * entry.line_width
+        last += (end - 1) % entry.line_bases
+        raw = self._read(first, last - first + 1)
+        return raw.replace(b"\n", b"").replace(b"\r", b"").decode("ascii")
+
+    def contig_lengths(self) -> Dict[str, int]:
+        return {
+            name: entry.length
+            for name, entry in self._index.items()
+            if name not in self._aliases
+        }
+
+    def _contig_table(self) -> Dict[str, FaiEntry]:
+        return self._index
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        if self._bgzf is not None:
+            self._bgzf.close()
+
+
+class _TwoBitRecord(NamedTuple):
+    """Per-sequence header of a `.2bit` file (block tables are 0-based starts/sizes)."""
+
+    dna_size: int
+    n_starts: array
+    n_sizes: array
+    mask_starts: array
+    mask_sizes: array
+    dna_offset: int
+
+
+TWOBIT_SIGNATURE = 0x1A412743
+# UCSC packing: T=0, C=1, A=2, G=3, first base in the most significant bits
+_TWOBIT_BASES = "TCAG"
+# Translation table from FASTA bytes to base-4 digits (anything but ACGT packs as T)
+_TWOBIT_DIGITS = bytearray(b"0" * 256)
+for _code, _base in enumerate(_TWOBIT_BASES):
+    _TWOBIT_DIGITS[ord(_base)] = _TWOBIT_DIGITS[ord(_base.lower())] = ord(str(_code))
+_TWOBIT_DIGITS = bytes(_TWOBIT_DIGITS)
+_TWOBIT_BYTE_TO_BASES = [
+    "".join(_TWOBIT_BASES[(b >> shift) & 3] for shift in (6, 4, 2, 0))
+    for b in range(256)
+]
+_NON_ACGT_RUN = re.compile(rb"[^ACGTacgt]+")
+_LOWERCASE_RUN = re.compile(rb"[a-z]+")
+
+
+def _add_run(starts: List[int], sizes: List[int], start: int, size: int) -> None:
+    """Append a run to a block table, merging it with the previous run if adjacent."""
+    if starts and starts[-1] + sizes[-1] == start:
+        sizes[-1] += size
+    else:
+        starts.append(start)
+        sizes.append(size)
+
+
+def _uint32_le(values: List[int]) -> bytes:
+    """Serialize a list of integers as little-endian uint32."""
+    table = array("I", values)
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table.tobytes()
+
+
+def _open_fasta_binary(fasta_path: str) -> BinaryIO:
+    """Open a plain or gzip/bgzip-compressed FASTA for reading bytes."""
+    with open(fasta_path, "rb") as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(fasta_path, "rb")
+    return open(fasta_path, "rb")
+
+
+def pack_fasta_to_twobit(fasta_path: str, twobit_path: str) -> Dict[str, int]:
+    """
+    Convert a FASTA file into a UCSC-compatible `.2bit` file.
+
+    Bases are packed four per byte; runs of non-ACGT bases are recorded in the N-block
+    table (and read back as "N") and runs of lowercase bases in the soft-mask table.
+    Only the block tables of one contig are held in memory at a time.
+
+    Args:
+        fasta_path (str): Path to the FASTA file (plain, gzip or bgzip).
+        twobit_path (str): Path of the `.2bit` file to write.
+
+    Returns:
+        Dict[str, int]: Contig lengths, in FASTA order.
+
+    Raises:
+        RuntimeError: If a file cannot be opened or written.
+        ValueError: If the FASTA file is empty or malformed.
+    """
+    records = []
+    try:
+        with _open_fasta_binary(fasta_path) as fasta, tempfile.TemporaryFile() as packed:
+
+            def finish_pending(record: dict, flush_all: bool) -> None:
+                pending = record["pending"]
+                n = len(pending) if flush_all else len(pending) - len(pending) % 4
+                if n == 0:
+                    return
+                chunk = pending[:n] + b"0" * (-n % 4)
+                packed.write(int(chunk, 4).to_bytes(len(chunk) // 4, "big"))
+                record["pending"] = pending[n:]
+
+            record = None
+            for line in fasta:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith(b">"):
+                    if record is not None:
+                        finish_pending(record, flush_all=True)
+                    record = {
+                        "name": line[1:].split()[0].decode(),
+                        "size": 0,
+                        "n": ([], []),
+                        "mask": ([], []),
+                        "pending": b"",
+                        "packed_offset": packed.tell(),
+                    }
+                    records.append(record)
+                    continue
+                if record is None:
+                    raise ValueError(
+                        f"Invalid FASTA format: sequence data before header in {fasta_path}"
+                    )
+                offset = record["size"]
+                for match in _NON_ACGT_RUN.finditer(line):
+                    _add_run(*record["n"], offset + match.start(), len(match.group()))
+                for match in _LOWERCASE_RUN.finditer(line):
+                    _add_run(*record["mask"], offset + match.start(), len(match.group()))
+                record["size"] += len(line)
+                record["pending"] += line.translate(_TWOBIT_DIGITS)
+                if len(record["pending"]) >= 1 << 16:
+                    finish_pending(record, flush_all=False)
+            if record is not None:
+                finish_pending(record, flush_all=True)
+            if not records:
+                raise ValueError(f"No sequences found in FASTA file '{fasta_path}'")
+
+            # Header and index come first, so offsets are computed before writing
+            offset = 16 + sum(5 + len(r["name"].encode()) for r in records)
+            for r in records:
+                r["offset"] = offset
+                offset += 16 + 8 * (len(r["n"][0]) + len(r["mask"][0])) + (r["size"] + 3) // 4
+            if offset > 0xFFFFFFFF:
+                raise ValueError(
+                    f"Reference '{fasta_path}' is too large for a version 0 .2bit file"
+                )
+
+            with open(twobit_path, "wb") as out:
+                out.write(struct.pack("<4I", TWOBIT_SIGNATURE, 0, len(records), 0))
+                for r in records:
+                    name = r["name"].encode()
+                    out.write(struct.pack("<B", len(name)) + name + struct.pack("<I", r["offset"]))
+                for r in records:
+                    out.write(struct.pack("<2I", r["size"], len(r["n"][0])))
+                    for table in r["n"]:
+                        out.write(_uint32_le(table))
+                    out.write(struct.pack("<I", len(r["mask"][0])))
+                    for table in r["mask"]:
+                        out.write(_uint32_le(table))
+                    out.write(struct.pack("<I", 0))
+                    packed.seek(r["packed_offset"])
+                    remaining = (r["size"] + 3) // 4
+                    while remaining:
+                        chunk = packed.read(min(remaining, 1 << 20))
+                        out.write(chunk)
+                        remaining -= len(chunk)
+    except OSError as e:
+        raise RuntimeError(f"Error converting FASTA file '{fasta_path}' to 2bit: {e}")
+    return {r["name"]: r["size"] for r in records}
+
+
+class TwoBitReference(ReferenceBackend):
+    """
+    Reference served from a memory-mapped UCSC `.2bit` file.
+
+    The file is mapped read-only, so concurrent validator processes share the same
+    page-cache pages, and a lookup only decodes the few packed bytes it covers.
+    Opening reads just the sequence index; per-contig block tables are read on first
+    use. Non-ACGT bases are returned as "N" (IUPAC ambiguity codes are not kept by
+    the format) and soft-masked bases as lowercase.
+    """
+
+    def __init__(self, twobit_path: str) -> None:
+        """
+        Args:
+            twobit_path (str): Path to the `.2bit` file (see `pack_fasta_to_twobit`).
+
+        Raises:
+            RuntimeError: If the file cannot be opened.
+            ValueError: If the file is not a version 0 `.2bit` file.
+        """
+        try:
+            with open(twobit_path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Error opening 2bit file '{twobit_path}': {e}")
+        if len(self._mm) < 16:
+            raise ValueError(f"Not a 2bit file: '{twobit_path}'")
+        for order in "<>":
+            signature, version, count, _ = struct.unpack_from(f"{order}4I", self._mm, 0)
+            if signature == TWOBIT_SIGNATURE:
+                break
+        else:
+            raise ValueError(f"Not a 2bit file: '{twobit_path}'")
+        if version != 0:
+            raise ValueError(f"Unsupported 2bit version {version} in '{twobit_path}'")
+        self._order = order
+        self._offsets: Dict[str, int] = {}
+        pos = 16
+        for _ in range(count):
+            name_size = self._mm[pos]
+            name = self._mm[pos + 1 : pos + 1 + name_size].decode()
+            (self._offsets[name],) = struct.unpack_from(
+                f"{order}I", self._mm, pos + 1 + name_size
+            )
+            pos += 5 + name_size
+        self._records: Dict[str, _TwoBitRecord] = {}
+
+    def _table(self, pos: int, count: int) -> array:
+        values = array("I", self._mm[pos : pos + 4 * count])
+        if (self._order == "<") != (sys.byteorder == "little"):
+            values.byteswap()
+        return values
+
+    def _record(self, chrom: str) -> _TwoBitRecord:
+        record = self._records.get(chrom)
+        if record is None:
+            pos = self._offsets[chrom]
+            dna_size, n_count = struct.unpack_from(f"{self._order}2I", self._mm, pos)
+            pos += 8
+            n_starts = self._table(pos, n_count)
+            n_sizes = self._table(pos + 4 * n_count, n_count)
+            pos += 8 * n_count
+            (mask_count,) = struct.unpack_from(f"{self._order}I", self._mm, pos)
+            pos += 4
+            mask_starts = self._table(pos, mask_count)
+            mask_sizes = self._table(pos + 4 * mask_count, mask_count)
+            pos += 8 * mask_count + 4  # skip the reserved word
+            record = _TwoBitRecord(
+                dna_size, n_starts, n_sizes, mask_starts, mask_sizes, pos
+            )
+            self._records[chrom] = record
+        return record
+
+    def has_n_blocks(self, chrom: str) -> bool:
+        """
+        Whether a contig has non-ACGT bases, which read back as "N" whatever they
+        were in the FASTA (so its sequence MD5 may differ from the FASTA's).
+        """
+        return len(self._record(chrom).n_starts) > 0
+
+    @staticmethod
+    def _overlaps(starts: array, sizes: array, start: int, end: int):
+        """Yield the parts of [start, end) covered by a block table, relative to start."""
+        i = max(bisect.bisect_right(starts, start) - 1, 0)
+        while i < len(starts) and starts[i] < end:
+            lo = max(starts[i], start)
+            hi = min(starts[i] + sizes[i], end)
+            if lo < hi:
+                yield lo - start, hi - start
+            i += 1
+
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._offsets
+
+    def fetch(self, chrom: str, start: int, end: int) -> str:
+        record = self._record(chrom)
+        start = max(0, start)
+        end = min(end, record.dna_size)
+        if start >= end:
+            return ""
+        first = start // 4
+        packed = self._mm[record.dna_offset + first : record.dna_offset + (end + 3) // 4]
+        seq = "".join([_TWOBIT_BYTE_TO_BASES[b] for b in packed])
+        seq = seq[start - 4 * first : end - 4 * first]
+        for lo, hi in self._overlaps(record.n_starts, record.n_sizes, start, end):
+            seq = seq[:lo] + "N" * (hi - lo) + seq[hi:]
+        for lo, hi in self._overlaps(record.mask_starts, record.mask_sizes, start, end):
+            seq = seq[:lo] + seq[lo:hi].lower() + seq[hi:]
+        return seq
+
+    def contig_lengths(self) -> Dict[str, int]:
+        return {
+            name: self._record(name).dna_size
+            for name in self._offsets
+            if name not in self._aliases
+        }
+
+    def _contig_table(self) -> Dict[str, int]:
+        return self._offsets
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+REFERENCE_BACKENDS = ("memory", "indexed", "twobit")
+
+
+def open_reference(
+    fasta_path: str, backend: str = "memory", contigs: Optional[Container[str]] = None
+) -> ReferenceBackend:
+    """
+    Open a reference FASTA with the requested backend.
+
+    Args:
+        fasta_path (str): Path to the reference FASTA file (a `.2bit` file for the
+            "twobit" backend).
+        backend (str): One of `REFERENCE_BACKENDS`.
+        contigs (Optional[Container[str]]): Contigs the caller will look up. The memory
+            backend loads only these; the others read contigs lazily and ignore it.
+
+    Returns:
+        ReferenceBackend: The opened reference.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend == "memory":
+        return InMemoryReference.from_fasta(fasta_path, contigs)
+    if backend == "indexed":
+        return IndexedFastaReference(fasta_path)
+    if backend == "twobit":
+        return TwoBitReference(fasta_path)
+    raise ValueError(
+        f"Unknown reference backend '{backend}'; expected one of {REFERENCE_BACKENDS}"
+    )
@@ -0,0 +1,151 @@
+"""
+Regions: Parse `chr:start-end` strings and BED files into a searchable set of intervals.
+
+Intervals are stored 0-based and half-open, merged and sorted per contig, so testing
+whether a VCF record overlaps any target is a binary search.
+"""
+
+import bisect
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+_REGION_RE = re.compile(
+    r"^(?P<chrom>[^:]+)(?::(?P<start>[\d,]+)?(?:-(?P<end>[\d,]+)?)?)?$"
+)
+# Large enough to cover any contig (htslib uses the same kind of sentinel)
+MAX_COORDINATE = 1 << 62
+
+
+class Region(NamedTuple):
+    """A 0-based, half-open interval on a contig."""
+
+    chrom: str
+    start: int
+    end: int
+
+
+def parse_region(text: str) -> Region:
+    """
+    Parse a samtools-style region string.
+
+    Accepts `chr`, `chr:start`, `chr:start-end` and `chr:-end` with 1-based, inclusive
+    coordinates (commas allowed as thousands separators).
+
+    Args:
+        text (str): The region string.
+
+    Returns:
+        Region: The equivalent 0-based, half-open region.
+
+    Raises:
+        ValueError: If the region string is malformed.
+    """
+    match = _REGION_RE.match(text.strip())
+    if not match:
+        raise ValueError(
+            f"Invalid region '{text}': expected chr, chr:start or chr:start-end"
+        )
+    start = int(match.group("start").replace(",", "")) if match.group("start") else 1
+    end = (
+        int(match.group("end").replace(",", ""))
+        if match.group("end")
+        else MAX_COORDINATE
+    )
+    if start < 1 or end < start:
+        raise ValueError(f"Invalid region '{text}': start must be >= 1 and <= end")
+    return Region(match.group("chrom"), start - 1, end)
+
+
+def read_bed(bed_path: str) -> List[Region]:
+    """
+    Read target regions from a BED file (0-based, half-open).
+
+    Header, `track` and `browser` lines are skipped; columns after the third are ignored.
+
+    Args:
+        bed_path (str): Path to the BED file.
+
+    Returns:
+        List[Region]: The regions, in file order.
+
+    Raises:
+        RuntimeError: If the BED file cannot be opened.
+        ValueError: If a BED line is malformed.
+    """
+    regions = []
+    try:
+        with open(bed_path) as bed:
+            for lineno, line in enumerate(bed, 1):
+                if not line.strip() or line.startswith(("#", "track", "browser")):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                try:
+                    regions.append(Region(fields[0], int(fields[1]), int(fields[2])))
+                except (IndexError, ValueError):
+                    raise ValueError(
+                        f"Malformed BED line {lineno} in '{bed_path}': expected chrom, start, end"
+                    )
+    except OSError as e:
+        raise RuntimeError(f"Error opening BED file '{bed_path}': {e}")
+    return regions
+
+
+class RegionSet:
+    """
+    Merged, sorted target intervals supporting fast overlap tests.
+    """
+
+    def __init__(self, regions: Iterable[Region]) -> None:
+        """
+        Args:
+            regions (Iterable[Region]): Regions to include; overlapping or adjacent
+                regions are merged.
+        """
+        by_contig: Dict[str, List[Tuple[int, int]]] = {}
+        for region in regions:
+            by_contig.setdefault(region.chrom, []).append((region.start, region.end))
+        self._starts: Dict[str, List[int]] = {}
+        self._ends: Dict[str, List[int]] = {}
+        for chrom, intervals in by_contig.items():
+            starts: List[int] = []
+            ends: List[int] = []
+            for start, end in sorted(intervals):
+                if ends and start <= ends[-1]:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[chrom] = starts
+            self._ends[chrom] = ends
+
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._starts
+
+    def __iter__(self) -> Iterator[Region]:
+        for chrom, starts in self._starts.items():
+            for start, end in zip(starts, self._ends[chrom]):
+                yield Region(chrom, start, end)
+
+    def overlaps(self, chrom: str, start: int, end: int) -> bool:
+        """Return True if [start, end) on `chrom` overlaps any region."""
+        starts = self._starts.get(chrom)
+        if starts is None:
+            return False
+        i = bisect.bisect_left(starts, end) - 1
+        return i >= 0 and self._ends[chrom][i] > start
+
+    def overlaps_vcf_line(self, line: str) -> bool:
+        """
+        Return True if a VCF data line's REF span overlaps any region.
+
+        Lines whose position columns cannot be read are kept, so that validation
+        reports them as malformed.
+        """
+        fields = line.split("\t", 4)
+        if fields[0] not in self._starts:
+            return False
+        try:
+            start = int(fields[1]) - 1
+            return self.overlaps(fields[0], start, start + max(len(fields[3]), 1))
+        except (IndexError, ValueError):
+            return True
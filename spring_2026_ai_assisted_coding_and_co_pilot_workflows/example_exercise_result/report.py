@@ -0,0 +1,243 @@
+"""
+Report: Machine-readable sinks for REF mismatches found by the VCFValidator.
+
+Mismatches are buffered and written in batches through a large file buffer, as
+tab-separated text, JSON Lines, or a compact columnar binary format. The columnar
+format stores each batch as six zlib-compressed columns and is read back with
+`read_columnar`.
+"""
+
+import io
+import json
+import struct
+import sys
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple
+
+REPORT_FORMATS = ("tsv", "jsonl", "columnar")
+REPORT_COLUMNS = ("chrom", "pos", "id", "vcf_ref", "fasta_ref", "alt")
+COLUMNAR_MAGIC = b"VCFMISM\x01"
+DEFAULT_BATCH_SIZE = 65536
+_BUFFER_SIZE = 1 << 20
+
+Mismatch = Tuple[Any, ...]
+
+
+class ReportSink(ABC):
+    """
+    Base class for mismatch report writers.
+
+    Mismatches are collected with `write` and flushed every `batch_size` rows and on
+    `close`. Sinks are context managers; "-" as the path writes to standard output.
+    """
+
+    def __init__(
+        self, path: str, batch_size: int = DEFAULT_BATCH_SIZE, append: bool = False
+    ) -> None:
+        """
+        Args:
+            path (str): Output file path, or "-" for standard output.
+            batch_size (int): Number of mismatches buffered before each write.
+            append (bool): Add to an existing report (e.g. when resuming a run)
+                instead of replacing it.
+
+        Raises:
+            RuntimeError: If the output file cannot be opened.
+        """
+        self._path = path
+        self._batch_size = batch_size
+        self._rows: List[Mismatch] = []
+        try:
+            if path == "-":
+                self._fh: BinaryIO = sys.stdout.buffer
+            else:
+                self._fh = open(path, "ab" if append else "wb", buffering=_BUFFER_SIZE)
+        except OSError as e:
+            raise RuntimeError(f"Error opening report file '{path}': {e}")
+        if path == "-" or self._fh.tell() == 0:
+            self._start()
+
+    def __enter__(self) -> "ReportSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        """Write any header before the first batch."""
+
+    @abstractmethod
+    def _write_batch(self, rows: List[Mismatch]) -> None:
+        """Encode and write a batch of mismatch tuples."""
+
+    def write(self, mismatch: Mismatch) -> None:
+        """
+        Add one mismatch (chrom, pos, id, VCF REF, FASTA REF, ALT) to the report.
+        """
+        self._rows.append(mismatch)
+        if len(self._rows) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered mismatches to the output."""
+        if self._rows:
+            self._write_batch(self._rows)
+            self._rows = []
+        self._fh.flush()
+
+    def tell(self) -> Optional[int]:
+        """Flush and return the report's size in bytes (None for standard output)."""
+        self.flush()
+        return None if self._path == "-" else self._fh.tell()
+
+    def truncate(self, size: Optional[int]) -> None:
+        """
+        Cut the report back to `size` bytes, as returned by an earlier `tell`.
+
+        Used when resuming, to drop mismatches written after the last checkpoint.
+        Standard output cannot be truncated and is left alone.
+        """
+        self._rows = []
+        if size is not None and self._path != "-":
+            self._fh.flush()
+            self._fh.truncate(size)
+            if size == 0:
+                self._start()
+
+    def close(self) -> None:
+        """Flush remaining mismatches and close the output (standard output stays open)."""
+        if self._fh.closed:
+            return
+        self.flush()
+        if self._path != "-":
+            self._fh.close()
+
+
+class TsvReportSink(ReportSink):
+    """Tab-separated text with a header row."""
+
+    def _start(self) -> None:
+        self._fh.write(("\t".join(REPORT_COLUMNS) + "\n").encode())
+
+    def _write_batch(self, rows: List[Mismatch]) -> None:
+        self._fh.write(
+            "".join(
+                f"{chrom}\t{pos}\t{vid}\t{ref}\t{ref_base}\t{alt}\n"
+                for chrom, pos, vid, ref, ref_base, alt in rows
+            ).encode()
+        )
+
+
+class JsonLinesReportSink(ReportSink):
+    """One JSON object per mismatch, keyed by `REPORT_COLUMNS`."""
+
+    def _write_batch(self, rows: List[Mismatch]) -> None:
+        dumps = json.dumps
+        self._fh.write(
+            "".join(
+                dumps(dict(zip(REPORT_COLUMNS, row))) + "\n" for row in rows
+            ).encode()
+        )
+
+
+class ColumnarReportSink(ReportSink):
+    """
+    Compact binary columns.
+
+    Layout: `COLUMNAR_MAGIC`, then per batch a little-endian uint32 row count followed
+    by six (uint32 length, zlib data) columns. POS is packed as int64 values; the text
+    columns are UTF-8 strings joined with NUL bytes.
+    """
+
+    def _start(self) -> None:
+        self._fh.write(COLUMNAR_MAGIC)
+
+    def _write_batch(self, rows: List[Mismatch]) -> None:
+        columns = list(zip(*rows))
+        encoded = [
+            (
+                struct.pack(f"<{len(rows)}q", *columns[1])
+                if i == 1
+                else "\x00".join(map(str, values)).encode()
+            )
+            for i, values in enumerate(columns)
+        ]
+        out = io.BytesIO()
+        out.write(struct.pack("<I", len(rows)))
+        for data in encoded:
+            packed = zlib.compress(data, 1)
+            out.write(struct.pack("<I", len(packed)))
+            out.write(packed)
+        self._fh.write(out.getvalue())
+
+
+_SINKS = {
+    "tsv": TsvReportSink,
+    "jsonl": JsonLinesReportSink,
+    "columnar": ColumnarReportSink,
+}
+
+
+def open_report(
+    path: str,
+    report_format: str = "tsv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    append: bool = False,
+) -> ReportSink:
+    """
+    Open a mismatch report sink.
+
+    Args:
+        path (str): Output file path, or "-" for standard output.
+        report_format (str): One of `REPORT_FORMATS`.
+        batch_size (int): Number of mismatches buffered before each write.
+        append (bool): Add to an existing report instead of replacing it.
+
+    Returns:
+        ReportSink: The opened sink.
+
+    Raises:
+        RuntimeError: If the output file cannot be opened.
+        ValueError: If the format is unknown.
+    """
+    if report_format not in _SINKS:
+        raise ValueError(
+            f"Unknown report format '{report_format}'; expected one of {REPORT_FORMATS}"
+        )
+    return _SINKS[report_format](path, batch_size, append)
+
+
+def read_columnar(path: str) -> Iterator[Mismatch]:
+    """
+    Read back the mismatches of a columnar report.
+
+    Args:
+        path (str): Path to a report written by `ColumnarReportSink`.
+
+    Yields:
+        Mismatch: (chrom, pos, id, VCF REF, FASTA REF, ALT) tuples, in report order.
+
+    Raises:
+        ValueError: If the file is not a columnar report or is truncated.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"'{path}' is not a columnar mismatch report")
+        while True:
+            header = f.read(4)
+            if not header:
+                return
+            (count,) = struct.unpack("<I", header)
+            columns = []
+            for i in range(len(REPORT_COLUMNS)):
+                size_bytes = f.read(4)
+                if len(size_bytes) != 4:
+                    raise ValueError(f"Truncated columnar report '{path}'")
+                (size,) = struct.unpack("<I", size_bytes)
+                data = zlib.decompress(f.read(size))
+                if i == 1:
+                    columns.append(struct.unpack(f"<{count}q", data))
+                else:
+                    columns.append(data.decode().split("\x00"))
+            yield from zip(*columns)
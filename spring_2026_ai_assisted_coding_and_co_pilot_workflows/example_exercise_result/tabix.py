@@ -0,0 +1,302 @@
+"""
+Tabix: Read `.tbi` and `.csi` indexes of bgzipped VCFs and find the blocks for a region.
+
+Both index types map each contig to a binning scheme (UCSC-style hierarchical bins)
+holding chunks of BGZF virtual offsets. A region query collects the chunks of the
+bins overlapping the region and drops those that end before the region's minimum
+offset (the linear index for `.tbi`, the bin offsets for `.csi`). Reading only these
+chunks touches a few blocks instead of the whole file.
+"""
+
+import gzip
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import bgzf
+
+TBI_MAGIC = b"TBI\x01"
+CSI_MAGIC = b"CSI\x01"
+# Tabix's fixed binning scheme: 16 KiB leaves, 5 levels
+TBI_MIN_SHIFT = 14
+TBI_DEPTH = 5
+
+
+def reg2bins(start: int, end: int, min_shift: int, depth: int) -> List[int]:
+    """
+    List the bins that may hold features overlapping [start, end) (0-based).
+
+    Args:
+        start (int): 0-based start.
+        end (int): 0-based exclusive end.
+        min_shift (int): log2 of the smallest bin size.
+        depth (int): Number of levels below the root bin.
+
+    Returns:
+        List[int]: Bin numbers, root first.
+    """
+    bins = []
+    end -= 1
+    offset = 0
+    shift = min_shift + 3 * depth
+    for level in range(depth + 1):
+        bins.extend(range(offset + (start >> shift), offset + (end >> shift) + 1))
+        offset += 1 << (3 * level)
+        shift -= 3
+    return bins
+
+
+def reg2bin(start: int, end: int, min_shift: int, depth: int) -> int:
+    """Return the smallest bin fully containing [start, end) (0-based)."""
+    end -= 1
+    shift = min_shift
+    offset = ((1 << (3 * depth)) - 1) // 7
+    for level in range(depth, 0, -1):
+        if start >> shift == end >> shift:
+            return offset + (start >> shift)
+        shift += 3
+        offset -= 1 << (3 * (level - 1))
+    return 0
+
+
+class _RefIndex:
+    """Bins (with chunk lists) and minimum offsets for one contig."""
+
+    def __init__(self) -> None:
+        self.bins: Dict[int, List[Tuple[int, int]]] = {}
+        self.bin_loffsets: Dict[int, int] = {}
+        self.linear: List[int] = []
+
+
+class TabixIndex:
+    """
+    A parsed `.tbi` or `.csi` index.
+    """
+
+    def __init__(self, index_path: str) -> None:
+        """
+        Args:
+            index_path (str): Path to the `.tbi` or `.csi` file.
+
+        Raises:
+            RuntimeError: If the index cannot be opened.
+            ValueError: If the index is malformed.
+        """
+        try:
+            with gzip.open(index_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            raise RuntimeError(f"Error opening index '{index_path}': {e}")
+        self._data = data
+        self._pos = 0
+        self._refs: Dict[str, _RefIndex] = {}
+        magic = self._take(4)
+        if magic == TBI_MAGIC:
+            self.is_csi = False
+            self.min_shift, self.depth = TBI_MIN_SHIFT, TBI_DEPTH
+            (n_ref,) = self._unpack("<i")
+            names = self._read_tabix_header()
+        elif magic == CSI_MAGIC:
+            self.is_csi = True
+            self.min_shift, self.depth, l_aux = self._unpack("<3i")
+            aux_end = self._pos + l_aux
+            names = self._read_tabix_header() if l_aux >= 28 else []
+            self._pos = aux_end
+            (n_ref,) = self._unpack("<i")
+        else:
+            raise ValueError(f"Unrecognized index format in '{index_path}'")
+        if names and len(names) != n_ref:
+            raise ValueError(
+                f"Index '{index_path}' lists {len(names)} names for {n_ref} contigs"
+            )
+        self._pseudo_bin = ((1 << (3 * (self.depth + 1))) - 1) // 7 + 1
+        for i in range(n_ref):
+            ref = self._read_ref()
+            self._refs[names[i] if names else str(i)] = ref
+        del self._data
+
+    def _take(self, size: int) -> bytes:
+        chunk = self._data[self._pos : self._pos + size]
+        if len(chunk) != size:
+            raise ValueError("Truncated index")
+        self._pos += size
+        return chunk
+
+    def _unpack(self, fmt: str) -> Tuple:
+        return struct.unpack(fmt, self._take(struct.calcsize(fmt)))
+
+    def _read_tabix_header(self) -> List[str]:
+        """Read format/column settings and the null-separated contig names."""
+        _fmt, _col_seq, _col_beg, _col_end, _meta, _skip, l_nm = self._unpack("<7i")
+        return [n.decode() for n in self._take(l_nm).split(b"\x00") if n]
+
+    def _read_ref(self) -> _RefIndex:
+        ref = _RefIndex()
+        (n_bin,) = self._unpack("<i")
+        for _ in range(n_bin):
+            if self.is_csi:
+                bin_number, loffset, n_chunk = self._unpack("<IQi")
+            else:
+                bin_number, n_chunk = self._unpack("<Ii")
+                loffset = 0
+            chunks = [self._unpack("<QQ") for _ in range(n_chunk)]
+            if bin_number == self._pseudo_bin:
+                continue  # metadata pseudo-bin (mapped/unmapped counts)
+            ref.bins[bin_number] = chunks
+            ref.bin_loffsets[bin_number] = loffset
+        if not self.is_csi:
+            (n_intv,) = self._unpack("<i")
+            ref.linear = list(self._unpack(f"<{n_intv}Q")) if n_intv else []
+        return ref
+
+    @property
+    def contigs(self) -> List[str]:
+        """Contig names, in index order."""
+        return list(self._refs)
+
+    def _min_offset(self, ref: _RefIndex, start: int) -> int:
+        if not self.is_csi:
+            if not ref.linear:
+                return 0
+            return ref.linear[min(start >> TBI_MIN_SHIFT, len(ref.linear) - 1)]
+        # Finest-level bin holding `start`, or its closest indexed ancestor
+        bin_number = ((1 << (3 * self.depth)) - 1) // 7 + (start >> self.min_shift)
+        while bin_number > 0 and bin_number not in ref.bin_loffsets:
+            bin_number = (bin_number - 1) >> 3
+        return ref.bin_loffsets.get(bin_number, 0)
+
+    def query(self, chrom: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Find the virtual-offset chunks that may hold records overlapping a region.
+
+        Args:
+            chrom (str): Contig name.
+            start (int): 0-based start.
+            end (int): 0-based exclusive end.
+
+        Returns:
+            List[Tuple[int, int]]: Sorted, merged (start, end) virtual offset pairs.
+        """
+        ref = self._refs.get(chrom)
+        if ref is None or end <= start:
+            return []
+        max_end = 1 << (self.min_shift + 3 * self.depth)
+        min_offset = self._min_offset(ref, start)
+        chunks = [
+            chunk
+            for bin_number in reg2bins(
+                start, min(end, max_end), self.min_shift, self.depth
+            )
+            for chunk in ref.bins.get(bin_number, ())
+            if chunk[1] > min_offset
+        ]
+        return merge_chunks(chunks)
+
+
+def merge_chunks(chunks: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort virtual offset chunks and merge those that overlap or touch."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(chunks):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def find_index(vcf_path: str) -> Optional[str]:
+    """
+    Return the path of an up-to-date `.tbi` or `.csi` index for a VCF, if there is one.
+    """
+    for suffix in (".tbi", ".csi"):
+        index_path = vcf_path + suffix
+        if os.path.exists(index_path) and os.path.getmtime(
+            index_path
+        ) >= os.path.getmtime(vcf_path):
+            return index_path
+    return None
+
+
+def build_tbi(vcf_path: str, index_path: Optional[str] = None) -> str:
+    """
+    Build a `.tbi` index for a bgzipped, coordinate-sorted VCF (like `tabix -p vcf`).
+
+    Args:
+        vcf_path (str): Path to the bgzipped VCF.
+        index_path (Optional[str]): Where to write the index (default `<vcf>.tbi`).
+
+    Returns:
+        str: Path of the written index.
+
+    Raises:
+        ValueError: If the VCF is not bgzipped or not sorted.
+    """
+    if not bgzf.is_bgzf(vcf_path):
+        raise ValueError(f"Cannot index '{vcf_path}': not bgzip-compressed")
+    index_path = index_path or vcf_path + ".tbi"
+    names: List[str] = []
+    refs: Dict[str, _RefIndex] = {}
+    last: Tuple[Optional[str], int] = (None, -1)
+    # A record's chunk ends where the next line starts, so each one is added a line late
+    previous: Optional[Tuple[_RefIndex, int, int]] = None
+
+    def add_chunk(ref: _RefIndex, bin_number: int, start: int, end: int) -> None:
+        chunks = ref.bins.setdefault(bin_number, [])
+        if chunks and chunks[-1][1] == start:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+
+    for voffset, line in bgzf.iter_voffset_lines(vcf_path):
+        if previous is not None:
+            add_chunk(*previous, voffset)
+            previous = None
+        if line.startswith(b"#"):
+            continue
+        fields = line.split(b"\t", 4)
+        chrom = fields[0].decode()
+        start = int(fields[1]) - 1
+        end = start + max(len(fields[3]), 1)
+        if chrom != last[0]:
+            if chrom in refs:
+                raise ValueError(
+                    f"Cannot index '{vcf_path}': contig '{chrom}' is not contiguous"
+                )
+            names.append(chrom)
+            refs[chrom] = _RefIndex()
+        elif start < last[1]:
+            raise ValueError(
+                f"Cannot index '{vcf_path}': records are not sorted at {chrom}:{start + 1}"
+            )
+        last = (chrom, start)
+        ref = refs[chrom]
+        previous = (ref, reg2bin(start, end, TBI_MIN_SHIFT, TBI_DEPTH), voffset)
+        for window in range(start >> TBI_MIN_SHIFT, ((end - 1) >> TBI_MIN_SHIFT) + 1):
+            if window >= len(ref.linear):
+                ref.linear.extend([-1] * (window + 1 - len(ref.linear)))
+            if ref.linear[window] < 0:
+                ref.linear[window] = voffset
+    if previous is not None:
+        # Past the last data byte: readers stop at end of file
+        add_chunk(*previous, bgzf.make_virtual_offset(os.path.getsize(vcf_path), 0))
+    body = bytearray(TBI_MAGIC)
+    name_block = b"".join(n.encode() + b"\x00" for n in names)
+    # format=VCF (2), seq/beg/end columns 1/2/0, meta char '#', skip 0
+    body += struct.pack("<8i", len(names), 2, 1, 2, 0, ord("#"), 0, len(name_block))
+    body += name_block
+    for name in names:
+        ref = refs[name]
+        body += struct.pack("<i", len(ref.bins))
+        for bin_number in sorted(ref.bins):
+            chunks = ref.bins[bin_number]
+            body += struct.pack("<Ii", bin_number, len(chunks))
+            for chunk in chunks:
+                body += struct.pack("<QQ", *chunk)
+        # Empty windows inherit the previous offset (as htslib does)
+        for i, offset in enumerate(ref.linear):
+            if offset < 0:
+                ref.linear[i] = ref.linear[i - 1] if i else 0
+        body += struct.pack(f"<i{len(ref.linear)}Q", len(ref.linear), *ref.linear)
+    with bgzf.BgzfWriter(index_path) as writer:
+        writer.write(bytes(body))
+    return index_path
@@ -7,10 +7,71 @@ reporting mismatches, and summarizing variant types (SNV, INDEL, DEL, INS).
 
 import argparse
 import gzip
+import heapq
+import itertools
 import json
 import logging
+import os
 import sys
-from typing import Any, Dict, Generator, Optional
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+import bgzf
+import tabix
+from annotation import (
+    AnnotationIndex,
+    feature_summary_key,
+    load_or_build_index,
+    read_gff3,
+)
+from cache import (
+    DEFAULT_MAX_BYTES,
+    CachedBlock,
+    ValidationCache,
+    default_cache_path,
+    iter_blocks,
+)
+from checkpoint import (
+    Checkpoint,
+    checkpoint_path_for,
+    load_checkpoint,
+    remove_checkpoint,
+    run_context,
+    save_checkpoint,
+)
+from consequence import ConsequenceIndex, load_genetic_code
+from manifest import (
+    build_manifest,
+    load_or_build_manifest,
+    match_contigs,
+    read_vcf_contigs,
+    save_manifest,
+)
+
+from reference import (
+    REFERENCE_BACKENDS,
+    ReferenceBackend,
+    open_reference,
+    pack_fasta_to_twobit,
+)
+from regions import RegionSet, parse_region, read_bed
+from report import REPORT_FORMATS, ReportSink, open_report
+
+ENGINES = ("python", "numpy")
+DEFAULT_CHECKPOINT_EVERY = 1_000_000
 
 # Configure logging globally
 logging.basicConfig(
@@ -18,125 +79,496 @@ logging.basicConfig(
 )
 
 
+class VCFParseError(ValueError):
+    """
+    A malformed VCF line.
+
+    The message is kept as a template with a `{lineno}` placeholder so that errors
+    raised while validating a chunk of the file can be renumbered to absolute lines.
+    """
+
+    def __init__(self, template: str, lineno: int) -> None:
+        self.template = template
+        self.lineno = lineno
+        super().__init__(template.replace("{lineno}", str(lineno)))
+
+    def __reduce__(self):
+        return VCFParseError, (self.template, self.lineno)
+
+    def renumbered(self, offset: int) -> "VCFParseError":
+        """Return the same error with `offset` added to its line number."""
+        return VCFParseError(self.template, self.lineno + offset)
+
+
+class VCFRecord(NamedTuple):
+    """One ALT allele of a VCF line (a multi-allelic line yields one record per ALT)."""
+
+    chrom: str
+    pos: int
+    id: str
+    ref: str
+    alt: str
+
+
+class _VCFChunk(NamedTuple):
+    """
+    A slice of the VCF handled by one worker in parallel validation.
+
+    kind is "bytes" (plain-text byte range [start, stop)), "bgzf" (lines starting in
+    the blocks at compressed offsets [start, stop); `prev` is the last non-empty block
+    before them) or "contig_hash" (every line whose contig hashes to partition
+    `start` of `stop`).
+    """
+
+    kind: str
+    start: int
+    stop: Optional[int]
+    prev: Optional[int] = None
+
+
+class _ContigHashPartition:
+    """Container of the contig names assigned to one hash partition."""
+
+    def __init__(self, index: int, count: int) -> None:
+        self._index = index
+        self._count = count
+
+    def __contains__(self, chrom: str) -> bool:
+        return zlib.crc32(chrom.encode()) % self._count == self._index
+
+
+class _AliasedContigs:
+    """Container of VCF contig names that also holds the reference names they alias."""
+
+    def __init__(self, contigs: Container[str], aliases: Dict[str, str]) -> None:
+        self._contigs = contigs
+        self._aliased_by: Dict[str, List[str]] = {}
+        for alias, name in aliases.items():
+            self._aliased_by.setdefault(name, []).append(alias)
+
+    def __contains__(self, chrom: str) -> bool:
+        return chrom in self._contigs or any(
+            alias in self._contigs for alias in self._aliased_by.get(chrom, ())
+        )
+
+
+class _LineCounter:
+    """Number lines as they are consumed, remembering how many have been read."""
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._lines = lines
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        for line in self._lines:
+            self.count += 1
+            yield self.count, line
+
+
+class _ChunkResult(NamedTuple):
+    """What a worker sends back after validating one chunk."""
+
+    summary: Dict[str, int]
+    mismatches: List[Tuple[int, Tuple[Any, ...]]]
+    lines: int
+    error: Optional[Exception]
+
+
+def _empty_summary() -> Dict[str, int]:
+    return {"snv": 0, "indel": 0, "del": 0, "ins": 0}
+
+
+def _validate_chunk_task(
+    task: Tuple[
+        str, str, str, Optional[str], Optional[str], Dict[str, str], str, _VCFChunk
+    ],
+) -> _ChunkResult:
+    """Process-pool entry point: validate one chunk of a VCF."""
+    (
+        fasta_path,
+        vcf_path,
+        reference_backend,
+        annotation_path,
+        genetic_code_path,
+        contig_aliases,
+        engine,
+        chunk,
+    ) = task
+    validator = VCFValidator(
+        fasta_path,
+        vcf_path,
+        reference_backend,
+        annotation_path=annotation_path,
+        genetic_code_path=genetic_code_path,
+        contig_aliases=contig_aliases,
+    )
+    return validator._validate_chunk(chunk, engine)
+
+
 class VCFValidator:
     """
     Validates VCF reference alleles against a reference FASTA and summarizes variant types.
     """
 
-    def __init__(self, fasta_path: str, vcf_path: str) -> None:
+    def __init__(
+        self,
+        fasta_path: str,
+        vcf_path: str,
+        reference_backend: str = "memory",
+        jobs: int = 1,
+        regions: Optional[RegionSet] = None,
+        decompress_threads: int = 1,
+        report: Optional[ReportSink] = None,
+        max_mismatch_log: Optional[int] = None,
+        checkpoint_every: Optional[int] = None,
+        resume: bool = False,
+        annotation_path: Optional[str] = None,
+        genetic_code_path: Optional[str] = None,
+        cache: Optional[ValidationCache] = None,
+        contig_aliases: Optional[Dict[str, str]] = None,
+    ) -> None:
         """
         Initialize the VCFValidator.
 
         Args:
             fasta_path (str): Path to the reference FASTA file.
             vcf_path (str): Path to the VCF file.
+            reference_backend (str): How reference sequence is served: "memory" loads
+                the whole FASTA; "indexed" seeks using a `.fai` (and `.gzi`) index;
+                "twobit" memory-maps a `.2bit` file given as `fasta_path`.
+            jobs (int): Number of worker processes used by validate().
+            regions (Optional[RegionSet]): Only validate records overlapping these
+                regions (None validates every record).
+            decompress_threads (int): Threads inflating a bgzipped VCF ahead of the
+                parser (ordinary gzip and plain text are always read by one thread).
+            report (Optional[ReportSink]): Sink receiving every mismatch (the caller
+                closes it).
+            max_mismatch_log (Optional[int]): Log at most this many mismatch warnings
+                (None logs them all); the report still receives every mismatch.
+            checkpoint_every (Optional[int]): Write a checkpoint (see `checkpoint.py`)
+                next to the VCF after every this many lines (None disables it).
+            resume (bool): Continue from the VCF's checkpoint, if there is one;
+                implies checkpointing. The report sink must be opened for appending.
+            annotation_path (Optional[str]): GFF3 file; when given, the variant summary
+                also counts records overlapping each feature type (`overlaps_<type>`)
+                and records outside every feature (`intergenic`).
+            genetic_code_path (Optional[str]): Genetic code table (see
+                `consequence.load_genetic_code`); with `annotation_path`, the variant
+                summary also counts the coding consequence of each ALT allele
+                (`synonymous`, `missense`, `nonsense`, ...).
+            cache (Optional[ValidationCache]): Reuse the results of unchanged VCF
+                blocks from earlier runs, and store new ones (the caller closes it).
+            contig_aliases (Optional[Dict[str, str]]): VCF contig name -> reference
+                contig name, for contigs the two files name differently (normally
+                found by `preflight`).
+
+        Raises:
+            ValueError: If regions or checkpoints are combined with more than one
+                job, regions with checkpoints, a genetic code is given without an
+                annotation, or a cache with jobs > 1, regions or checkpoints.
         """
+        if resume and checkpoint_every is None:
+            checkpoint_every = DEFAULT_CHECKPOINT_EVERY
+        if regions is not None and jobs > 1:
+            raise ValueError("Region queries cannot be combined with jobs > 1")
+        if checkpoint_every is not None and (jobs > 1 or regions is not None):
+            raise ValueError(
+                "Checkpoints cannot be combined with jobs > 1 or region queries"
+            )
+        if genetic_code_path is not None and annotation_path is None:
+            raise ValueError("Coding consequences require an annotation (GFF3) file")
+        if cache is not None and (
+            jobs > 1 or regions is not None or checkpoint_every is not None
+        ):
+            raise ValueError(
+                "The validation cache cannot be combined with jobs > 1, region "
+                "queries or checkpoints"
+            )
         self._fasta_path: str = fasta_path
         self._vcf_path: str = vcf_path
-        self._fasta_sequences: Optional[Dict[str, str]] = None
+        self._reference_backend: str = reference_backend
+        self._jobs: int = jobs
+        self._regions: Optional[RegionSet] = regions
+        self._decompress_threads: int = decompress_threads
+        self._report: Optional[ReportSink] = report
+        self._max_mismatch_log: Optional[int] = max_mismatch_log
+        self._mismatch_count: int = 0
+        self._checkpoint_every: Optional[int] = checkpoint_every
+        self._resume: bool = resume
+        self._annotation_path: Optional[str] = annotation_path
+        self._annotation: Optional[AnnotationIndex] = None
+        self._genetic_code_path: Optional[str] = genetic_code_path
+        self._consequences: Optional[ConsequenceIndex] = None
+        self._cache: Optional[ValidationCache] = cache
+        self._contig_aliases: Dict[str, str] = dict(contig_aliases or {})
+        # How error messages locate a line ("line at virtual offset" for indexed reads)
+        self._line_label: str = "line"
+        self._reference: Optional[ReferenceBackend] = None
         self._variant_summary: Optional[Dict[str, int]] = None
         self._logger = logging.getLogger("VCFValidator")
 
     def load_fasta(self) -> None:
         """
-        Load the reference FASTA file into memory.
+        Open the reference FASTA using the configured reference backend.
 
         Raises:
             RuntimeError: If the FASTA file cannot be opened.
             ValueError: If the FASTA file is empty or malformed.
         """
-        sequences = {}
-        try:
-            with open(self._fasta_path) as f:
-                chrom = None
-                seq = []
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue  # skip blank lines
-
-                    # Start of a new sequence record
-                    if line.startswith(">"):
-                        if chrom:
-                            # Save the previous chromosome's sequence
-                            sequences[chrom] = "".join(seq)
-                        chrom = line[1:].split()[0]
-                        seq = []
-                    elif chrom is None:
-                        # Sequence data before any header is invalid
-                        raise ValueError(
-                            f"Invalid FASTA format: sequence data before header in {self._fasta_path}"
-                        )
-                    else:
-                        # Accumulate sequence lines for the current chromosome
-                        seq.append(line)
-                # Save the last chromosome's sequence
-                if chrom:
-                    sequences[chrom] = "".join(seq)
-        except OSError as e:
-            raise RuntimeError(f"Error opening FASTA file '{self._fasta_path}': {e}")
-        if not sequences:
-            raise ValueError(f"No sequences found in FASTA file '{self._fasta_path}'")
-        self._fasta_sequences = sequences
+        self._reference = self._open_reference(self._regions)
+
+    def _open_reference(self, contigs: Optional[Container[str]]) -> ReferenceBackend:
+        """Open the reference, letting it answer to the VCF's contig aliases."""
+        if not self._contig_aliases:
+            return open_reference(self._fasta_path, self._reference_backend, contigs)
+        if contigs is not None:
+            contigs = _AliasedContigs(contigs, self._contig_aliases)
+        reference = open_reference(self._fasta_path, self._reference_backend, contigs)
+        reference.add_aliases(self._contig_aliases)
+        return reference
 
-    def parse_vcf(self) -> Generator[Dict[str, Any], None, None]:
+    def preflight(self) -> None:
         """
-        Parse the VCF file and yield VCF entry dictionaries.
+        Check the VCF's `##contig` header lines against the reference before validating.
 
-        Yields:
-            Dict[str, Any]: Dictionary for each VCF entry (chrom, pos, id, ref, alt).
+        Names, lengths and MD5 digests are compared with the reference's manifest (see
+        `manifest.py`, cached next to the FASTA), which takes milliseconds once the
+        manifest exists. Contigs the VCF names differently ("1" for "chr1", or a
+        matching MD5) are recorded as aliases, so records need no renaming. Header
+        contigs missing from the reference (e.g. alt or decoy contigs of a larger
+        assembly) are only logged, since records on them still fail validation. A
+        VCF without contig headers is not checked.
+
+        Raises:
+            RuntimeError: If the VCF or reference cannot be opened.
+            ValueError: If a header contig differs from the reference in length or
+                MD5.
+        """
+        vcf_contigs = read_vcf_contigs(self._read_vcf_lines())
+        if not vcf_contigs:
+            return
+        manifest = load_or_build_manifest(
+            self._fasta_path, self._reference_backend == "twobit"
+        )
+        aliases, missing, problems = match_contigs(vcf_contigs, manifest)
+        if problems:
+            more = f" (and {len(problems) - 5} more)" if len(problems) > 5 else ""
+            raise ValueError(
+                f"VCF '{self._vcf_path}' does not match reference "
+                f"'{self._fasta_path}': {'; '.join(problems[:5])}{more}"
+            )
+        if missing:
+            more = f" (and {len(missing) - 5} more)" if len(missing) > 5 else ""
+            self._logger.warning(
+                f"VCF header contigs not in reference '{self._fasta_path}': "
+                f"{', '.join(missing[:5])}{more}; records on them will fail"
+            )
+        for alias, name in aliases.items():
+            self._logger.info(f"VCF contig '{alias}' is '{name}' in the reference")
+        self._contig_aliases.update(aliases)
+
+    def _read_vcf_lines(self) -> Iterator[str]:
+        """
+        Yield the lines of the (optionally gzipped) VCF file.
 
         Raises:
             RuntimeError: If the VCF file cannot be opened.
-            ValueError: If a VCF line is malformed.
         """
         opener = gzip.open if self._vcf_path.endswith(".gz") else open
         try:
+            if self._decompress_threads > 1 and bgzf.is_bgzf(self._vcf_path):
+                for line in bgzf.iter_lines(
+                    self._vcf_path, threads=self._decompress_threads
+                ):
+                    yield line.decode()
+                return
             with opener(self._vcf_path, "rt") as vcf:
-                for lineno, line in enumerate(vcf, 1):
-                    if line.startswith("#"):
-                        continue  # skip header lines
-
-                    fields = line.strip().split("\t")
-                    if len(fields) < 5:
-                        # VCF must have at least 5 columns
-                        raise ValueError(
-                            f"Malformed VCF line {lineno} in '{self._vcf_path}': fewer than 5 columns"
-                        )
-                    alts = fields[4].split(",") if fields[4] else []
-                    if not alts or any(not alt for alt in alts):
-                        # ALT field must not be empty or contain empty alleles
-                        raise ValueError(
-                            f"Missing or empty ALT field at line {lineno} in '{self._vcf_path}'"
-                        )
-                    try:
-                        pos = int(fields[1])
-                    except Exception:
-                        # POS must be an integer
-                        raise ValueError(
-                            f"Non-integer POS at line {lineno} in '{self._vcf_path}': {fields[1]}"
-                        )
-                    # Yield a separate entry for each ALT allele
-                    for alt in alts:
-                        yield {
-                            "chrom": fields[0],
-                            "pos": pos,
-                            "id": fields[2],
-                            "ref": fields[3],
-                            "alt": alt,
-                        }
+                yield from vcf
         except OSError as e:
             raise RuntimeError(f"Error opening VCF file '{self._vcf_path}': {e}")
 
-    def _summarize_variant_types(self, entry: Dict[str, Any]) -> None:
+    def _numbered_lines(self) -> Iterator[Tuple[int, str]]:
+        """
+        Yield the (line number, line) pairs to validate.
+
+        With regions set, a bgzipped VCF with a `.tbi`/`.csi` index is read only in the
+        BGZF blocks the index lists for the regions. Lines are then numbered by their
+        virtual offset, since the lines before them are never read. Without an index the
+        whole file is streamed and filtered.
+
+        Raises:
+            RuntimeError: If the VCF file or its index cannot be opened.
+        """
+        numbered_lines = enumerate(self._read_vcf_lines(), 1)
+        if self._regions is None:
+            return numbered_lines
+        index_path = tabix.find_index(self._vcf_path)
+        if index_path is not None and bgzf.is_bgzf(self._vcf_path):
+            self._line_label = "line at virtual offset"
+            return self._indexed_region_lines(tabix.TabixIndex(index_path))
+        self._logger.info(
+            f"No up-to-date .tbi/.csi index for '{self._vcf_path}'; "
+            "scanning the whole file for the requested regions"
+        )
+        return (
+            (lineno, line)
+            for lineno, line in numbered_lines
+            if line.startswith("#") or self._regions.overlaps_vcf_line(line)
+        )
+
+    def _indexed_region_lines(
+        self, index: tabix.TabixIndex
+    ) -> Iterator[Tuple[int, str]]:
+        """Yield (virtual offset, line) for the indexed records overlapping the regions."""
+        chunks = tabix.merge_chunks(
+            [
+                chunk
+                for region in self._regions
+                for chunk in index.query(region.chrom, region.start, region.end)
+            ]
+        )
+        try:
+            for start, stop in chunks:
+                for voffset, raw in bgzf.iter_voffset_lines(
+                    self._vcf_path, start, stop
+                ):
+                    line = raw.decode()
+                    # Index bins are coarse: drop records just outside the regions
+                    if self._regions.overlaps_vcf_line(line):
+                        yield voffset, line
+        except OSError as e:
+            raise RuntimeError(f"Error opening VCF file '{self._vcf_path}': {e}")
+
+    def parse_vcf(self) -> Generator[VCFRecord, None, None]:
+        """
+        Parse the VCF file and yield one record per ALT allele.
+
+        Yields:
+            VCFRecord: Record for each VCF entry (chrom, pos, id, ref, alt).
+
+        Raises:
+            RuntimeError: If the VCF file cannot be opened.
+            ValueError: If a VCF line is malformed.
+        """
+        for _, entry in self._parse_lines(self._numbered_lines()):
+            yield entry
+
+    def _split_record(
+        self, lineno: int, line: str
+    ) -> Optional[Tuple[str, int, str, str, List[str]]]:
+        """
+        Split and check the first five columns of a VCF line.
+
+        Args:
+            lineno (int): Line number, for error messages.
+            line (str): The VCF line.
+
+        Returns:
+            Optional[Tuple[str, int, str, str, List[str]]]: (chrom, pos, id, ref, alts),
+            or None for header lines.
+
+        Raises:
+            VCFParseError: If the VCF line is malformed.
+        """
+        if line.startswith("#"):
+            return None  # skip header lines
+
+        # Only the first five columns are used: leave INFO/FORMAT/samples unsplit
+        fields = line.split("\t", 5)
+        if (
+            len(fields) < 6
+            or not fields[5]
+            or fields[5].isspace()
+            or line[:1].isspace()
+        ):
+            # Short or whitespace-padded line: split exactly as the full strip/split did
+            fields = line.strip().split("\t")
+        if len(fields) < 5:
+            # VCF must have at least 5 columns
+            raise VCFParseError(
+                f"Malformed VCF {self._line_label} {{lineno}} in '{self._vcf_path}': fewer than 5 columns",
+                lineno,
+            )
+        alts = fields[4].split(",") if fields[4] else []
+        if not alts or any(not alt for alt in alts):
+            # ALT field must not be empty or contain empty alleles
+            raise VCFParseError(
+                f"Missing or empty ALT field at {self._line_label} {{lineno}} in '{self._vcf_path}'",
+                lineno,
+            )
+        try:
+            pos = int(fields[1])
+        except Exception:
+            # POS must be an integer
+            raise VCFParseError(
+                f"Non-integer POS at {self._line_label} {{lineno}} in '{self._vcf_path}': {fields[1]}",
+                lineno,
+            )
+        return fields[0], pos, fields[2], fields[3], alts
+
+    def _split_and_annotate(
+        self, lineno: int, line: str
+    ) -> Optional[Tuple[str, int, str, str, List[str]]]:
+        """
+        `_split_record`, also counting the feature types the record's REF overlaps
+        and, with a genetic code, the coding consequence of each ALT allele.
+        """
+        record = self._split_record(lineno, line)
+        if record is not None:
+            chrom, pos, _, ref, alts = record
+            summary = self._variant_summary
+            types = self._annotation.overlapping_types(
+                chrom, pos - 1, pos - 1 + len(ref)
+            )
+            for feature_type in types or (None,):
+                key = feature_summary_key(feature_type)
+                summary[key] = summary.get(key, 0) + 1
+            if self._consequences is not None:
+                for alt in alts:
+                    key = self._consequences.classify(chrom, pos, ref, alt)
+                    if key is not None:
+                        summary[key] = summary.get(key, 0) + 1
+        return record
+
+    def _parse_lines(
+        self,
+        numbered_lines: Iterable[Tuple[int, str]],
+        split_record: Optional[Callable] = None,
+    ) -> Generator[Tuple[int, VCFRecord], None, None]:
+        """
+        Parse numbered VCF lines into records, one per ALT allele.
+
+        Args:
+            numbered_lines (Iterable[Tuple[int, str]]): (line number, line) pairs.
+            split_record (Optional[Callable]): Line splitter (default `_split_record`).
+
+        Yields:
+            Tuple[int, VCFRecord]: The line number and VCF record.
+
+        Raises:
+            VCFParseError: If a VCF line is malformed.
+        """
+        # tuple.__new__ skips the NamedTuple constructor's argument handling
+        new = tuple.__new__
+        split_record = split_record or self._split_record
+        for lineno, line in numbered_lines:
+            record = split_record(lineno, line)
+            if record is None:
+                continue
+            chrom, pos, vid, ref, alts = record
+            # Yield a separate record for each ALT allele
+            for alt in alts:
+                yield lineno, new(VCFRecord, (chrom, pos, vid, ref, alt))
+
+    def _summarize_variant_types(self, entry: VCFRecord) -> None:
         """
         Update the variant summary for a single VCF entry.
 
         Args:
-            entry (Dict[str, Any]): A VCF entry dictionary.
+            entry (VCFRecord): A VCF record.
         """
-        ref = entry["ref"]
-        alt = entry["alt"]
+        ref = entry.ref
+        alt = entry.alt
         if len(ref) == 1 and len(alt) == 1:
             self._variant_summary["snv"] += 1
         elif len(ref) != len(alt):
@@ -146,38 +578,476 @@ class VCFValidator:
             elif len(ref) < len(alt):
                 self._variant_summary["ins"] += 1
 
-    def validate(self) -> None:
+    def _iter_mismatches(
+        self, entries: Iterable[Tuple[int, VCFRecord]]
+    ) -> Generator[Tuple[int, Tuple[Any, ...]], None, None]:
         """
-        Validate VCF reference alleles against the loaded FASTA sequences.
+        Check entries against the reference, updating the variant summary as they pass.
+
+        Args:
+            entries (Iterable[Tuple[int, VCFRecord]]): Numbered VCF records.
+
+        Yields:
+            Tuple[int, Tuple[Any, ...]]: The line number and a mismatch tuple
+            (chrom, pos, id, VCF REF, FASTA REF, ALT) for each REF mismatch.
 
         Raises:
-            RuntimeError: If FASTA is not loaded.
             ValueError: If a chromosome is missing in the FASTA.
         """
-        if self._fasta_sequences is None:
-            raise RuntimeError("FASTA sequences not loaded. Call load_fasta() first.")
-        # Initialize summary counters
-        self._variant_summary = {"snv": 0, "indel": 0, "del": 0, "ins": 0}
-        for vcf_entry in self.parse_vcf():
+        for lineno, vcf_entry in entries:
             # Update variant type summary for each entry
             self._summarize_variant_types(vcf_entry)
 
-            chrom = vcf_entry["chrom"]
-            if chrom not in self._fasta_sequences:
+            chrom, pos, vid, ref, alt = vcf_entry
+            if chrom not in self._reference:
                 # Chromosome in VCF not found in FASTA
                 raise ValueError(f"Reference chromosome '{chrom}' not found in FASTA.")
 
             # Extract the reference sequence from the FASTA for the variant position
-            ref_base = self._fasta_sequences[chrom][
-                vcf_entry["pos"] - 1 : vcf_entry["pos"] - 1 + len(vcf_entry["ref"])
-            ]
+            start = pos - 1
+            ref_base = self._reference.fetch(chrom, start, start + len(ref))
+
+            if ref != ref_base:
+                yield lineno, (chrom, pos, vid, ref, ref_base, alt)
+
+    def _mismatch_stream(
+        self, numbered_lines: Iterable[Tuple[int, str]], engine: str
+    ) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        """
+        Validate numbered VCF lines with the chosen engine.
+
+        Args:
+            numbered_lines (Iterable[Tuple[int, str]]): (line number, line) pairs.
+            engine (str): "python" checks one entry at a time; "numpy" checks batches
+                of records with array operations (requires numpy).
+
+        Returns:
+            Iterator[Tuple[int, Tuple[Any, ...]]]: Line-numbered mismatch tuples, as
+            yielded by `_iter_mismatches`.
 
-            # Log a warning if the VCF reference allele does not match the FASTA
-            if vcf_entry["ref"] != ref_base:
-                self._logger.warning(
-                    f"Mismatch: {vcf_entry['chrom']}\t{vcf_entry['pos']}\t{vcf_entry['id']}\t"
-                    f"VCF_REF={vcf_entry['ref']}\tFASTA_REF={ref_base}\tALT={vcf_entry['alt']}"
+        Raises:
+            ValueError: If the engine name is unknown.
+        """
+        split_record = self._split_record
+        if self._annotation_path is not None:
+            if self._annotation is None:
+                self._annotation = load_or_build_index(self._annotation_path)
+                # Records keep their VCF contig names, which the GFF3 may not use
+                self._annotation.add_aliases(self._contig_aliases)
+                names = set(self._reference.contig_lengths()) | set(
+                    self._contig_aliases
                 )
+                if not any(name in self._annotation for name in names):
+                    self._logger.warning(
+                        f"No contig of '{self._annotation_path}' is in the reference "
+                        "or VCF; every record will count as intergenic"
+                    )
+            if self._genetic_code_path is not None and self._consequences is None:
+                # Splice and translate every transcript once, up front
+                self._consequences = ConsequenceIndex.from_features(
+                    read_gff3(self._annotation_path),
+                    self._reference,
+                    load_genetic_code(self._genetic_code_path),
+                )
+                self._consequences.add_aliases(self._contig_aliases)
+            split_record = self._split_and_annotate
+        if engine == "python":
+            return self._iter_mismatches(
+                self._parse_lines(numbered_lines, split_record)
+            )
+        if engine == "numpy":
+            import numpy_engine
+
+            return numpy_engine.iter_mismatches(
+                numbered_lines,
+                split_record,
+                self._reference,
+                self._variant_summary,
+            )
+        raise ValueError(f"Unknown engine '{engine}'; expected one of {ENGINES}")
+
+    def _report_mismatch(self, mismatch: Tuple[Any, ...]) -> None:
+        """
+        Send a mismatch to the report sink and log it, up to the logging cap.
+        """
+        self._mismatch_count += 1
+        if self._report is not None:
+            self._report.write(mismatch)
+        cap = self._max_mismatch_log
+        if cap is None or self._mismatch_count <= cap:
+            self._logger.warning(
+                "Mismatch: %s\t%s\t%s\tVCF_REF=%s\tFASTA_REF=%s\tALT=%s", *mismatch
+            )
+        elif self._mismatch_count == cap + 1:
+            self._logger.warning(
+                f"Mismatch log limit ({cap}) reached; further mismatches are not logged"
+            )
+
+    def validate(self, engine: str = "python") -> None:
+        """
+        Validate VCF reference alleles against the loaded FASTA sequences.
+
+        With more than one job, the VCF is split into chunks validated in a process
+        pool (see `_validate_parallel`); the reference does not need to be loaded.
+
+        Args:
+            engine (str): "python" (one record at a time) or "numpy" (batched array
+                comparison and classification); both produce identical output.
+
+        Raises:
+            RuntimeError: If FASTA is not loaded.
+            ValueError: If a chromosome is missing in the FASTA.
+        """
+        self._mismatch_count = 0
+        if self._jobs > 1:
+            self._validate_parallel(engine)
+        elif self._checkpoint_every is not None:
+            if self._reference is None:
+                raise RuntimeError(
+                    "FASTA sequences not loaded. Call load_fasta() first."
+                )
+            self._validate_checkpointed(engine)
+        else:
+            if self._reference is None:
+                raise RuntimeError(
+                    "FASTA sequences not loaded. Call load_fasta() first."
+                )
+            # Initialize summary counters
+            self._variant_summary = _empty_summary()
+            if self._cache is not None:
+                self._validate_cached(engine)
+            else:
+                numbered_lines = self._numbered_lines()
+                for _, mismatch in self._mismatch_stream(numbered_lines, engine):
+                    self._report_mismatch(mismatch)
+        cap = self._max_mismatch_log
+        if cap is not None and self._mismatch_count > cap:
+            self._logger.info(f"{self._mismatch_count} REF mismatches in total")
+
+    def _validate_cached(self, engine: str) -> None:
+        """
+        Validate block by block, reusing cached results for unchanged blocks.
+
+        Blocks missing from the cache are validated as usual and stored; cached
+        blocks have their mismatches reported and counters merged in order, so the
+        output is the same as an uncached run.
+        """
+        context = self._cache.context_key(
+            self._fasta_path,
+            self._annotation_path,
+            self._genetic_code_path,
+            aliases=self._contig_aliases,
+        )
+        summary = self._variant_summary
+        lines_done = blocks = reused = 0
+        for digest, block in iter_blocks(
+            self._read_vcf_lines(), self._cache.block_lines
+        ):
+            key = context + digest
+            cached = self._cache.get(key)
+            if cached is None:
+                self._variant_summary = _empty_summary()
+                mismatches = []
+                numbered_lines = enumerate(block, lines_done + 1)
+                for _, mismatch in self._mismatch_stream(numbered_lines, engine):
+                    mismatches.append(mismatch)
+                    self._report_mismatch(mismatch)
+                self._cache.put(key, CachedBlock(self._variant_summary, mismatches))
+                block_summary = self._variant_summary
+                self._variant_summary = summary
+            else:
+                reused += 1
+                for mismatch in cached.mismatches:
+                    self._report_mismatch(mismatch)
+                block_summary = cached.summary
+            for name, count in block_summary.items():
+                summary[name] = summary.get(name, 0) + count
+            lines_done += len(block)
+            blocks += 1
+        self._logger.debug(
+            f"Reused {reused} of {blocks} VCF blocks from the validation cache"
+        )
+        if self._cache.error is not None:
+            self._logger.warning(
+                f"Validation cache disabled during the run: {self._cache.error}"
+            )
+
+    def _resumable_lines(self, resume_token: int) -> Iterator[Tuple[str, int]]:
+        """
+        Yield VCF lines from a resume position, each with the position after it.
+
+        Positions are byte offsets for plain text, BGZF virtual offsets for bgzipped
+        files, and line counts for ordinary gzip streams (which are re-read and
+        skipped, since they cannot be entered mid-stream).
+
+        Raises:
+            RuntimeError: If the VCF file cannot be opened.
+        """
+        try:
+            if bgzf.is_bgzf(self._vcf_path):
+                end = bgzf.make_virtual_offset(os.path.getsize(self._vcf_path), 0)
+                lines = bgzf.iter_voffset_lines(self._vcf_path, resume_token)
+                # A line's end is where the next one starts
+                previous = next(lines, None)
+                for voffset, line in lines:
+                    yield previous[1].decode(), voffset
+                    previous = (voffset, line)
+                if previous is not None:
+                    yield previous[1].decode(), end
+            elif self._vcf_path.endswith(".gz"):
+                with gzip.open(self._vcf_path, "rt") as vcf:
+                    for count, line in enumerate(
+                        itertools.islice(vcf, resume_token, None), resume_token + 1
+                    ):
+                        yield line, count
+            else:
+                with open(self._vcf_path, "rb") as vcf:
+                    vcf.seek(resume_token)
+                    for line in iter(vcf.readline, b""):
+                        yield line.decode(), vcf.tell()
+        except OSError as e:
+            raise RuntimeError(f"Error opening VCF file '{self._vcf_path}': {e}")
+
+    def _validate_checkpointed(self, engine: str) -> None:
+        """
+        Validate in segments of `checkpoint_every` lines, checkpointing after each.
+
+        Each segment is validated completely (so batched engines finish it) and the
+        report flushed before the checkpoint is written; on resume, report rows
+        written after the checkpoint are truncated away, so a resumed run produces
+        the same report and summary as an uninterrupted one. The checkpoint is
+        removed once the whole VCF has been validated.
+        """
+        path = checkpoint_path_for(self._vcf_path)
+        context = run_context(
+            {
+                "reference": self._fasta_path,
+                "annotation": self._annotation_path,
+                "genetic code": self._genetic_code_path,
+            },
+            engine=engine,
+            contig_aliases=self._contig_aliases,
+        )
+        state = load_checkpoint(path, self._vcf_path, context) if self._resume else None
+        if state is None:
+            state = Checkpoint(0, 0, _empty_summary(), 0, None)
+            if self._report is not None:
+                # Nothing to resume: drop whatever an earlier run left in the report
+                self._report.truncate(0)
+        else:
+            self._logger.info(
+                f"Resuming '{self._vcf_path}' after line {state.lines_done} "
+                f"({state.mismatch_count} mismatches so far)"
+            )
+            if self._report is not None:
+                self._report.truncate(state.report_size)
+        self._variant_summary = dict(state.variant_summary)
+        self._mismatch_count = state.mismatch_count
+        lines = self._resumable_lines(state.resume_token)
+        lines_done = state.lines_done
+        while True:
+            segment = list(itertools.islice(lines, self._checkpoint_every))
+            if not segment:
+                break
+            numbered_lines = enumerate((line for line, _ in segment), lines_done + 1)
+            for _, mismatch in self._mismatch_stream(numbered_lines, engine):
+                self._report_mismatch(mismatch)
+            lines_done += len(segment)
+            report_size = self._report.tell() if self._report is not None else None
+            save_checkpoint(
+                path,
+                self._vcf_path,
+                Checkpoint(
+                    segment[-1][1],
+                    lines_done,
+                    self._variant_summary,
+                    self._mismatch_count,
+                    report_size,
+                ),
+                context,
+            )
+        remove_checkpoint(path)
+
+    def _plan_chunks(self) -> List[_VCFChunk]:
+        """
+        Split the VCF into chunks for parallel validation.
+
+        Plain-text and bgzipped VCFs are split into line-aligned byte (or block) ranges,
+        several per job for load balancing. Ordinary gzip streams cannot be entered
+        mid-file, so each job instead streams the whole file and validates the contigs
+        that hash to it.
+
+        Returns:
+            List[_VCFChunk]: Chunks in input order.
+        """
+        target = self._jobs * 4
+        if bgzf.is_bgzf(self._vcf_path):
+            offsets = list(bgzf.iter_block_offsets(self._vcf_path))
+            bounds = sorted({len(offsets) * i // target for i in range(target)})
+            chunks = []
+            with open(self._vcf_path, "rb") as fh:
+                for i, first in enumerate(bounds):
+                    last = bounds[i + 1] if i + 1 < len(bounds) else len(offsets)
+                    # The last block with data before the chunk tells whether its
+                    # first line began earlier; empty blocks (such as the EOF marker
+                    # between concatenated bgzip files) end no line
+                    prev = first - 1
+                    while prev >= 0 and bgzf.read_block_usize(fh, offsets[prev]) == 0:
+                        prev -= 1
+                    chunks.append(
+                        _VCFChunk(
+                            "bgzf",
+                            offsets[first],
+                            offsets[last] if last < len(offsets) else None,
+                            offsets[prev] if prev >= 0 else None,
+                        )
+                    )
+            return chunks
+        if self._vcf_path.endswith(".gz"):
+            return [_VCFChunk("contig_hash", i, self._jobs) for i in range(self._jobs)]
+        size = os.path.getsize(self._vcf_path)
+        bounds = sorted({size * i // target for i in range(target + 1)})
+        return [_VCFChunk("bytes", a, b) for a, b in zip(bounds, bounds[1:])]
+
+    def _read_chunk(self, chunk: _VCFChunk) -> Iterator[str]:
+        """
+        Yield the lines of the VCF that belong to a chunk.
+
+        Raises:
+            RuntimeError: If the VCF file cannot be opened.
+        """
+        try:
+            if chunk.kind == "contig_hash":
+                with gzip.open(self._vcf_path, "rt") as vcf:
+                    yield from vcf
+            elif chunk.kind == "bgzf":
+                lines = bgzf.iter_lines(self._vcf_path, chunk.start, chunk.stop)
+                if chunk.prev is not None:
+                    # Drop the tail of a line that began in the previous chunk
+                    with open(self._vcf_path, "rb") as fh:
+                        previous = bgzf.inflate_block(
+                            bgzf.read_raw_block(fh, chunk.prev)
+                        )
+                    if not previous.endswith(b"\n"):
+                        next(lines, None)
+                for line in lines:
+                    yield line.decode()
+            else:
+                with open(self._vcf_path, "rb") as vcf:
+                    if chunk.start > 0:
+                        # Start at the first line beginning inside the range
+                        vcf.seek(chunk.start - 1)
+                        if vcf.read(1) != b"\n":
+                            vcf.readline()
+                    while vcf.tell() < chunk.stop:
+                        line = vcf.readline()
+                        if not line:
+                            break
+                        yield line.decode()
+        except OSError as e:
+            raise RuntimeError(f"Error opening VCF file '{self._vcf_path}': {e}")
+
+    def _validate_chunk(self, chunk: _VCFChunk, engine: str) -> _ChunkResult:
+        """
+        Validate one chunk of the VCF in a worker process.
+
+        Only the reference contigs the chunk refers to are loaded. Line numbers in the
+        result are relative to the start of the chunk (absolute for "contig_hash").
+        """
+        if chunk.kind == "contig_hash":
+            contigs = _ContigHashPartition(chunk.start, chunk.stop)
+        elif self._reference_backend == "memory":
+            contigs = {
+                line.split("\t", 1)[0]
+                for line in self._read_chunk(chunk)
+                if not line.startswith("#")
+            }
+        else:
+            contigs = None
+        self._reference = self._open_reference(contigs)
+        self._variant_summary = _empty_summary()
+        counter = _LineCounter(self._read_chunk(chunk))
+        numbered_lines: Iterable[Tuple[int, str]] = counter
+        if chunk.kind == "contig_hash":
+            numbered_lines = (
+                (n, line) for n, line in counter if line.split("\t", 1)[0] in contigs
+            )
+        mismatches = []
+        try:
+            for item in self._mismatch_stream(numbered_lines, engine):
+                mismatches.append(item)
+        except ValueError as e:
+            return _ChunkResult(self._variant_summary, mismatches, counter.count, e)
+        finally:
+            self._reference.close()
+        return _ChunkResult(self._variant_summary, mismatches, counter.count, None)
+
+    def _validate_parallel(self, engine: str) -> None:
+        """
+        Validate the VCF in a process pool and merge results in input order.
+
+        Mismatches are logged, and the first error (in input order) raised, exactly as
+        a single-process run would.
+
+        Raises:
+            ValueError: If a VCF line is malformed or a chromosome is missing in the FASTA.
+        """
+        chunks = self._plan_chunks()
+        if self._annotation_path is not None:
+            # Build and save the index once, rather than in every worker
+            load_or_build_index(self._annotation_path)
+        tasks = [
+            (
+                self._fasta_path,
+                self._vcf_path,
+                self._reference_backend,
+                self._annotation_path,
+                self._genetic_code_path,
+                self._contig_aliases,
+                engine,
+                chunk,
+            )
+            for chunk in chunks
+        ]
+        self._variant_summary = _empty_summary()
+        with ProcessPoolExecutor(max_workers=self._jobs) as pool:
+            futures = [pool.submit(_validate_chunk_task, task) for task in tasks]
+            try:
+                if chunks and chunks[0].kind == "contig_hash":
+                    self._merge_hash_partitions([f.result() for f in futures])
+                else:
+                    self._merge_ordered_chunks(f.result() for f in futures)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _merge_ordered_chunks(self, results: Iterable[_ChunkResult]) -> None:
+        """Merge results of consecutive chunks, renumbering errors to absolute lines."""
+        lines_before = 0
+        for result in results:
+            for _, mismatch in result.mismatches:
+                self._report_mismatch(mismatch)
+            if result.error is not None:
+                if isinstance(result.error, VCFParseError):
+                    raise result.error.renumbered(lines_before)
+                raise result.error
+            for key, count in result.summary.items():
+                self._variant_summary[key] = self._variant_summary.get(key, 0) + count
+            lines_before += result.lines
+
+    def _merge_hash_partitions(self, results: List[_ChunkResult]) -> None:
+        """Merge results of contig-hash partitions by interleaving on line number."""
+        failed = [r for r in results if r.error is not None]
+        first_failure = min(failed, key=lambda r: r.lines) if failed else None
+        for lineno, mismatch in heapq.merge(*(r.mismatches for r in results)):
+            if first_failure is not None and lineno >= first_failure.lines:
+                break
+            self._report_mismatch(mismatch)
+        if first_failure is not None:
+            raise first_failure.error
+        for result in results:
+            for key, count in result.summary.items():
+                self._variant_summary[key] = self._variant_summary.get(key, 0) + count
 
     def log_variant_summary(self) -> None:
         """
@@ -193,32 +1063,267 @@ class VCFValidator:
             f"Variant type summary: {json.dumps(self._variant_summary, indent=4)}"
         )
 
-    def run(self) -> None:
+    def run(self, engine: str = "python", preflight: bool = True) -> None:
         """
         Load the FASTA file and validate the VCF, logging exceptions and exiting on error.
+
+        Parallel runs leave loading the reference to the worker processes.
+
+        Args:
+            engine (str): Validation engine passed to validate().
+            preflight (bool): Check the VCF contig headers first (see `preflight`).
         """
         try:
-            self.load_fasta()
-            self.validate()
+            if preflight:
+                self.preflight()
+            if self._jobs == 1:
+                self.load_fasta()
+            self.validate(engine)
             self.log_variant_summary()
         except Exception as e:
-            self.logger.exception(f"Error during validation: {e}")
+            self._logger.exception(f"Error during validation: {e}")
             sys.exit(1)
 
 
+def pack_reference_main(argv: List[str]) -> None:
+    """
+    Command-line entry point for converting a FASTA into a memory-mappable `.2bit` file.
+
+    Args:
+        argv (List[str]): Arguments following the `pack-reference` subcommand.
+    """
+    parser = argparse.ArgumentParser(
+        prog="vcf_validator.py pack-reference",
+        description="Convert a reference FASTA into a 2bit file for --reference-backend twobit.",
+    )
+    parser.add_argument(
+        "fasta", help="Path to the reference FASTA file (plain or gzipped)"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Path of the 2bit file to write (default: FASTA path with a .2bit extension)",
+    )
+    args = parser.parse_args(argv)
+    output = args.output
+    if output is None:
+        stem = args.fasta[:-3] if args.fasta.endswith(".gz") else args.fasta
+        output = os.path.splitext(stem)[0] + ".2bit"
+    logger = logging.getLogger("VCFValidator")
+    try:
+        lengths = pack_fasta_to_twobit(args.fasta, output)
+        # Contig MD5s of the FASTA, which keeps the IUPAC codes the 2bit file drops
+        save_manifest(output, build_manifest(args.fasta))
+    except Exception as e:
+        logger.exception(f"Error converting reference: {e}")
+        sys.exit(1)
+    logger.info(
+        f"Wrote {len(lengths)} sequences ({sum(lengths.values())} bp) to {output}"
+    )
+
+
 def main() -> None:
     """
     Command-line entry point for validating a VCF against a reference FASTA.
+
+    `vcf_validator.py pack-reference FASTA` converts a FASTA into a `.2bit` file instead.
     """
+    if sys.argv[1:2] == ["pack-reference"]:
+        pack_reference_main(sys.argv[2:])
+        return
     parser = argparse.ArgumentParser(
-        description="Validate VCF reference alleles against a reference FASTA."
+        description="Validate VCF reference alleles against a reference FASTA.",
+        epilog="Run 'vcf_validator.py pack-reference -h' to convert a FASTA for the "
+        "twobit backend.",
     )
     parser.add_argument("vcf", help="Path to the VCF file")
-    parser.add_argument("fasta", help="Path to the reference FASTA file")
+    parser.add_argument(
+        "fasta",
+        help="Path to the reference FASTA file (or .2bit file for the twobit backend)",
+    )
+    parser.add_argument(
+        "--reference-backend",
+        choices=REFERENCE_BACKENDS,
+        default="memory",
+        help="Load the whole FASTA into memory, seek using a .fai/.gzi index "
+        "(built next to the FASTA if missing), or memory-map a .2bit file "
+        "(default: memory)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes; the VCF is split by byte range "
+        "(plain or bgzipped) or by contig (gzip) (default: 1)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="python",
+        help="Check records one at a time, or in NumPy batches (default: python)",
+    )
+    parser.add_argument(
+        "--region",
+        action="append",
+        default=[],
+        metavar="CHR:START-END",
+        help="Only validate records overlapping this 1-based, inclusive region "
+        "(repeatable); bgzipped VCFs with a .tbi/.csi index are read only where needed",
+    )
+    parser.add_argument(
+        "--targets",
+        metavar="BED",
+        help="Only validate records overlapping the regions of this BED file",
+    )
+    parser.add_argument(
+        "--decompress-threads",
+        type=int,
+        default=1,
+        help="Threads decompressing a bgzipped VCF ahead of the parser (default: 1)",
+    )
+    parser.add_argument(
+        "--report-format",
+        choices=REPORT_FORMATS,
+        help="Write every mismatch to --report-out as TSV, JSON Lines or compact "
+        "columnar binary (read back with report.read_columnar)",
+    )
+    parser.add_argument(
+        "--report-out",
+        default="-",
+        help="Mismatch report path (default: standard output)",
+    )
+    parser.add_argument(
+        "--max-mismatch-log",
+        type=int,
+        metavar="N",
+        help="Log at most N mismatch warnings; the report still gets all of them",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="PATH",
+        default=default_cache_path(),
+        help="Validation cache database; single-job runs without --region/--targets "
+        "or checkpoints re-validate only VCF blocks that changed since an earlier "
+        "run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES >> 20,
+        help="Evict least recently used cache entries beyond this size "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor update the validation cache",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="Skip checking the VCF ##contig headers against the reference "
+        "(names, lengths, MD5s; the reference manifest is cached as "
+        "<fasta>.manifest.json) before validating",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        metavar="LINES",
+        help="Save progress to <vcf>.checkpoint.json every LINES lines "
+        f"(default with --resume: {DEFAULT_CHECKPOINT_EVERY})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from <vcf>.checkpoint.json if a previous run was interrupted "
+        "(appends to --report-out)",
+    )
+    parser.add_argument(
+        "--annotation",
+        metavar="GFF3",
+        help="Count records overlapping each GFF3 feature type in the summary "
+        "(the index is cached as <gff>.idx)",
+    )
+    parser.add_argument(
+        "--consequences",
+        metavar="GENETIC_CODE",
+        help="With --annotation, also count the coding consequence (synonymous, "
+        "missense, nonsense, ...) of each ALT allele, translating with this "
+        "codon table (e.g. example_data/genetic_code.tsv)",
+    )
     args = parser.parse_args()
-    validator = VCFValidator(args.fasta, args.vcf)
-    validator.run()
-    validator.log_variant_summary()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.decompress_threads < 1:
+        parser.error("--decompress-threads must be at least 1")
+    if args.max_mismatch_log is not None and args.max_mismatch_log < 0:
+        parser.error("--max-mismatch-log must not be negative")
+    if args.cache_max_mb < 0:
+        parser.error("--cache-max-mb must not be negative")
+    if args.consequences and not args.annotation:
+        parser.error("--consequences requires --annotation")
+    if args.checkpoint_every is not None and args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be at least 1")
+    if (args.checkpoint_every or args.resume) and (
+        args.jobs > 1 or args.region or args.targets
+    ):
+        parser.error(
+            "--checkpoint-every/--resume cannot be combined with --jobs or --region/--targets"
+        )
+    regions = None
+    if args.region or args.targets:
+        if args.jobs > 1:
+            parser.error("--region/--targets cannot be combined with --jobs")
+        try:
+            targets = [parse_region(text) for text in args.region]
+            if args.targets:
+                targets.extend(read_bed(args.targets))
+        except (RuntimeError, ValueError) as e:
+            parser.error(str(e))
+        regions = RegionSet(targets)
+    report = None
+    if args.report_format is not None:
+        try:
+            report = open_report(
+                args.report_out, args.report_format, append=args.resume
+            )
+        except RuntimeError as e:
+            parser.error(str(e))
+    cache = None
+    if not (
+        args.no_cache
+        or args.jobs > 1
+        or regions is not None
+        or args.checkpoint_every
+        or args.resume
+    ):
+        try:
+            cache = ValidationCache(args.cache, args.cache_max_mb << 20)
+        except RuntimeError as e:
+            logging.getLogger("VCFValidator").warning(f"{e}; running without a cache")
+    validator = VCFValidator(
+        args.fasta,
+        args.vcf,
+        args.reference_backend,
+        args.jobs,
+        regions,
+        args.decompress_threads,
+        report,
+        args.max_mismatch_log,
+        args.checkpoint_every,
+        args.resume,
+        args.annotation,
+        args.consequences,
+        cache,
+    )
+    try:
+        validator.run(args.engine, not args.no_preflight)
+        validator.log_variant_summary()
+    finally:
+        if report is not None:
+            report.close()
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == "__main__":